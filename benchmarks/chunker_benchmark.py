@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark of text-to-speech chunking over recorded reply streams.
+
+Replays each stream in the corpus delta by delta, as the chat API delivered
+it, through SentenceChunker and through the chunk_text_for_tts function it
+replaced, and reports CPU time, how much text had streamed before the first
+chunk was ready (the text-side part of time to first audio) and chunk sizes.
+
+Run from the repository root:
+    python -m benchmarks.chunker_benchmark
+    python -m benchmarks.chunker_benchmark --scale 20    # longer replies
+    python -m benchmarks.chunker_benchmark --record prompts.txt
+
+--record sends each line of the file to the chat model and appends the
+streamed deltas to the corpus.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from src.utils import SentenceChunker
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streams.jsonl")
+
+
+def legacy_chunk_text_for_tts(text, buffer="", min_chunk_size=200):
+    """The chunker SentenceChunker replaced, kept as the benchmark baseline."""
+    current_buffer = buffer + text
+    if len(current_buffer) < min_chunk_size:
+        return None, current_buffer
+
+    break_points = [
+        ".\n", "!\n", "?\n",
+        ". ", "! ", "? ",
+        ".\t", "!\t", "?\t",
+        ".", "!", "?",
+        ":\n", ": ", ":",
+        ";\n", "; ", ";",
+        ",\n", ", ", ","
+    ]
+    for bp in break_points:
+        idx = current_buffer.rfind(bp)
+        if idx >= min_chunk_size:
+            if bp in [". ", ".", ".\n"]:
+                abbreviations = ["dr", "mr", "ms", "jr", "sr", "np", "itp", "itd", "prof"]
+                is_abbreviation = False
+                for abbr in abbreviations:
+                    if (idx >= len(abbr) and
+                            current_buffer[idx - len(abbr):idx].lower() == abbr):
+                        is_abbreviation = True
+                        break
+                if is_abbreviation:
+                    continue
+            end_pos = idx + len(bp)
+            return current_buffer[:end_pos], current_buffer[end_pos:]
+
+    if len(current_buffer) > 2000:
+        last_space = current_buffer.rfind(" ")
+        if last_space > min_chunk_size:
+            return current_buffer[:last_space + 1], current_buffer[last_space + 1:]
+    return None, current_buffer
+
+
+def run_legacy(deltas):
+    """Chunk one stream with the legacy function; returns (chunks, streamed chars at first chunk)."""
+    chunks, first_at, streamed, buffer = [], None, 0, ""
+    for delta in deltas:
+        streamed += len(delta)
+        chunk, buffer = legacy_chunk_text_for_tts(delta, buffer)
+        if chunk:
+            chunks.append(chunk)
+            if first_at is None:
+                first_at = streamed
+    if buffer.strip():
+        chunks.append(buffer)
+    return chunks, first_at if first_at is not None else streamed
+
+
+def run_chunker(deltas):
+    """Chunk one stream with SentenceChunker; returns (chunks, streamed chars at first chunk)."""
+    chunker = SentenceChunker()
+    chunks, first_at, streamed = [], None, 0
+    for delta in deltas:
+        streamed += len(delta)
+        ready = chunker.feed(delta)
+        if ready:
+            chunks.extend(ready)
+            if first_at is None:
+                first_at = streamed
+    rest = chunker.flush()
+    if rest.strip():
+        chunks.append(rest)
+    return chunks, first_at if first_at is not None else streamed
+
+
+def load_corpus(path, scale=1):
+    """Load recorded streams; scale > 1 repeats each reply to simulate longer ones."""
+    streams = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                deltas = json.loads(line)["deltas"]
+                if scale > 1:
+                    deltas = (deltas + [" "]) * scale
+                streams.append(deltas)
+    return streams
+
+
+def benchmark(name, run, streams, repeat):
+    """Time one implementation over the corpus and print its results."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for deltas in streams:
+            run(deltas)
+        timings.append(time.perf_counter() - started)
+
+    results = [run(deltas) for deltas in streams]
+    sizes = [len(chunk) for chunks, _ in results for chunk in chunks]
+    first = [first_at for _, first_at in results]
+    deltas = sum(len(stream) for stream in streams)
+    print(f"{name}:")
+    print(f"  CPU time: {min(timings) * 1e6 / deltas:.2f} us per delta "
+          f"({min(timings) * 1e3:.2f} ms per corpus pass)")
+    print(f"  Text streamed before the first chunk: median {statistics.median(first):.0f} chars, "
+          f"max {max(first)} chars")
+    print(f"  Chunks: {len(sizes)} (median {statistics.median(sizes):.0f} chars, max {max(sizes)})")
+
+
+def record(prompts_path, corpus_path):
+    """Record the chat model's streamed replies to each prompt into the corpus."""
+    from src.openai_client import chat_with_gpt, clear_conversation_history
+
+    with open(prompts_path, encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    with open(corpus_path, "a", encoding="utf-8") as corpus:
+        for prompt in prompts:
+            clear_conversation_history()
+            deltas = [chunk["data"] for chunk in chat_with_gpt(prompt, stream=True) if chunk["type"] == "content"]
+            corpus.write(json.dumps({"deltas": deltas}, ensure_ascii=False) + "\n")
+            print(f"Recorded {len(deltas)} deltas for: {prompt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTS chunking over recorded reply streams")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL file of {\"deltas\": [...]} streams")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat each reply this many times")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the corpus")
+    parser.add_argument("--record", metavar="PROMPTS", help="Record replies to the prompts in this file first")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.corpus)
+
+    streams = load_corpus(args.corpus, args.scale)
+    print(f"{len(streams)} streams, {sum(len(s) for s in streams)} deltas, "
+          f"{sum(len(''.join(s)) for s in streams)} chars\n")
+    benchmark("chunk_text_for_tts (legacy)", run_legacy, streams, args.repeat)
+    benchmark("SentenceChunker", run_chunker, streams, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
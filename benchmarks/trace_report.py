@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Latency report over the per-turn traces written by src/tracing.py.
+
+Milestones (key release, transcript, first token, first audio out, ...) are
+reported as time after the key release; stages (WAV assembly, upload
+encoding, transcription request, ...) as their duration, summed when a turn
+has several (e.g. segments of a long recording). Each line gives the p50,
+p95 and p99 over all turns that reached it.
+
+Run from the repository root:
+    python -m benchmarks.trace_report
+    python -m benchmarks.trace_report --file recordings/trace.jsonl --last 50
+"""
+import argparse
+import json
+import math
+import os
+from collections import OrderedDict
+
+DEFAULT_TRACE = os.path.join(os.getcwd(), "recordings", "trace.jsonl")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def load_turns(path, last=None):
+    """
+    Read a trace file into per-turn records.
+
+    Returns:
+        OrderedDict: turn id -> list of records, oldest turn first
+    """
+    turns = OrderedDict()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                turns.setdefault(record["turn"], []).append(record)
+    if last:
+        for turn_id in list(turns)[:-last]:
+            del turns[turn_id]
+    return turns
+
+
+def summarize(turns):
+    """
+    Collect each milestone's offset and each stage's duration per turn.
+
+    Returns:
+        tuple: (milestones, stages), each a dict of name -> list of values in ms
+    """
+    milestones, stages = {}, {}
+    for records in turns.values():
+        seen = set()
+        durations = {}
+        for record in records:
+            name = record["name"]
+            if record["kind"] == "mark":
+                # First occurrence, e.g. the first of several chat requests
+                if name not in seen:
+                    seen.add(name)
+                    milestones.setdefault(name, []).append(record["start_ms"])
+            else:
+                durations[name] = durations.get(name, 0.0) + record["duration_ms"]
+        for name, duration in durations.items():
+            stages.setdefault(name, []).append(duration)
+    return milestones, stages
+
+
+def print_table(title, values):
+    """Print p50/p95/p99 per name, ordered by median."""
+    print(title)
+    print(f"  {'':<24}{'turns':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, samples in sorted(values.items(), key=lambda item: percentile(item[1], 50)):
+        print(f"  {name:<24}{len(samples):>7}" +
+              "".join(f"{percentile(samples, p):>10.0f}" for p in (50, 95, 99)))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-turn latency traces")
+    parser.add_argument("--file", default=DEFAULT_TRACE, help="JSONL trace written by the assistant")
+    parser.add_argument("--last", type=int, help="Only the most recent N turns")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"No trace found at {args.file}; run the assistant with TRACING_ENABLED = True first.")
+        return
+
+    turns = load_turns(args.file, args.last)
+    milestones, stages = summarize(turns)
+    print(f"{len(turns)} turns from {args.file}\n")
+    print_table("Milestones (ms after key release)", milestones)
+    print_table("Stages (ms)", stages)
+
+
+if __name__ == "__main__":
+    main()
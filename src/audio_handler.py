@@ -1,38 +1,98 @@
 #!/usr/bin/env python3
+import asyncio
+import io
 import os
 import tempfile
 import sys
-import time
 import threading
 import queue
-from datetime import datetime
+from concurrent.futures import Future
+from functools import partial
 from pynput import keyboard
-import requests
 
-from src.config import logger, API_KEY, TRANSCRIPTION_ENDPOINT
+from src.config import logger, WARM_INPUT, INPUT_PREROLL_MS, INCREMENTAL_TRANSCRIPTION
 from src.audio_recorder import AudioRecorder, AudioRecorderConfig
+from src.audio_player import AudioOutputEngine, JitterBuffer
+from src.cancellation import is_cancelled
+from src.tracing import tracer
+from src.vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
+from src.incremental_transcription import IncrementalTranscriber
+# Transcription lives in openai_client; re-exported here for existing imports
+from src.openai_client import transcribe_audio, save_transcript, prewarm_connections
+
+def is_audio_buffer(audio):
+    """Check whether audio is WAV data held in memory rather than a file path."""
+    return isinstance(audio, (bytes, bytearray, memoryview))
+
+def _is_in_memory(audio):
+    """Check whether audio can be played without touching the filesystem."""
+    return is_audio_buffer(audio) or isinstance(audio, JitterBuffer)
+
+def _is_temp_file(file_path):
+    """Check whether a file lives in the system temporary directory."""
+    temp_dir = os.path.realpath(tempfile.gettempdir())
+    return os.path.dirname(os.path.realpath(file_path)) == temp_dir
 
 class SpaceKeyRecorder:
-    """Record audio while the space key is held down."""
+    """Record audio while the space key is held down.
     
-    def __init__(self):
-        """Initialize the space key recorder."""
+    Each wait for a recording is backed by a Future that the key listener
+    resolves with the finished (wav_buffer, wav_file_path) the moment SPACE is
+    released, so callers never poll. Pressing SPACE while an answer is playing
+    cancels the turn's token (barge-in) and starts recording at once; that
+    recording is handed to the next wait even if it finishes before the
+    caller gets there.
+    """
+    
+    def __init__(self, warm_input=WARM_INPUT, incremental=INCREMENTAL_TRANSCRIPTION):
+        """Initialize the space key recorder.
+        
+        Args:
+            warm_input (bool, optional): Keep the input stream open between recordings
+                                         and prepend a short pre-roll to each one.
+            incremental (bool, optional): Transcribe segments at pauses while SPACE is
+                                          still held, so only the tail is left on release.
+        """
         self.recorder = None
         self.is_recording = False
         self.space_pressed = False
         self.listener = None
+        self.exit_requested = False
+        self.recording_future = None
+        self.future_lock = threading.Lock()
+        # Recording finished while nobody was waiting, e.g. after a barge-in
+        self.early_recording = None
+        # Token of the turn being answered, cancelled when SPACE is pressed
+        self.barge_in_token = None
         # Create a recorder with OpenAI Whisper optimized settings
-        config = AudioRecorderConfig(preset="openai_whisper")
+        config = AudioRecorderConfig(
+            preset="openai_whisper",
+            warm_input=warm_input,
+            preroll_ms=INPUT_PREROLL_MS
+        )
         self.recorder = AudioRecorder(config=config)
+        self.transcriber = None
+        if incremental:
+            self.transcriber = IncrementalTranscriber(self.recorder, transcribe_audio, save_func=save_transcript)
+        # Share the recorder's PyAudio instance with the playback engine
+        audio_queue_manager.output_engine.attach(self.recorder.audio)
         
     def on_press(self, key):
         """Handle key press events."""
         if key == keyboard.Key.space and not self.space_pressed:
             self.space_pressed = True
+            token = self.barge_in_token
+            if token is not None and not token.cancelled:
+                logger.info("Space pressed during the answer - interrupting it")
+                token.cancel()
             if not self.is_recording:
                 logger.info("Space pressed - Starting recording...")
+                tracer.begin_turn()
+                tracer.mark("key_press")
                 self.is_recording = True
                 self.recorder.start_recording()
+                # Connect to the API while the user is still speaking
+                prewarm_connections()
     
     def on_release(self, key):
         """Handle key release events."""
@@ -40,15 +100,43 @@ class SpaceKeyRecorder:
             self.space_pressed = False
             if self.is_recording:
                 logger.info("Space released - Stopping recording...")
+                tracer.mark("key_release")
                 self.is_recording = False
-                return self.recorder.stop_recording()
+                with tracer.span("wav_assembly"):
+                    result = self.recorder.stop_recording()
+                self._resolve_recording(result)
         elif key == keyboard.Key.esc:
-            # Stop listener
+            # Stop listener and release anyone waiting for a recording
+            self.exit_requested = True
+            self._resolve_recording((None, None))
             return False
-        return None, None
+        return None
+    
+    def _resolve_recording(self, result):
+        """Hand a finished recording to whoever is waiting for it."""
+        with self.future_lock:
+            future = self.recording_future
+            self.recording_future = None
+        
+        if future is not None and not future.done():
+            future.set_result(result)
+        elif result[0] is not None:
+            # Keep it for the next request_recording(), e.g. the loop is still unwinding a barge-in
+            with self.future_lock:
+                self.early_recording = result
+    
+    def set_barge_in_token(self, cancel_token):
+        """Cancel a turn's token when SPACE is pressed while it is being answered.
+        
+        Args:
+            cancel_token (CancellationToken): Token of the turn being answered,
+                                              or None once the answer is over
+        """
+        self.barge_in_token = cancel_token
     
     def start_listening(self):
         """Start listening for keyboard events."""
+        self.exit_requested = False
         self.listener = keyboard.Listener(
             on_press=self.on_press,
             on_release=self.on_release)
@@ -58,36 +146,223 @@ class SpaceKeyRecorder:
         """Stop listening for keyboard events."""
         if self.listener:
             self.listener.stop()
-            
-    def wait_for_space_key_recording(self):
-        """Wait for user to press and release space key to record audio."""
+        self._resolve_recording((None, None))
+    
+    def request_recording(self):
+        """Get a Future for the next recording.
+        
+        Returns:
+            Future: Resolves to (wav_buffer, wav_file_path) when SPACE is released,
+                    or to (None, None) if the user pressed ESC
+        """
+        if self.exit_requested and self.listener:
+            # ESC was pressed; let the old listener finish stopping before restarting
+            self.listener.join()
         if not self.listener or not self.listener.running:
             self.start_listening()
+        
+        with self.future_lock:
+            if self.early_recording is not None:
+                future = Future()
+                future.set_result(self.early_recording)
+                self.early_recording = None
+                return future
+            if self.recording_future is None or self.recording_future.done():
+                self.recording_future = Future()
+            return self.recording_future
             
+    def wait_for_space_key_recording(self):
+        """Wait for user to press and release space key to record audio.
+        
+        Returns:
+            tuple: (wav_buffer, wav_file_path) if recording was successful,
+                  (None, None) otherwise
+        """
+        future = self.request_recording()
         logger.info("Press and hold SPACE to record, release to stop. Press ESC to exit.")
+        return future.result()
+    
+    async def wait_for_space_key_recording_async(self):
+        """Asynchronous variant of wait_for_space_key_recording.
         
-        # Wait for recording to complete (space key released)
-        while self.listener.running and not self.is_recording:
-            time.sleep(0.1)  # Small delay to prevent CPU hogging
-            
-        while self.listener.running and self.is_recording:
-            time.sleep(0.1)  # Wait while recording
-            
-        # If recording was just completed, return the result
-        if not self.is_recording and self.recorder.frames:
-            # Return the last recording result
-            return self.recorder.stop_recording()
-            
-        return None, None
+        Returns:
+            tuple: (wav_buffer, wav_file_path) if recording was successful,
+                  (None, None) otherwise
+        """
+        future = self.request_recording()
+        logger.info("Press and hold SPACE to record, release to stop. Press ESC to exit.")
+        return await asyncio.wrap_future(future)
+    
+    def transcribe(self, wav_buffer):
+        """Transcribe a recording returned by wait_for_space_key_recording.
+        
+        Args:
+            wav_buffer (io.BytesIO): The recorded WAV audio
+        
+        Returns:
+            str: The transcribed text, or None if transcription failed
+        """
+        if self.transcriber:
+            return self.transcriber.transcribe(wav_buffer)
+        return transcribe_audio(wav_buffer)
         
     def close(self):
         """Clean up resources."""
         self.stop_listening()
+        if self.transcriber:
+            self.transcriber.close()
         if self.recorder:
+            # Close the output stream before the shared PyAudio instance goes away
+            audio_queue_manager.stop()
+            audio_queue_manager.output_engine.close()
             self.recorder.close()
 
+class HandsFreeRecorder:
+    """Record utterances detected by local voice activity detection.
+    
+    The input stream stays warm and every chunk is run through a
+    VoiceActivityDetector. Recording starts when speech is detected (the
+    pre-roll keeps the onset) and stops as soon as the detector endpoints,
+    so a turn ends the moment the user stops talking.
+    """
+    
+    def __init__(self):
+        """Initialize the hands-free recorder."""
+        self.exit_requested = False
+        self.recording_future = None
+        self.future_lock = threading.Lock()
+        # Voice activity detection needs the continuous input stream
+        config = AudioRecorderConfig(
+            preset="openai_whisper",
+            warm_input=True,
+            preroll_ms=INPUT_PREROLL_MS
+        )
+        self.recorder = AudioRecorder(config=config)
+        self.vad = VoiceActivityDetector(config.sample_rate)
+        self.recorder.add_frame_listener(self._on_frame)
+        # Share the recorder's PyAudio instance with the playback engine
+        audio_queue_manager.output_engine.attach(self.recorder.audio)
+    
+    def _on_frame(self, data):
+        """Run voice activity detection on a captured chunk (audio thread)."""
+        with self.future_lock:
+            future = self.recording_future
+        
+        if future is None:
+            # Nobody is waiting for an utterance, e.g. while an answer is playing
+            self.vad.reset()
+            return
+        
+        for event in self.vad.process(data):
+            if event == SPEECH_START:
+                logger.info("Speech detected - Starting recording...")
+                tracer.begin_turn()
+                tracer.mark("speech_start")
+                self.recorder.start_recording()
+                prewarm_connections()
+            elif event == SPEECH_END:
+                self._end_utterance(future)
+                return
+        
+        if self.recorder.is_recording and self.recorder.capture_buffer.is_full:
+            logger.warning("Maximum recording length reached")
+            self._end_utterance(future)
+    
+    def _end_utterance(self, future):
+        """Detach the waiting Future and finish the recording off the audio thread."""
+        tracer.mark("speech_end")
+        with self.future_lock:
+            self.recording_future = None
+        self.vad.reset()
+        # Stopping assembles and saves the WAV, which must not block the audio callback
+        threading.Thread(target=self._finish_recording, args=(future,), daemon=True).start()
+    
+    def _finish_recording(self, future):
+        """Stop the recorder and hand the utterance to the waiting caller."""
+        with tracer.span("wav_assembly"):
+            result = self.recorder.stop_recording()
+        stats = self.vad.stats()
+        logger.info(
+            f"Speech ended - endpoint detected {stats['last_endpoint_latency_ms']} ms after last speech "
+            f"(VAD CPU {stats['avg_cpu_us_per_frame']:.1f} us/frame avg, "
+            f"{stats['max_cpu_us_per_frame']:.1f} us/frame max)"
+        )
+        self._resolve(future, result)
+    
+    def _resolve(self, future, result):
+        """Resolve future unless close() or the recording thread already did."""
+        with self.future_lock:
+            if not future.done():
+                future.set_result(result)
+    
+    def request_recording(self):
+        """Get a Future for the next detected utterance.
+        
+        Returns:
+            Future: Resolves to (wav_buffer, wav_file_path) once the user stops talking,
+                    or to (None, None) if the recorder is closed
+        """
+        with self.future_lock:
+            if self.recording_future is None or self.recording_future.done():
+                self.recording_future = Future()
+            return self.recording_future
+    
+    def wait_for_recording(self):
+        """Wait for the user to say something and stop talking.
+        
+        Returns:
+            tuple: (wav_buffer, wav_file_path) if recording was successful,
+                  (None, None) otherwise
+        """
+        future = self.request_recording()
+        logger.info("Listening... start speaking whenever you are ready.")
+        return future.result()
+    
+    async def wait_for_recording_async(self):
+        """Asynchronous variant of wait_for_recording."""
+        future = self.request_recording()
+        logger.info("Listening... start speaking whenever you are ready.")
+        return await asyncio.wrap_future(future)
+    
+    # Drop-in compatibility with SpaceKeyRecorder
+    wait_for_space_key_recording = wait_for_recording
+    wait_for_space_key_recording_async = wait_for_recording_async
+    
+    def transcribe(self, wav_buffer):
+        """Transcribe a detected utterance.
+        
+        Utterances end at the first pause, so they are sent in one request.
+        
+        Args:
+            wav_buffer (io.BytesIO): The recorded WAV audio
+        
+        Returns:
+            str: The transcribed text, or None if transcription failed
+        """
+        return transcribe_audio(wav_buffer)
+    
+    def close(self):
+        """Clean up resources."""
+        self.exit_requested = True
+        with self.future_lock:
+            future = self.recording_future
+            self.recording_future = None
+        if future is not None:
+            self._resolve(future, (None, None))
+        self.recorder.remove_frame_listener(self._on_frame)
+        # Close the output stream before the shared PyAudio instance goes away
+        audio_queue_manager.stop()
+        audio_queue_manager.output_engine.close()
+        self.recorder.close()
+
 class AudioQueueManager:
-    """Manages a queue of audio files to play sequentially without overlapping."""
+    """Manages a queue of audio files to play sequentially without overlapping.
+    
+    The player thread blocks on the queue instead of polling, and every queued
+    item gets a Future that resolves once the item has been played. Items
+    queued with a cancellation token are dropped when it is cancelled, and
+    the one playing stops within one audio buffer.
+    """
     
     def __init__(self):
         """Initialize the audio queue manager."""
@@ -95,6 +370,10 @@ class AudioQueueManager:
         self.is_playing = False
         self.player_thread = None
         self.stop_requested = False
+        self.output_engine = AudioOutputEngine()
+        # Number of queued items that have not finished playing yet
+        self.pending_count = 0
+        self.condition = threading.Condition()
     
     def start_player(self):
         """Start the audio player thread if not already running."""
@@ -106,52 +385,86 @@ class AudioQueueManager:
     
     def _player_thread_func(self):
         """Audio player thread function that processes the queue."""
-        while not self.stop_requested:
+        while True:
+            # Block until the next item arrives; None is the stop sentinel
+            item = self.audio_queue.get()
+            if item is None:
+                self.audio_queue.task_done()
+                break
+            
+            audio, future, cancel_token = item
             try:
-                # Get the next audio file to play with a shorter timeout (reduced from 0.5s)
-                file_path = self.audio_queue.get(timeout=0.1)
+                # Drop everything still queued when stopping or when nobody will hear it
+                if self.stop_requested or is_cancelled(cancel_token):
+                    future.cancel()
                 
-                # Mark as playing
-                self.is_playing = True
+                # Skip items whose futures were cancelled while queued
+                if not future.set_running_or_notify_cancel():
+                    continue
                 
-                # Play the audio file (blocking)
-                logger.debug(f"Playing audio file: {file_path}")
-                if os.path.exists(file_path):
-                    # Play the audio with internal play_audio function (always blocking)
-                    self._play_audio_internal(file_path)
-                    
-                    # Clean up temporary files
-                    if '/tmp/' in file_path or 'temp' in file_path:
-                        try:
-                            os.remove(file_path)
-                            logger.debug(f"Removed temporary audio file: {file_path}")
-                        except Exception as e:
-                            logger.error(f"Error removing temp file: {str(e)}")
-                else:
-                    logger.warning(f"Audio file not found: {file_path}")
+                with self.condition:
+                    self.is_playing = True
                 
-                # Mark the task as done
+                try:
+                    self._play_item(audio, cancel_token)
+                    interrupted = is_cancelled(cancel_token)
+                    
+                    # Nothing queued behind this item: wait until its last sample is out,
+                    # unless the next sentence arrives first and continues the stream
+                    if (not interrupted and self.audio_queue.empty()
+                            and self.output_engine.drain(interrupted=lambda: not self.audio_queue.empty())):
+                        tracer.mark("last_audio_out", latest=True)
+                    future.set_result(not interrupted)
+                except Exception as e:
+                    logger.error(f"Error in audio player thread: {str(e)}")
+                    future.set_exception(e)
+            finally:
                 self.audio_queue.task_done()
-                self.is_playing = False
-                
-                # Reduce the delay between chunks by waiting briefly
-                # This small delay helps prevent system overload while still keeping transitions smooth
-                time.sleep(0.05)
-                
-            except queue.Empty:
-                # No items in the queue
-                self.is_playing = False
-                
-                # Use a shorter sleep when queue is empty to be more responsive
-                time.sleep(0.05)
-            except Exception as e:
-                logger.error(f"Error in audio player thread: {str(e)}")
-                self.is_playing = False
-    
-    def _play_audio_internal(self, file_path):
-        """Internal function to play audio file with platform-specific commands."""
+                with self.condition:
+                    self.pending_count -= 1
+                    self.is_playing = False
+                    self.condition.notify_all()
+    
+    def _play_item(self, audio, cancel_token=None):
+        """Play a single queued item (blocking)."""
+        if isinstance(audio, JitterBuffer):
+            # Streamed speech: starts as soon as the pre-roll has arrived
+            logger.debug("Playing streamed audio")
+            self.output_engine.play_stream(audio, cancel_token, on_start=self._on_audio_start)
+        elif is_audio_buffer(audio):
+            logger.debug(f"Playing in-memory audio ({len(audio)} bytes)")
+            self._play_audio_buffer(audio, cancel_token)
+        elif os.path.exists(audio):
+            logger.debug(f"Playing audio file: {audio}")
+            # Play the audio with internal play_audio function (always blocking)
+            self._play_audio_internal(audio, cancel_token)
+            
+            # Clean up temporary files created by text_to_speech
+            if _is_temp_file(audio):
+                try:
+                    os.remove(audio)
+                    logger.debug(f"Removed temporary audio file: {audio}")
+                except Exception as e:
+                    logger.error(f"Error removing temp file: {str(e)}")
+        else:
+            logger.warning(f"Audio file not found: {audio}")
+    
+    @staticmethod
+    def _on_audio_start():
+        """Note when the first sample of a turn's answer is written to the device."""
+        tracer.mark("first_audio_out", once=True)
+    
+    def _play_audio_internal(self, file_path, cancel_token=None):
+        """Internal function to play an audio file.
+        
+        WAV files are decoded in-process and written to the persistent output
+        stream; other formats fall back to platform-specific commands, which
+        cannot be interrupted.
+        """
         try:
-            if sys.platform == 'darwin':  # macOS
+            if file_path.lower().endswith(".wav"):
+                self.output_engine.play_wav(file_path, cancel_token, on_start=self._on_audio_start)
+            elif sys.platform == 'darwin':  # macOS
                 os.system(f"afplay {file_path}")
             elif sys.platform == 'linux':
                 os.system(f"aplay {file_path}")
@@ -162,26 +475,64 @@ class AudioQueueManager:
         except Exception as e:
             logger.error(f"Error playing audio: {str(e)}")
     
-    def add_to_queue(self, file_path):
-        """Add an audio file to the playback queue.
+    def _play_audio_buffer(self, audio, cancel_token=None):
+        """Internal function to play WAV data held in memory."""
+        try:
+            if bytes(audio[:4]) != b"RIFF":
+                logger.warning("Unsupported in-memory audio format, expected WAV data")
+                return
+            self.output_engine.play_wav(io.BytesIO(audio), cancel_token, on_start=self._on_audio_start)
+        except Exception as e:
+            logger.error(f"Error playing audio: {str(e)}")
+    
+    def add_to_queue(self, file_path, cancel_token=None):
+        """Add audio to the playback queue.
         
         Args:
-            file_path (str): Path to the audio file to play
+            file_path (str, bytes, memoryview or JitterBuffer): Path to the audio file
+                to play, WAV data held in memory, or a buffer of streamed PCM speech
+            cancel_token (CancellationToken, optional): Token of the turn the audio belongs
+                to; cancelling it drops the item or interrupts its playback
+        
+        Returns:
+            Future: Resolves to True once the item has been played (False if it was
+                    interrupted), is cancelled if the item was dropped, or None if it was rejected
         """
-        if not os.path.exists(file_path):
+        if not _is_in_memory(file_path) and not os.path.exists(file_path):
             logger.warning(f"Audio file does not exist: {file_path}")
-            return
+            return None
+        
+        future = Future()
+        if is_cancelled(cancel_token):
+            # The turn was interrupted; nobody will hear this
+            future.cancel()
+            return future
         
         # Add to queue
-        self.audio_queue.put(file_path)
+        with self.condition:
+            self.pending_count += 1
+        if cancel_token is not None:
+            callback = partial(self._cancel_item, file_path, future)
+            cancel_token.add_callback(callback)
+            future.add_done_callback(lambda _: cancel_token.remove_callback(callback))
+        self.audio_queue.put((file_path, future, cancel_token))
         
         # Make sure player is running
         self.start_player()
+        return future
+    
+    def _cancel_item(self, audio, future):
+        """Drop a queued item whose turn was cancelled (runs on the cancelling thread)."""
+        future.cancel()
+        if isinstance(audio, JitterBuffer):
+            # Wake the player if it is waiting for a download that will never finish
+            audio.close()
     
     def stop(self):
-        """Stop the audio player thread."""
+        """Stop the audio player thread, dropping anything still queued."""
         self.stop_requested = True
         if self.player_thread and self.player_thread.is_alive():
+            self.audio_queue.put(None)
             self.player_thread.join(timeout=1.0)
     
     def wait_for_queue_empty(self, timeout=None):
@@ -193,70 +544,33 @@ class AudioQueueManager:
         Returns:
             bool: True if queue is empty and not playing, False if timeout occurred
         """
-        start_time = time.time()
-        while self.is_playing or not self.audio_queue.empty():
-            if timeout is not None and time.time() - start_time > timeout:
-                return False
-            # Reduced wait time for more responsiveness
-            time.sleep(0.05)
-        return True
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending_count == 0, timeout)
 
 # Create a global instance of the audio queue manager
 audio_queue_manager = AudioQueueManager()
 
-def transcribe_audio(audio_data):
-    """Transcribe audio data using OpenAI's Whisper API."""
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-        temp_file.write(audio_data.getvalue())
-        temp_file.flush()
-        
-        logger.info("Transcribing audio...")
-        
-        with open(temp_file.name, "rb") as audio_file:
-            files = {"file": (os.path.basename(temp_file.name), audio_file, "audio/wav")}
-            headers = {"Authorization": f"Bearer {API_KEY}"}
-            data = {"model": "whisper-1"}
-            
-            response = requests.post(
-                TRANSCRIPTION_ENDPOINT,
-                headers=headers,
-                files=files,
-                data=data
-            )
-            
-            if response.status_code == 200:
-                transcription = response.json()
-                logger.info(f"Transcription: {transcription['text']}")
-                
-                # Save transcription to a text file in the same directory as the audio file
-                audio_dirname = os.path.dirname(temp_file.name)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                transcript_path = os.path.join(os.getcwd(), "recordings", f"transcript_{timestamp}.txt")
-                
-                with open(transcript_path, 'w') as f:
-                    f.write(transcription['text'])
-                    
-                logger.info(f"Transcription saved to {transcript_path}")
-                
-                return transcription['text']
-            else:
-                logger.error(f"Transcription failed: {response.text}")
-                return None
-
-def play_audio(file_path, block=True):
-    """Play audio from the given file path.
+def play_audio(file_path, block=True, cancel_token=None):
+    """Play audio from the given file path or in-memory buffer.
     
     Args:
-        file_path (str): Path to the audio file to play
+        file_path (str, bytes, memoryview or JitterBuffer): Path to the audio file
+            to play, WAV data held in memory, or a buffer of streamed PCM speech
         block (bool): Whether to block until playback completes (default: True)
+        cancel_token (CancellationToken, optional): Stops playback when cancelled
     """
-    if not os.path.exists(file_path):
+    if not _is_in_memory(file_path) and not os.path.exists(file_path):
         logger.warning(f"Audio file does not exist: {file_path}")
         return
     
     # Use the queue manager for all audio playback to prevent overlapping
-    audio_queue_manager.add_to_queue(file_path)
+    future = audio_queue_manager.add_to_queue(file_path, cancel_token)
     
     # If block is True, wait for this file and all previous files to finish playing
     if block:
-        audio_queue_manager.wait_for_queue_empty()
+        try:
+            future.result()
+        except Exception:
+            # Already logged by the player thread
+            pass
+    return future
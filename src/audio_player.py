@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Audio Player Module for Voice Assistant
+
+This module keeps a single PyAudio output stream open and writes decoded PCM
+into it back to back, so consecutive speech chunks play without the process
+start-up and device open/close cost of an external player.
+"""
+import threading
+import time
+import wave
+
+import pyaudio
+
+from src.config import logger, CHUNK, TTS_STREAM_PREROLL_MS
+
+# How often drain() checks whether it should stop waiting
+DRAIN_POLL_SECONDS = 0.005
+from src.cancellation import is_cancelled
+
+
+class JitterBuffer:
+    """Thread-safe PCM buffer between a network download and the output device.
+
+    Reads block until a small pre-roll has accumulated, so playback can start
+    as soon as the first bytes arrive without immediately underrunning. If the
+    buffer runs dry mid-stream, reads wait for the pre-roll again.
+    """
+
+    def __init__(self, preroll_ms=TTS_STREAM_PREROLL_MS, sample_width=2, channels=1, rate=24000):
+        """
+        Initialize the jitter buffer.
+
+        Args:
+            preroll_ms (int, optional): Audio to accumulate before playback starts.
+            sample_width (int, optional): Bytes per sample. Defaults to 2.
+            channels (int, optional): Number of channels. Defaults to 1.
+            rate (int, optional): Sample rate in Hz. Defaults to 24000.
+        """
+        self.sample_width = sample_width
+        self.channels = channels
+        self.rate = rate
+        self.frame_bytes = sample_width * channels
+        self.preroll_bytes = int(rate * preroll_ms / 1000) * self.frame_bytes
+        self.data = bytearray()
+        self.closed = False
+        self.buffering = True
+        self.condition = threading.Condition()
+
+    def write(self, data):
+        """Append PCM bytes received from the producer."""
+        with self.condition:
+            self.data += data
+            self.condition.notify_all()
+
+    def close(self):
+        """Mark the end of the stream; remaining data can still be read."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def read(self, max_bytes):
+        """Read up to max_bytes of whole PCM frames.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to return
+
+        Returns:
+            bytes: PCM data, or b'' once the stream is closed and drained
+        """
+        with self.condition:
+            if self.buffering:
+                self.condition.wait_for(lambda: self.closed or len(self.data) >= self.preroll_bytes)
+                self.buffering = False
+
+            self.condition.wait_for(lambda: self.closed or len(self.data) >= self.frame_bytes)
+            size = min(max_bytes, len(self.data))
+            size -= size % self.frame_bytes
+            chunk = bytes(self.data[:size])
+            del self.data[:size]
+
+            if not self.data and not self.closed:
+                # Underrun: build up the pre-roll again before the next read
+                self.buffering = True
+            return chunk
+
+
+class AudioOutputEngine:
+    """Persistent PyAudio output stream for gapless playback."""
+
+    def __init__(self, audio=None, chunk_size=CHUNK):
+        """
+        Initialize the output engine.
+
+        Args:
+            audio (pyaudio.PyAudio, optional): Shared PyAudio instance to open the
+                                               stream on. Created on first use if None.
+            chunk_size (int, optional): Frames written to the device per call.
+        """
+        self.audio = audio
+        self.owns_audio = False
+        self.chunk_size = chunk_size
+        self.stream = None
+        self.stream_format = None
+        self.lock = threading.Lock()
+        # time.monotonic() at which everything written so far will have been played
+        self.played_until = 0.0
+
+    def attach(self, audio):
+        """Use an existing PyAudio instance, e.g. the one owned by the recorder.
+
+        Args:
+            audio (pyaudio.PyAudio): The PyAudio instance to open streams on
+        """
+        with self.lock:
+            if audio is self.audio:
+                return
+            self._close_stream()
+            if self.owns_audio:
+                self.audio.terminate()
+            self.audio = audio
+            self.owns_audio = False
+
+    def _ensure_stream(self, sample_width, channels, rate):
+        """Return an open output stream for the given PCM format.
+
+        The existing stream is reused whenever the format matches, which is the
+        case for every chunk coming from the TTS endpoint.
+        """
+        stream_format = (sample_width, channels, rate)
+        if self.stream is not None and self.stream_format == stream_format:
+            if self.stream.is_stopped():
+                self.stream.start_stream()
+            return self.stream
+
+        self._close_stream()
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+            self.owns_audio = True
+
+        self.stream = self.audio.open(
+            format=self.audio.get_format_from_width(sample_width),
+            channels=channels,
+            rate=rate,
+            output=True,
+            frames_per_buffer=self.chunk_size
+        )
+        self.stream_format = stream_format
+        logger.debug(f"Opened output stream: {rate}Hz, {channels} channel(s), {sample_width * 8}-bit")
+        return self.stream
+
+    def play_wav(self, source, cancel_token=None, on_start=None):
+        """Decode a WAV file and write its frames to the output stream (blocking).
+
+        Args:
+            source (str or file-like): Path or binary file object with WAV data
+            cancel_token (CancellationToken, optional): Stops playback within one
+                                                        chunk when cancelled
+            on_start (callable, optional): Called right before the first frames are written
+
+        Returns:
+            bool: True if the whole file was played, False if it was cancelled
+        """
+        with self.lock:
+            with wave.open(source, 'rb') as wf:
+                stream = self._ensure_stream(wf.getsampwidth(), wf.getnchannels(), wf.getframerate())
+                frames = wf.readframes(self.chunk_size)
+                if frames and on_start:
+                    on_start()
+                while frames:
+                    if is_cancelled(cancel_token):
+                        self._abort_stream()
+                        return False
+                    self._write(stream, frames)
+                    frames = wf.readframes(self.chunk_size)
+        return True
+
+    def play_stream(self, buffer, cancel_token=None, on_start=None):
+        """Play PCM from a JitterBuffer as it arrives (blocking until drained).
+
+        Args:
+            buffer (JitterBuffer): Buffer being filled by a streaming download
+            cancel_token (CancellationToken, optional): Stops playback within one
+                                                        chunk when cancelled
+            on_start (callable, optional): Called right before the first frames are written,
+                                           i.e. once the pre-roll has arrived
+
+        Returns:
+            bool: True if the whole stream was played, False if it was cancelled
+        """
+        read_size = self.chunk_size * buffer.frame_bytes
+        with self.lock:
+            stream = self._ensure_stream(buffer.sample_width, buffer.channels, buffer.rate)
+            frames = buffer.read(read_size)
+            if frames and on_start:
+                on_start()
+            while frames:
+                if is_cancelled(cancel_token):
+                    self._abort_stream()
+                    return False
+                self._write(stream, frames)
+                frames = buffer.read(read_size)
+        return not is_cancelled(cancel_token)
+
+    def write_pcm(self, data, sample_width=2, channels=1, rate=24000):
+        """Write raw PCM data to the output stream (blocking).
+
+        Args:
+            data (bytes): Interleaved little-endian PCM samples
+            sample_width (int, optional): Bytes per sample. Defaults to 2.
+            channels (int, optional): Number of channels. Defaults to 1.
+            rate (int, optional): Sample rate in Hz. Defaults to 24000.
+        """
+        with self.lock:
+            stream = self._ensure_stream(sample_width, channels, rate)
+            self._write(stream, bytes(data))
+
+    def _write(self, stream, frames):
+        """Write frames and note when the device will have played them (lock held)."""
+        stream.write(frames)
+        # A blocking write returns once the frames fit in the device buffer,
+        # which then holds about one output latency of audio
+        try:
+            latency = stream.get_output_latency()
+        except Exception:
+            latency = 0.0
+        self.played_until = time.monotonic() + latency
+
+    def drain(self, interrupted=None):
+        """Block until every sample written so far has been played.
+
+        The stream keeps running, so the next write starts without the device
+        being stopped and restarted; between writes it plays silence.
+
+        Args:
+            interrupted (callable, optional): Returns True to stop waiting early,
+                                              e.g. once more audio has been queued
+
+        Returns:
+            bool: True if the audio played out, False if interrupted first
+        """
+        while True:
+            remaining = self.played_until - time.monotonic()
+            if remaining <= 0:
+                return True
+            if interrupted is not None and interrupted():
+                return False
+            time.sleep(min(remaining, DRAIN_POLL_SECONDS))
+
+    def _abort_stream(self):
+        """Close the output stream without playing out what is already buffered.
+
+        Closing an active PortAudio stream discards its pending buffers, so
+        the device goes quiet at once; the next write opens a new stream.
+        """
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            except Exception as e:
+                logger.error(f"Error aborting output stream: {str(e)}")
+            self.stream = None
+            self.stream_format = None
+
+    def _close_stream(self):
+        """Close the current output stream, if any."""
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception as e:
+                logger.error(f"Error closing output stream: {str(e)}")
+            self.stream = None
+            self.stream_format = None
+
+    def close(self):
+        """Close the output stream and release the PyAudio instance if we own it."""
+        with self.lock:
+            self._close_stream()
+            if self.owns_audio and self.audio is not None:
+                self.audio.terminate()
+            self.audio = None
+            self.owns_audio = False
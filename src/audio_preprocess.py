@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Upload preprocessing for the Voice Assistant application.
+
+Before a recording is sent for transcription, leading and trailing silence is
+trimmed with a vectorized energy gate, the audio is downmixed and resampled to
+a speech-friendly rate, and it is optionally encoded with a compact codec.
+FLAC and Ogg/Opus encoding use the optional `soundfile` package; without it
+the audio is uploaded as 16-bit WAV.
+"""
+import io
+import wave
+from math import gcd
+
+import numpy as np
+
+from src.config import (logger, UPLOAD_TRIM_SILENCE, UPLOAD_SAMPLE_RATE, UPLOAD_CODEC,
+                        UPLOAD_BANDWIDTH_KBPS)
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+# Energy gate settings for silence trimming
+GATE_FRAME_MS = 20
+GATE_RELATIVE_DB = 35  # Frames this far below the loudest frame count as silence
+GATE_FLOOR_DB = -55  # Frames below this level always count as silence
+GATE_PADDING_MS = 150  # Audio kept around the detected speech
+
+# File extension and soundfile format/subtype for each upload codec
+CODECS = {
+    "wav": ("wav", None, None),
+    "flac": ("flac", "FLAC", "PCM_16"),
+    "ogg": ("ogg", "OGG", "OPUS")
+}
+
+# Codecs we already warned about falling back from, so the warning is shown once
+_missing_codec_warnings = set()
+
+
+def _read_wav(wav_buffer):
+    """Read a WAV buffer into mono float32 samples in [-1, 1)."""
+    wav_buffer.seek(0)
+    with wave.open(wav_buffer, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Unsupported sample width: {wf.getsampwidth()} bytes")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        pcm = wf.readframes(wf.getnframes())
+    wav_buffer.seek(0)
+
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def trim_silence(samples, rate):
+    """
+    Remove leading and trailing silence with a frame energy gate.
+
+    Args:
+        samples (np.ndarray): Mono float samples
+        rate (int): Sample rate in Hz
+
+    Returns:
+        np.ndarray: The trimmed samples, or the input if no speech was found
+    """
+    frame = int(rate * GATE_FRAME_MS / 1000)
+    frame_count = samples.size // frame
+    if not frame_count:
+        return samples
+
+    frames = samples[:frame_count * frame].reshape(frame_count, frame)
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    threshold = max(energy_db.max() - GATE_RELATIVE_DB, GATE_FLOOR_DB)
+    active = np.flatnonzero(energy_db > threshold)
+    if not active.size:
+        return samples
+
+    padding = int(rate * GATE_PADDING_MS / 1000)
+    start = max(0, active[0] * frame - padding)
+    end = min(samples.size, (active[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+
+def resample(samples, src_rate, dst_rate):
+    """
+    Resample audio with a windowed-sinc low-pass filter and interpolation.
+
+    Args:
+        samples (np.ndarray): Mono float samples
+        src_rate (int): Current sample rate in Hz
+        dst_rate (int): Target sample rate in Hz
+
+    Returns:
+        np.ndarray: Resampled samples
+    """
+    if src_rate == dst_rate or not samples.size:
+        return samples
+
+    if dst_rate < src_rate:
+        # Remove content above the new Nyquist frequency before decimating
+        cutoff = 0.45 * dst_rate / src_rate
+        taps = np.arange(63) - 31
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(taps.size)
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+
+    divisor = gcd(src_rate, dst_rate)
+    length = samples.size * (dst_rate // divisor) // (src_rate // divisor)
+    positions = np.arange(length) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def _encode(samples, rate, codec):
+    """Encode mono float samples into an in-memory file for upload."""
+    extension, file_format, subtype = CODECS[codec]
+    upload = io.BytesIO()
+    upload.name = f"recording.{extension}"
+
+    if file_format is None:
+        pcm = (np.clip(samples, -1.0, 1.0 - 1.0 / 32768) * 32768).astype("<i2")
+        with wave.open(upload, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm.tobytes())
+    else:
+        soundfile.write(upload, samples, rate, format=file_format, subtype=subtype)
+
+    upload.seek(0)
+    return upload
+
+
+def prepare_for_upload(wav_buffer, trim=UPLOAD_TRIM_SILENCE, sample_rate=UPLOAD_SAMPLE_RATE, codec=UPLOAD_CODEC):
+    """
+    Shrink a recording before it is uploaded for transcription.
+
+    Args:
+        wav_buffer (io.BytesIO): The recorded WAV audio
+        trim (bool, optional): Trim leading and trailing silence
+        sample_rate (int, optional): Target sample rate, or None to keep the recording rate
+        codec (str, optional): "wav", "flac" or "ogg"; falls back to "wav" without soundfile
+
+    Returns:
+        tuple: (upload_buffer, stats) where upload_buffer is a named BytesIO and stats
+               is a dict with sizes and savings, or (wav_buffer, None) if the recording
+               could not be processed
+    """
+    try:
+        original_bytes = len(wav_buffer.getvalue())
+        samples, rate = _read_wav(wav_buffer)
+    except (wave.Error, EOFError, ValueError) as e:
+        logger.warning(f"Skipping upload preprocessing: {str(e)}")
+        return wav_buffer, None
+
+    original_seconds = samples.size / rate
+    if trim:
+        samples = trim_silence(samples, rate)
+    trimmed_seconds = original_seconds - samples.size / rate
+
+    if sample_rate and sample_rate != rate:
+        samples = resample(samples, rate, sample_rate)
+        rate = sample_rate
+
+    if codec not in CODECS:
+        logger.warning(f"Unknown upload codec '{codec}', uploading WAV instead")
+        codec = "wav"
+    elif codec != "wav" and soundfile is None:
+        if codec not in _missing_codec_warnings:
+            logger.warning(f"soundfile is not installed, uploading WAV instead of {codec}")
+            _missing_codec_warnings.add(codec)
+        codec = "wav"
+    upload = _encode(samples, rate, codec)
+
+    upload_bytes = len(upload.getvalue())
+    bytes_saved = original_bytes - upload_bytes
+    stats = {
+        "original_bytes": original_bytes,
+        "upload_bytes": upload_bytes,
+        "bytes_saved": bytes_saved,
+        "trimmed_seconds": trimmed_seconds,
+        "sample_rate": rate,
+        "codec": codec,
+        "upload_seconds_saved": bytes_saved * 8 / (UPLOAD_BANDWIDTH_KBPS * 1000)
+    }
+    logger.info(
+        f"Upload preprocessing: {original_bytes / 1024:.0f} KB -> {upload_bytes / 1024:.0f} KB "
+        f"({codec}, {rate} Hz, {trimmed_seconds:.2f} s silence trimmed), "
+        f"~{stats['upload_seconds_saved']:.2f} s upload saved at {UPLOAD_BANDWIDTH_KBPS} kbps"
+    )
+    return upload, stats
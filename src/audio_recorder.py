@@ -7,12 +7,14 @@ options for different recording qualities, formats and debugging capabilities.
 """
 
 import os
-import wave
 import time
+import struct
 import pyaudio
 import logging
 import threading
 import io
+import math
+from collections import deque
 from datetime import datetime
 import argparse
 import json
@@ -81,6 +83,11 @@ class AudioRecorderConfig:
         self.chunk_size = config["chunk_size"]
         self.max_record_seconds = config["max_record_seconds"]
         
+        # Warm mode keeps the input stream open between recordings and
+        # prepends the last preroll_ms of audio to each new recording
+        self.warm_input = kwargs.get("warm_input", False)
+        self.preroll_ms = kwargs.get("preroll_ms", 300)
+        
         # Debug options
         self.save_recordings = True
         self.recordings_dir = os.path.join(os.getcwd(), "recordings")
@@ -99,6 +106,8 @@ class AudioRecorderConfig:
             "sample_rate": self.sample_rate,
             "chunk_size": self.chunk_size,
             "max_record_seconds": self.max_record_seconds,
+            "warm_input": self.warm_input,
+            "preroll_ms": self.preroll_ms,
             "save_recordings": self.save_recordings,
             "recordings_dir": self.recordings_dir,
             "debug_level": self.debug_level
@@ -121,11 +130,110 @@ class AudioRecorderConfig:
             f"  Sample Rate: {self.sample_rate} Hz\n"
             f"  Chunk Size: {self.chunk_size}\n"
             f"  Max Record Time: {self.max_record_seconds} seconds\n"
+            f"  Warm Input: {self.warm_input} ({self.preroll_ms} ms pre-roll)\n"
             f"  Save Recordings: {self.save_recordings}\n"
             f"  Recordings Directory: {self.recordings_dir}"
         )
 
 
+class CaptureBuffer:
+    """Preallocated in-memory WAV file that captured audio is written into directly.
+    
+    The buffer is sized once for the longest allowed recording plus the WAV
+    header. Chunks are copied straight into its memory and the header is filled
+    in place when the recording ends, so a finished recording costs a single
+    allocation and no joins or re-encoding.
+    """
+    
+    HEADER_SIZE = 44
+    
+    def __init__(self, capacity, channels, sample_width, sample_rate):
+        """
+        Initialize the capture buffer.
+        
+        Args:
+            capacity (int): Maximum number of PCM bytes to capture
+            channels (int): Number of audio channels
+            sample_width (int): Bytes per sample
+            sample_rate (int): Sample rate in Hz
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self.sample_width = sample_width
+        self.sample_rate = sample_rate
+        self.length = 0
+        self.finished = False
+        
+        # Grow the file to its final size once and write through a memoryview
+        self.file = io.BytesIO()
+        self.file.seek(self.HEADER_SIZE + capacity - 1)
+        self.file.write(b"\0")
+        self.view = self.file.getbuffer()
+    
+    @property
+    def is_full(self):
+        """Whether the maximum recording length has been reached."""
+        return self.length >= self.capacity
+    
+    def append(self, data):
+        """
+        Copy a chunk of PCM data into the buffer.
+        
+        Args:
+            data (bytes): PCM data read from the input stream
+            
+        Returns:
+            int: Number of bytes stored (less than len(data) once the buffer is full)
+        """
+        size = min(len(data), self.capacity - self.length)
+        start = self.HEADER_SIZE + self.length
+        self.view[start:start + size] = memoryview(data)[:size]
+        self.length += size
+        return size
+    
+    def read_pcm(self, start, end=None):
+        """
+        Copy a range of the captured PCM data.
+        
+        Works both while recording and after finish().
+        
+        Args:
+            start (int): Offset in bytes from the start of the audio data
+            end (int, optional): End offset in bytes. Defaults to everything captured.
+            
+        Returns:
+            bytes: The requested PCM data
+        """
+        end = self.length if end is None else min(end, self.length)
+        if self.finished:
+            with self.file.getbuffer() as view:
+                return bytes(view[self.HEADER_SIZE + start:self.HEADER_SIZE + end])
+        return bytes(self.view[self.HEADER_SIZE + start:self.HEADER_SIZE + end])
+    
+    def finish(self):
+        """
+        Write the WAV header and return the finished recording.
+        
+        Returns:
+            io.BytesIO: WAV file positioned at the start. No further data can be appended.
+        """
+        block_align = self.channels * self.sample_width
+        struct.pack_into(
+            "<4sI4s4sIHHIIHH4sI", self.view, 0,
+            b"RIFF", 36 + self.length, b"WAVE",
+            b"fmt ", 16, 1, self.channels, self.sample_rate,
+            self.sample_rate * block_align, block_align, self.sample_width * 8,
+            b"data", self.length
+        )
+        
+        # Drop the unused tail in place and hand out the file itself
+        self.view.release()
+        self.file.truncate(self.HEADER_SIZE + self.length)
+        self.file.seek(0)
+        self.finished = True
+        return self.file
+
+
 class AudioRecorder:
     """Audio recorder class for capturing and saving audio from the microphone."""
     
@@ -139,12 +247,16 @@ class AudioRecorder:
         """
         self.config = config or AudioRecorderConfig()
         self.audio = pyaudio.PyAudio()
-        self.frames = []
+        self.capture_buffer = None
         self.is_recording = False
         self.stop_event = None
         self.recording_thread = None
         self.device_index = device_index
         self.used_device_info = None
+        self.input_stream = None
+        self.capture_lock = threading.Lock()
+        self.preroll = None
+        self.frame_listeners = []
         
         # Ensure recordings directory exists
         if self.config.save_recordings:
@@ -153,19 +265,21 @@ class AudioRecorder:
         # Configure logger based on config
         logger.setLevel(self.config.debug_level)
         
-        # Log which device will be used
+        # Look up which device will be used once, not on every recording
         if device_index is not None:
             try:
-                device_info = self.audio.get_device_info_by_index(device_index)
-                logger.info(f"Selected input device: [{device_index}] {device_info['name']}")
+                self.used_device_info = self.audio.get_device_info_by_index(device_index)
+                logger.info(f"Selected input device: [{device_index}] {self.used_device_info['name']}")
             except Exception as e:
                 logger.error(f"Error getting device info for index {device_index}: {str(e)}")
                 logger.info("Will use default input device instead")
                 self.device_index = None
-        else:
-            default_device_index = self.audio.get_default_input_device_info()['index']
-            device_info = self.audio.get_device_info_by_index(default_device_index)
-            logger.info(f"Using default input device: [{default_device_index}] {device_info['name']}")
+        if self.device_index is None:
+            self.used_device_info = self.audio.get_default_input_device_info()
+            logger.info(f"Using default input device: [{self.used_device_info['index']}] {self.used_device_info['name']}")
+        
+        if self.config.warm_input:
+            self.warm_up()
     
     def list_input_devices(self):
         """List all available input devices."""
@@ -182,42 +296,90 @@ class AudioRecorder:
         
         return devices
     
+    def _stream_params(self):
+        """Build the parameters for opening the input stream."""
+        stream_params = {
+            "format": self.config.format,
+            "channels": self.config.channels,
+            "rate": self.config.sample_rate,
+            "input": True,
+            "frames_per_buffer": self.config.chunk_size
+        }
+        
+        # Add device index if specified
+        if self.device_index is not None:
+            stream_params["input_device_index"] = self.device_index
+        
+        return stream_params
+    
+    def warm_up(self):
+        """
+        Open the input stream in callback mode and keep it running.
+        
+        While no recording is in progress the callback keeps the last
+        preroll_ms of audio in a ring of chunks, which is prepended to the
+        next recording so speech onset is never clipped by device start-up.
+        """
+        if self.input_stream is not None:
+            return
+        
+        chunk_ms = 1000 * self.config.chunk_size / self.config.sample_rate
+        self.preroll = deque(maxlen=max(1, math.ceil(self.config.preroll_ms / chunk_ms)))
+        self.input_stream = self.audio.open(stream_callback=self._stream_callback, **self._stream_params())
+        logger.info(f"Input stream warm with {self.config.preroll_ms} ms pre-roll")
+    
+    def add_frame_listener(self, callback):
+        """
+        Register a callback that receives every captured chunk of PCM data.
+        
+        In warm mode the callback sees the continuous input stream, including
+        audio captured between recordings; otherwise only recorded chunks.
+        Callbacks run on the capture thread and must return quickly.
+        
+        Args:
+            callback (callable): Function taking the chunk as bytes
+        """
+        self.frame_listeners.append(callback)
+    
+    def remove_frame_listener(self, callback):
+        """Unregister a callback added with add_frame_listener."""
+        if callback in self.frame_listeners:
+            self.frame_listeners.remove(callback)
+    
+    def _notify_frame_listeners(self, data):
+        """Pass a captured chunk to every registered frame listener."""
+        for callback in self.frame_listeners:
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error(f"Error in frame listener: {str(e)}")
+    
+    def _stream_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback for warm mode; runs on the audio thread."""
+        with self.capture_lock:
+            if self.is_recording:
+                self.capture_buffer.append(in_data)
+            else:
+                self.preroll.append(in_data)
+        self._notify_frame_listeners(in_data)
+        return None, pyaudio.paContinue
+    
     def _record_thread(self):
         """Internal recording thread function."""
         try:
-            # Configure stream with device if specified
-            stream_params = {
-                "format": self.config.format,
-                "channels": self.config.channels,
-                "rate": self.config.sample_rate,
-                "input": True,
-                "frames_per_buffer": self.config.chunk_size
-            }
-            
-            # Add device index if specified
-            if self.device_index is not None:
-                stream_params["input_device_index"] = self.device_index
-            
-            # Store which device is actually being used
-            if self.device_index is not None:
-                self.used_device_info = self.audio.get_device_info_by_index(self.device_index)
-            else:
-                default_info = self.audio.get_default_input_device_info()
-                self.used_device_info = default_info
-                
             device_name = self.used_device_info.get('name', 'Unknown')
-            device_index = self.used_device_info.get('index', 'Unknown')            
+            device_index = self.used_device_info.get('index', 'Unknown')
             
             # Open the stream
-            stream = self.audio.open(**stream_params)
+            stream = self.audio.open(**self._stream_params())
             
             logger.info(f"Recording started with device [{device_index}] {device_name}, sample rate {self.config.sample_rate}Hz")
-            self.frames = []
-            start_time = time.time()
             
-            while not self.stop_event.is_set() and (time.time() - start_time) < self.config.max_record_seconds:
+            # Reading blocks in real time, so a full buffer means max_record_seconds have passed
+            while not self.stop_event.is_set() and not self.capture_buffer.is_full:
                 data = stream.read(self.config.chunk_size, exception_on_overflow=False)
-                self.frames.append(data)
+                self.capture_buffer.append(data)
+                self._notify_frame_listeners(data)
             
             stream.stop_stream()
             stream.close()
@@ -227,12 +389,39 @@ class AudioRecorder:
             logger.error(f"Error in recording thread: {str(e)}")
             self.is_recording = False
     
+    def _new_capture_buffer(self):
+        """Allocate a capture buffer sized for the longest allowed recording."""
+        sample_width = self.audio.get_sample_size(self.config.format)
+        frame_bytes = sample_width * self.config.channels
+        capacity = int(self.config.max_record_seconds * self.config.sample_rate) * frame_bytes
+        return CaptureBuffer(capacity, self.config.channels, sample_width, self.config.sample_rate)
+    
+    @property
+    def recorded_seconds(self):
+        """Duration of the current or last recording in seconds."""
+        if not self.capture_buffer:
+            return 0.0
+        frame_bytes = self.capture_buffer.sample_width * self.capture_buffer.channels
+        return self.capture_buffer.length / frame_bytes / self.config.sample_rate
+    
     def start_recording(self):
         """Start the recording process."""
         if self.is_recording:
             logger.warning("Recording is already in progress")
             return False
         
+        if self.input_stream is not None:
+            # Warm mode: the stream is already running, start from the pre-roll
+            capture_buffer = self._new_capture_buffer()
+            with self.capture_lock:
+                for data in self.preroll:
+                    capture_buffer.append(data)
+                self.preroll.clear()
+                self.capture_buffer = capture_buffer
+                self.is_recording = True
+            return True
+        
+        self.capture_buffer = self._new_capture_buffer()
         self.stop_event = threading.Event()
         self.is_recording = True
         self.recording_thread = threading.Thread(target=self._record_thread)
@@ -253,24 +442,20 @@ class AudioRecorder:
             logger.warning("No recording in progress")
             return None, None
         
-        self.stop_event.set()
-        self.recording_thread.join()
-        self.is_recording = False
+        if self.input_stream is not None:
+            with self.capture_lock:
+                self.is_recording = False
+        else:
+            self.stop_event.set()
+            self.recording_thread.join()
+            self.is_recording = False
         
-        if not self.frames:
+        if not self.capture_buffer.length:
             logger.warning("No audio data was recorded")
             return None, None
         
-        wav_buffer = io.BytesIO()
-        
-        # Save to in-memory buffer
-        with wave.open(wav_buffer, 'wb') as wf:
-            wf.setnchannels(self.config.channels)
-            wf.setsampwidth(self.audio.get_sample_size(self.config.format))
-            wf.setframerate(self.config.sample_rate)
-            wf.writeframes(b''.join(self.frames))
-        
-        wav_buffer.seek(0)
+        # Fill in the WAV header in place; the audio is never copied
+        wav_buffer = self.capture_buffer.finish()
         
         # Save to file if configured
         wav_file_path = None
@@ -278,11 +463,8 @@ class AudioRecorder:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             wav_file_path = os.path.join(self.config.recordings_dir, f"recording_{timestamp}.wav")
             
-            with wave.open(wav_file_path, 'wb') as wf:
-                wf.setnchannels(self.config.channels)
-                wf.setsampwidth(self.audio.get_sample_size(self.config.format))
-                wf.setframerate(self.config.sample_rate)
-                wf.writeframes(b''.join(self.frames))
+            with open(wav_file_path, 'wb') as f, wav_buffer.getbuffer() as view:
+                f.write(view)
             
             logger.info(f"Recording saved to {wav_file_path}")
         
@@ -341,7 +523,7 @@ class AudioRecorder:
         metadata = metadata or {}
         base_metadata = {
             "timestamp": datetime.now().isoformat(),
-            "duration": len(self.frames) * self.config.chunk_size / self.config.sample_rate,
+            "duration": self.recorded_seconds,
             "sample_rate": self.config.sample_rate,
             "channels": self.config.channels,
             "format": self.audio.get_sample_size(self.config.format) * 8,  # bits
@@ -362,6 +544,11 @@ class AudioRecorder:
         """Close the audio recorder and release resources."""
         if self.is_recording:
             self.stop_recording()
+        
+        if self.input_stream is not None:
+            self.input_stream.stop_stream()
+            self.input_stream.close()
+            self.input_stream = None
             
         self.audio.terminate()
         logger.info("Audio recorder closed")
@@ -381,6 +568,8 @@ def get_parser():
                         help='List available input devices and exit')
     parser.add_argument('--device', type=int, 
                         help='Specify input device index to use')
+    parser.add_argument('--warm', action='store_true',
+                        help='Keep the input stream open and prepend a pre-roll to recordings')
     parser.add_argument('--no-save', action='store_true',
                         help='Disable saving recordings to disk')
     parser.add_argument('--show-metadata', action='store_true',
@@ -399,6 +588,8 @@ if __name__ == "__main__":
         config_kwargs['sample_rate'] = args.sample_rate
     if args.no_save:
         config_kwargs['save_recordings'] = False
+    if args.warm:
+        config_kwargs['warm_input'] = True
     
     config = AudioRecorderConfig(preset=args.preset, **config_kwargs)
     
@@ -430,7 +621,7 @@ if __name__ == "__main__":
         if buffer:
             print("\nRecording successful!")
             buffer_size = len(buffer.getvalue())
-            recording_duration = len(recorder.frames) * recorder.config.chunk_size / recorder.config.sample_rate
+            recording_duration = recorder.recorded_seconds
             print(f"Recording duration: {recording_duration:.2f} seconds")
             print(f"Buffer size: {buffer_size} bytes")
             
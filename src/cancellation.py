@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Cancellation of a turn for the Voice Assistant application.
+
+One CancellationToken is created per turn and passed to every request and
+player that works on it. When the user barges in, cancelling the token runs
+the registered callbacks, which close open HTTP streams and flush queued
+audio, and every loop that checks the token stops at its next iteration.
+"""
+import threading
+from contextlib import contextmanager, nullcontext
+
+from src.config import logger
+
+
+class CancellationToken:
+    """Thread-safe, one-shot cancellation signal shared by the parts of a turn."""
+
+    def __init__(self):
+        """Initialize a token that has not been cancelled."""
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks = []
+
+    @property
+    def cancelled(self):
+        """Whether cancel() has been called."""
+        return self.event.is_set()
+
+    def cancel(self):
+        """Cancel the turn and run every registered callback once."""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancellation callback: {str(e)}")
+
+    def add_callback(self, callback):
+        """
+        Run callback when the token is cancelled, or right away if it already is.
+
+        Args:
+            callback (callable): Function taking no arguments, e.g. a response's close()
+        """
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        """Unregister a callback that is no longer needed."""
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def wait(self, timeout=None):
+        """
+        Block until the token is cancelled.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds
+
+        Returns:
+            bool: True if the token was cancelled
+        """
+        return self.event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Run callback if the token is cancelled while the block is executing."""
+        self.add_callback(callback)
+        try:
+            yield self
+        finally:
+            self.remove_callback(callback)
+
+
+def is_cancelled(cancel_token):
+    """Whether an optional token has been cancelled."""
+    return cancel_token is not None and cancel_token.cancelled
+
+
+def on_cancel(cancel_token, callback):
+    """
+    Context manager running callback if an optional token is cancelled inside it.
+
+    Args:
+        cancel_token (CancellationToken): The turn's token, or None
+        callback (callable): Function taking no arguments
+
+    Returns:
+        A context manager; a no-op one if cancel_token is None
+    """
+    if cancel_token is None:
+        return nullcontext()
+    return cancel_token.on_cancel(callback)
@@ -23,13 +23,90 @@ CHANNELS = 1
 RATE = 24000  # 24kHz for OpenAI's audio model
 CHUNK = 1024
 MAX_RECORD_SECONDS = 30  # Max recording length in seconds
+WARM_INPUT = False  # Keep the input stream open between turns so capture starts instantly
+INPUT_PREROLL_MS = 300  # Audio from before the key press prepended to warm recordings
+
+# Voice activity detection (hands-free mode)
+VAD_FRAME_MS = 20  # Analysis frame length
+VAD_ONSET_MS = 60  # Voiced audio required before speech is considered started
+VAD_HANGOVER_MS = 250  # Silence required before speech is considered ended (endpointing latency)
+VAD_THRESHOLD_DB = 12  # Energy above the noise floor that counts as speech
+
+# Upload preprocessing before transcription
+UPLOAD_PREPROCESS = True  # Trim, resample and re-encode recordings before upload
+UPLOAD_TRIM_SILENCE = True  # Remove leading and trailing silence
+UPLOAD_SAMPLE_RATE = 16000  # Upload sample rate (None keeps the recording rate)
+UPLOAD_CODEC = "flac"  # "wav", "flac" (lossless) or "ogg" (Opus); non-WAV codecs need soundfile
+UPLOAD_BANDWIDTH_KBPS = 1000  # Assumed uplink speed used to report upload time saved
+
+# Incremental transcription while recording
+INCREMENTAL_TRANSCRIPTION = True  # Transcribe finished segments while the user is still speaking
+INCREMENTAL_PAUSE_MS = 500  # Pause length at which a segment can be cut
+INCREMENTAL_MIN_SEGMENT_SECONDS = 3  # Minimum audio per segment, so each request has enough context
+
+# Queued turns
+QUEUED_TURNS = False  # Opt-in: record and transcribe the next command while the previous answer plays
+QUEUED_TURNS_MAX_PENDING = 4  # Recorded turns waiting for an answer before capture waits too
 
 # OpenAI API endpoints
 TRANSCRIPTION_ENDPOINT = "https://api.openai.com/v1/audio/transcriptions"
 CHAT_ENDPOINT = "https://api.openai.com/v1/chat/completions"
 SPEECH_ENDPOINT = "https://api.openai.com/v1/audio/speech"
 
+# HTTP transport shared by every chat, speech and transcription request
+HTTP2 = True  # Multiplex concurrent requests over one connection (needs the h2 package)
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_SECONDS = 300  # How long idle connections are kept (httpx closes them after 5 s by default)
+HTTP_PREWARM = True  # Open connections when SPACE is pressed, while the user is still speaking
+HTTP_PREWARM_INTERVAL_SECONDS = 30  # Skip pre-warming if a request went out this recently
+
+# Latency tracing (summarize with: python -m benchmarks.trace_report)
+TRACING_ENABLED = True  # Record a timeline of each turn's stages
+TRACE_FILE = os.path.join(os.getcwd(), "recordings", "trace.jsonl")
+TRACE_MAX_BYTES = 10 * 1024 * 1024  # The file is rotated to trace.jsonl.1 beyond this
+
+# Conversation history
+HISTORY_TOKEN_BUDGET = 4000  # History size at which old turns are folded into a summary
+HISTORY_MAX_TOKENS = 8000  # Hard limit; oldest turns are dropped if a summary is not ready yet
+HISTORY_COMPACT_RATIO = 0.5  # Fraction of the budget kept after folding
+
+# Tool calls
+TOOL_MAX_WORKERS = 4  # Functions run concurrently on this many threads
+TOOL_TIMEOUT_SECONDS = 10  # Default per-call timeout; see FUNCTION_TIMEOUTS in functions.py
+
+# Realtime API (speech in / speech out over one WebSocket)
+REALTIME_URL = "wss://api.openai.com/v1/realtime"
+REALTIME_MODEL = "gpt-4o-realtime-preview"
+REALTIME_SAMPLE_RATE = 24000  # pcm16 audio is 24kHz mono in both directions
+
 # Default model settings
 DEFAULT_MODEL = "gpt-4o-mini"  # Using o3-mini as default per user preferences
 TTS_MODEL = "gpt-4o-mini-tts"
 TTS_VOICE = "nova"
+AUDIO_CHAT_MODEL = "gpt-4o-audio-preview"  # Chat model that takes audio in and speaks its reply
+AUDIO_CHAT_VOICE = "coral"
+TTS_FORMAT = "wav"  # Decoded in-process by the playback engine (24kHz 16-bit mono)
+
+# Text-to-speech pipeline settings
+TTS_MAX_WORKERS = 3  # Maximum number of chunks synthesized concurrently
+TTS_STREAMING = True  # Stream raw PCM into playback instead of waiting for whole files
+TTS_STREAM_PREROLL_MS = 150  # Audio buffered before a streamed chunk starts playing
+TTS_STREAM_READ_BYTES = 4800  # Network read size for streamed speech (100 ms of PCM)
+TTS_FIRST_CHUNK_CHARS = 40  # Minimum size of a reply's first spoken chunk (time to first audio)
+TTS_CHUNK_CHARS = 200  # Minimum size later chunks grow to
+TTS_CHUNK_GROWTH = 2  # Each chunk's minimum size is this many times the previous one's
+TTS_MAX_CHUNK_CHARS = 2000  # Text without a usable break is cut at a space beyond this
+
+# Text-to-speech cache (repeated phrases play without a network request)
+TTS_CACHE_ENABLED = True
+TTS_CACHE_DIR = os.path.join(os.getcwd(), "recordings", "tts_cache")  # None keeps the cache in memory only
+TTS_CACHE_MEMORY_BYTES = 32 * 1024 * 1024  # Least recently used entries are evicted beyond this
+TTS_CACHE_DISK_BYTES = 256 * 1024 * 1024
+TTS_CACHE_WARMUP = []  # Phrases synthesized into the cache at startup, e.g. ["Sure.", "One moment."]
+
+# Response cache (repeated questions are answered without chat or speech requests)
+RESPONSE_CACHE_ENABLED = False  # Opt-in: cached replies ignore the earlier conversation
+RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60  # Default lifetime; see FUNCTION_CACHE_TTLS in functions.py
+RESPONSE_CACHE_SIMILARITY = 1.0  # Exact matches only; below 1.0, also match rewordings differing in filler words
+RESPONSE_CACHE_MAX_ENTRIES = 256
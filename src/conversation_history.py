@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted conversation history for the Voice Assistant application.
+
+The history is a list of chat messages that keeps a running token count as
+messages are appended. Once it grows past its budget, the oldest whole turns
+(a user message and everything up to the next one, including bulky tool
+results) are folded into a rolling summary on a background thread. The
+summary replaces those turns at the start of the next user turn, so building
+a request never waits for summarization and request size stays bounded.
+Token counts use `tiktoken` when it is installed and a character estimate
+otherwise.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import logger, HISTORY_TOKEN_BUDGET, HISTORY_MAX_TOKENS, HISTORY_COMPACT_RATIO
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning(f"Could not load tiktoken encoding, estimating token counts: {str(e)}")
+    return _encoding
+
+
+def count_text_tokens(text):
+    """Count the tokens in a piece of text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+def message_text(message):
+    """
+    Render a chat message as plain text, for token counting and summarization.
+
+    Args:
+        message (dict): A chat completion message
+
+    Returns:
+        str: The message's text, tool calls and tool results
+    """
+    parts = []
+    content = message.get("content")
+    if isinstance(content, str):
+        parts.append(content)
+    elif isinstance(content, list):
+        for part in content:
+            if part.get("type") == "text":
+                parts.append(part.get("text", ""))
+            else:
+                parts.append(f"[{part.get('type')}]")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        parts.append(f"{function.get('name')}({function.get('arguments')})")
+    return "\n".join(part for part in parts if part)
+
+
+def count_message_tokens(message):
+    """Count the tokens a message adds to a request."""
+    tokens = count_text_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, list):
+        # Audio and other attachments are bulky payloads; count them by size
+        tokens += sum(len(json.dumps(part)) // 4 for part in content if part.get("type") != "text")
+    return tokens
+
+
+class ConversationHistory(list):
+    """Chat message list with a token budget and background summarization.
+
+    It can be passed anywhere a list of messages is expected. Messages are
+    added with append(); the history compacts itself as turns accumulate.
+    """
+
+    def __init__(self, summarize_func=None, token_budget=HISTORY_TOKEN_BUDGET,
+                 max_tokens=HISTORY_MAX_TOKENS, compact_ratio=HISTORY_COMPACT_RATIO):
+        """
+        Initialize an empty history.
+
+        Args:
+            summarize_func (callable, optional): Function taking (previous_summary, messages)
+                                                 and returning the new summary text. Without
+                                                 it, old turns are dropped instead.
+            token_budget (int, optional): Size at which old turns start being folded away
+            max_tokens (int, optional): Hard limit; oldest turns are dropped beyond it
+                                        while a summary is still being written
+            compact_ratio (float, optional): Fraction of the budget left after folding
+        """
+        super().__init__()
+        self.summarize_func = summarize_func
+        self.token_budget = token_budget
+        self.max_tokens = max_tokens
+        self.compact_ratio = compact_ratio
+        self.token_counts = []
+        self.total_tokens = 0
+        self.summary = None
+        # (number of folded messages, Future of the new summary) while summarizing
+        self.pending = None
+        self.executor = None
+
+    def append(self, message):
+        """Add a message, compacting the history if it is over budget."""
+        if message.get("role") == "user":
+            # A new turn is starting: swap in a finished summary before the request is built
+            self._apply_summary()
+            self._enforce_limit()
+        super().append(message)
+        tokens = count_message_tokens(message)
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
+        self._start_summary()
+
+    def replace(self, message, new_message):
+        """
+        Swap a message for another, recounting its tokens.
+
+        Args:
+            message (dict): The message object to replace
+            new_message (dict): Its replacement
+
+        Returns:
+            bool: False if the message is no longer in the history
+        """
+        for index in range(len(self)):
+            if self[index] is message:
+                tokens = count_message_tokens(new_message)
+                self.total_tokens += tokens - self.token_counts[index]
+                self.token_counts[index] = tokens
+                self[index] = new_message
+                return True
+        return False
+
+    def extend(self, messages):
+        """Add several messages."""
+        for message in messages:
+            self.append(message)
+
+    def clear(self):
+        """Remove every message and the summary."""
+        super().clear()
+        self.token_counts = []
+        self.total_tokens = 0
+        self.summary = None
+        self.pending = None
+
+    def _first_message(self):
+        """Index of the first conversation message (after the summary, if any)."""
+        return 1 if self.summary is not None else 0
+
+    def _turn_starts(self):
+        """Indices of the user messages that start each turn."""
+        return [index for index in range(self._first_message(), len(self))
+                if self[index].get("role") == "user"]
+
+    def _remove(self, start, end):
+        """Remove messages [start, end) and their token counts."""
+        self.total_tokens -= sum(self.token_counts[start:end])
+        del self[start:end]
+        del self.token_counts[start:end]
+
+    def _fold_point(self, target):
+        """Index up to which whole old turns must go to get under target, or None."""
+        starts = self._turn_starts()
+        first = self._first_message()
+        # Never fold the most recent turn
+        for start in starts[1:]:
+            if self.total_tokens - sum(self.token_counts[first:start]) <= target:
+                return start
+        return starts[-1] if len(starts) > 1 else None
+
+    def _start_summary(self):
+        """Start folding old turns into the summary once the budget is exceeded."""
+        if self.total_tokens <= self.token_budget or self.pending is not None:
+            return
+
+        cut = self._fold_point(self.token_budget * self.compact_ratio)
+        if cut is None:
+            return
+        first = self._first_message()
+
+        if self.summarize_func is None:
+            # No summarizer: plain sliding window
+            self._remove(first, cut)
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summarizer")
+        messages = list(self[first:cut])
+        logger.info(f"Summarizing {len(messages)} old messages in the background "
+                    f"({self.total_tokens} tokens of history)")
+        self.pending = (cut - first, self.executor.submit(self.summarize_func, self.summary, messages))
+
+    def _apply_summary(self):
+        """Replace the folded turns with the summary if it is ready."""
+        if self.pending is None or not self.pending[1].done():
+            return
+
+        folded, future = self.pending
+        self.pending = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            logger.error(f"Error summarizing conversation history: {str(e)}")
+            return
+        if not summary:
+            return
+
+        first = self._first_message()
+        self._remove(first, first + folded)
+        if self.summary is not None:
+            self._remove(0, 1)
+        self.summary = summary
+        message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        tokens = count_message_tokens(message)
+        self.insert(0, message)
+        self.token_counts.insert(0, tokens)
+        self.total_tokens += tokens
+        logger.info(f"Folded {folded} messages into the summary; history is now {self.total_tokens} tokens")
+
+    def _enforce_limit(self):
+        """Drop the oldest turns if the history is over the hard limit."""
+        if self.total_tokens <= self.max_tokens:
+            return
+        cut = self._fold_point(self.max_tokens * self.compact_ratio)
+        if cut is None:
+            return
+        first = self._first_message()
+        logger.warning(f"History over {self.max_tokens} tokens, dropping {cut - first} old messages")
+        # Indices of a summary still being written would no longer match
+        self.pending = None
+        self._remove(first, cut)
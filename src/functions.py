@@ -18,6 +18,18 @@ AVAILABLE_FUNCTIONS = {
     "get_current_time": get_current_time
 }
 
+# Per-function timeouts in seconds, overriding TOOL_TIMEOUT_SECONDS
+FUNCTION_TIMEOUTS = {
+    "calculate_sum": 2,
+    "get_current_time": 2
+}
+
+# Per-function response cache lifetimes in seconds, capping RESPONSE_CACHE_TTL_SECONDS;
+# 0 means replies that called the function are never cached
+FUNCTION_CACHE_TTLS = {
+    "get_current_time": 0
+}
+
 # Function definitions for the model
 FUNCTION_DEFINITIONS = [
     {
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for the Voice Assistant application.
+
+Chat, speech and transcription requests all go through one pooled client,
+built on the HTTP library the OpenAI SDK itself uses (httpx, or httpx2 in
+newer releases), with long-lived keep-alive connections (HTTP/2 when the h2
+package is installed, so concurrent requests share a single connection).
+After an idle period the server may still have dropped them, so the
+connections are re-opened in the background the moment SPACE is pressed:
+the DNS, TCP and TLS setup then happens while the user is speaking instead
+of delaying the first request of the turn.
+"""
+import asyncio
+import importlib
+import threading
+import time
+
+from src.config import logger, CHAT_ENDPOINT, SPEECH_ENDPOINT, TRANSCRIPTION_ENDPOINT
+from src.config import HTTP2, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_SECONDS
+from src.config import HTTP_PREWARM_INTERVAL_SECONDS
+
+try:
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+except ImportError:
+    DefaultHttpxClient = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# Every endpoint a turn talks to, warmed together
+PREWARM_URLS = (TRANSCRIPTION_ENDPOINT, CHAT_ENDPOINT, SPEECH_ENDPOINT)
+
+
+def _sdk_http_library():
+    """The HTTP library the installed OpenAI SDK builds its clients on, or None."""
+    if DefaultHttpxClient is None:
+        return None
+    for cls in DefaultHttpxClient.__mro__:
+        package = cls.__module__.split(".")[0]
+        if package not in ("openai", "builtins"):
+            return importlib.import_module(package)
+    return None
+
+
+httpx = _sdk_http_library()
+
+
+class SharedTransport:
+    """Pooled keep-alive HTTP clients for the sync and async OpenAI clients."""
+
+    def __init__(self, client=None, async_client=None, http2=HTTP2,
+                 prewarm_interval=HTTP_PREWARM_INTERVAL_SECONDS):
+        """
+        Initialize the transport, building the pooled clients unless given.
+
+        Args:
+            client (httpx.Client, optional): Client for synchronous requests
+            async_client (httpx.AsyncClient, optional): Client for the *_async functions
+            http2 (bool, optional): Negotiate HTTP/2 if the h2 package is installed
+            prewarm_interval (float, optional): Skip pre-warming if a request went out
+                                                less than this many seconds ago
+        """
+        self.prewarm_interval = prewarm_interval
+        self.last_request = None
+        # Event loop the async client's connections belong to, while one is running
+        self.loop = None
+        self.lock = threading.Lock()
+        self.stats = {"prewarms": 0, "skipped": 0}
+
+        if client is None and httpx is not None:
+            client, async_client = self._build_clients(http2)
+        self.client = client
+        self.async_client = async_client
+
+    def _build_clients(self, http2):
+        """Create the sync and async clients sharing one pool configuration."""
+        if http2 and h2 is None:
+            logger.info("The h2 package is not installed, using HTTP/1.1 keep-alive connections")
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+        )
+        client = DefaultHttpxClient(http2=http2, limits=limits,
+                                    event_hooks={"request": [self._on_request]})
+        async_client = DefaultAsyncHttpxClient(http2=http2, limits=limits,
+                                               event_hooks={"request": [self._on_async_request]})
+        return client, async_client
+
+    def _on_request(self, request):
+        """Note that the pool was used, so its connections are known to be fresh."""
+        self.last_request = time.monotonic()
+
+    async def _on_async_request(self, request):
+        """Async counterpart of _on_request."""
+        self.last_request = time.monotonic()
+
+    def use_event_loop(self, loop):
+        """
+        Warm the async client's pool on loop instead of the sync client's.
+
+        The asyncio backend sends every request through the async client,
+        whose connections belong to the event loop it runs on.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The running loop, or None to warm the sync pool again
+        """
+        self.loop = loop
+
+    def prewarm(self, urls=PREWARM_URLS):
+        """
+        Open connections to the API endpoints in the background.
+
+        One HEAD request per endpoint, sent concurrently, so the pool holds a
+        live connection for each request the turn will make (or one
+        multiplexed HTTP/2 connection). Their status codes do not matter.
+
+        Args:
+            urls (iterable, optional): Endpoints to connect to
+
+        Returns:
+            list: The warming threads, or concurrent futures when warming the async
+                  pool; empty if the pool was used recently
+        """
+        loop = self.loop
+        if (self.async_client if loop else self.client) is None:
+            return []
+        with self.lock:
+            if self.last_request is not None and time.monotonic() - self.last_request < self.prewarm_interval:
+                self.stats["skipped"] += 1
+                return []
+            # Claim the interval now, so a burst of key presses warms only once
+            self.last_request = time.monotonic()
+            self.stats["prewarms"] += 1
+
+        if loop is not None:
+            try:
+                return [asyncio.run_coroutine_threadsafe(self._warm_async(url), loop) for url in urls]
+            except RuntimeError as e:
+                # The loop has closed since it was registered
+                logger.warning(f"Could not pre-warm connections: {str(e)}")
+                return []
+
+        threads = [threading.Thread(target=self._warm, args=(url,), daemon=True) for url in urls]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _warm(self, url):
+        """Send one HEAD request, leaving its connection in the pool."""
+        started = time.perf_counter()
+        try:
+            self.client.request("HEAD", url)
+            logger.debug(f"Connection to {url} warmed in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            logger.warning(f"Could not pre-warm connection to {url}: {str(e)}")
+
+    async def _warm_async(self, url):
+        """Async counterpart of _warm, run on the async client's event loop."""
+        started = time.perf_counter()
+        try:
+            await self.async_client.request("HEAD", url)
+            logger.debug(f"Connection to {url} warmed in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            logger.warning(f"Could not pre-warm connection to {url}: {str(e)}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Incremental transcription for the Voice Assistant application.
+
+While the user is still speaking, the live frame stream of an AudioRecorder is
+cut into segments at natural pauses and each segment is sent for transcription
+in the background. When the recording stops only the tail after the last cut
+is left to transcribe, so the wait after release does not grow with the length
+of the utterance.
+"""
+import io
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import logger, INCREMENTAL_PAUSE_MS, INCREMENTAL_MIN_SEGMENT_SECONDS
+from src.vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
+
+# Recordings whose segments are kept while they wait to be transcribed
+MAX_PENDING_RECORDINGS = 4
+
+
+class SegmentedRecording:
+    """Segments cut from one capture buffer so far."""
+
+    def __init__(self, capture_buffer):
+        self.capture_buffer = capture_buffer
+        self.segment_start = 0
+        self.segments = []
+        self.speech_since_cut = False
+        self.in_speech = False
+
+
+class IncrementalTranscriber:
+    """Transcribe a recording segment by segment while it is being captured."""
+
+    def __init__(self, recorder, transcribe_func, save_func=None, pause_ms=INCREMENTAL_PAUSE_MS,
+                 min_segment_seconds=INCREMENTAL_MIN_SEGMENT_SECONDS, max_workers=2):
+        """
+        Initialize the transcriber and attach it to the recorder's frame stream.
+
+        Args:
+            recorder (AudioRecorder): Recorder producing 16-bit mono PCM
+            transcribe_func (callable): Function taking (wav_buffer, prompt=..., save=...) and
+                                        returning the transcribed text or None
+            save_func (callable, optional): Function saving the joined transcript of a
+                                            segmented recording
+            pause_ms (int, optional): Silence that marks a pause where a segment can be cut
+            min_segment_seconds (float, optional): Minimum audio in a segment before cutting
+            max_workers (int, optional): Maximum number of concurrent segment uploads
+        """
+        self.recorder = recorder
+        self.transcribe_func = transcribe_func
+        self.save_func = save_func
+        self.min_segment_bytes = int(min_segment_seconds * recorder.config.sample_rate) * 2 * recorder.config.channels
+        self.vad = VoiceActivityDetector(recorder.config.sample_rate, hangover_ms=pause_ms)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segment-transcriber")
+        self.lock = threading.Lock()
+
+        # Segment state per capture buffer, so a queued turn that is still
+        # waiting to be transcribed keeps its segments when the next starts
+        self.recordings = {}
+
+        recorder.add_frame_listener(self._on_frame)
+
+    def _on_frame(self, data):
+        """Track pauses in the live stream and cut segments (capture thread)."""
+        # Holding the capture lock keeps a warm-mode stop_recording from
+        # finishing the buffer while a segment is being copied out of it
+        with self.recorder.capture_lock, self.lock:
+            capture_buffer = self.recorder.capture_buffer
+            if not self.recorder.is_recording or capture_buffer is None:
+                return
+
+            recording = self.recordings.get(capture_buffer)
+            if recording is None:
+                # A new recording has started
+                recording = self.recordings[capture_buffer] = SegmentedRecording(capture_buffer)
+                while len(self.recordings) > MAX_PENDING_RECORDINGS:
+                    del self.recordings[next(iter(self.recordings))]
+                self.vad.reset()
+
+            for event in self.vad.process(data):
+                if event == SPEECH_START:
+                    recording.speech_since_cut = True
+                elif event == SPEECH_END and capture_buffer.length - recording.segment_start >= self.min_segment_bytes:
+                    self._cut_segment(recording, capture_buffer.length)
+            recording.in_speech = self.vad.in_speech
+
+    def _cut_segment(self, recording, end):
+        """Send the audio between the last cut and end for transcription."""
+        capture_buffer = recording.capture_buffer
+        pcm = capture_buffer.read_pcm(recording.segment_start, end)
+        logger.info(f"Transcribing segment {len(recording.segments) + 1} while recording continues...")
+        recording.segments.append(self._submit(self._to_wav(capture_buffer, pcm), recording.segments))
+        recording.segment_start = end
+        recording.speech_since_cut = False
+
+    def _submit(self, wav_buffer, previous):
+        """Start transcribing a segment, with the text finished so far as context."""
+        prompt = " ".join(future.result() or "" for future in previous if future.done()).strip() or None
+        return self.executor.submit(self.transcribe_func, wav_buffer, prompt=prompt, save=False)
+
+    @staticmethod
+    def _to_wav(capture_buffer, pcm):
+        """Wrap a PCM segment of capture_buffer in an in-memory WAV file."""
+        wav_buffer = io.BytesIO()
+        with wave.open(wav_buffer, 'wb') as wf:
+            wf.setnchannels(capture_buffer.channels)
+            wf.setsampwidth(capture_buffer.sample_width)
+            wf.setframerate(capture_buffer.sample_rate)
+            wf.writeframes(pcm)
+        wav_buffer.seek(0)
+        return wav_buffer
+
+    def transcribe(self, wav_buffer):
+        """
+        Get the transcript of a finished recording.
+
+        Segments cut while recording are reused and only the remaining tail is
+        uploaded. Recordings this transcriber did not segment are transcribed
+        in one request.
+
+        Args:
+            wav_buffer (io.BytesIO): The recording returned by stop_recording
+
+        Returns:
+            str: The transcribed text, or None if transcription failed
+        """
+        with self.lock:
+            recording = next((recording for capture_buffer, recording in self.recordings.items()
+                              if capture_buffer.file is wav_buffer), None)
+            if recording is not None:
+                del self.recordings[recording.capture_buffer]
+
+        if recording is None or not recording.segments:
+            return self.transcribe_func(wav_buffer)
+
+        capture_buffer = recording.capture_buffer
+        segments = list(recording.segments)
+        tail_has_speech = recording.speech_since_cut or recording.in_speech
+        if tail_has_speech and capture_buffer.length > recording.segment_start:
+            tail = self._to_wav(capture_buffer, capture_buffer.read_pcm(recording.segment_start))
+            segments.append(self._submit(tail, segments))
+        logger.info(f"Recording transcribed in {len(segments)} segment(s)")
+
+        texts = [future.result() for future in segments]
+        if any(text is None for text in texts):
+            logger.warning("A segment failed to transcribe, transcribing the whole recording")
+            return self.transcribe_func(wav_buffer)
+        text = " ".join(text.strip() for text in texts if text.strip())
+        if self.save_func:
+            self.save_func(text)
+        return text
+
+    def close(self):
+        """Detach from the recorder and stop the worker threads."""
+        self.recorder.remove_frame_listener(self._on_frame)
+        self.executor.shutdown(wait=False)
@@ -1,25 +1,104 @@
 #!/usr/bin/env python3
+import asyncio
+import base64
+import io
 import json
 import tempfile
+import threading
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from src.config import logger, API_KEY, CHAT_ENDPOINT, SPEECH_ENDPOINT, TRANSCRIPTION_ENDPOINT, DEFAULT_MODEL, TTS_MODEL, TTS_VOICE
-from src.functions import AVAILABLE_FUNCTIONS, FUNCTION_DEFINITIONS
+from src.config import logger, API_KEY, DEFAULT_MODEL, TTS_MODEL, TTS_VOICE, TTS_FORMAT, TTS_STREAM_READ_BYTES
+from src.config import UPLOAD_PREPROCESS, AUDIO_CHAT_MODEL, AUDIO_CHAT_VOICE, TTS_STREAMING, TTS_CACHE_ENABLED, TTS_CACHE_WARMUP
+from src.config import RESPONSE_CACHE_ENABLED, HTTP_PREWARM
+from src.functions import FUNCTION_DEFINITIONS
+from src.tool_executor import ToolCallDispatcher
+from src.conversation_history import ConversationHistory, message_text
+from src.tts_cache import TTSCache, cache_key
+from src.response_cache import ResponseCache
+from src.audio_preprocess import prepare_for_upload
+from src.cancellation import is_cancelled, on_cancel
+from src.http_transport import SharedTransport
+from src.tracing import tracer
 
-# Initialize the OpenAI client once
-client = OpenAI(api_key=API_KEY)
+# One pooled keep-alive transport carries every chat, speech and transcription request
+transport = SharedTransport()
 
-# Global conversation history
-conversation_history = []
+# Initialize the OpenAI clients once; the async client serves the *_async functions
+client = OpenAI(api_key=API_KEY, http_client=transport.client)
+async_client = AsyncOpenAI(api_key=API_KEY, http_client=transport.async_client)
 
-def chat_with_gpt(user_message, stream=False):
+def prewarm_connections():
+    """Open connections to the chat, speech and transcription endpoints in the background.
+    
+    Called when the user starts speaking, so connection setup is done by the
+    time the recording is sent.
+    """
+    if HTTP_PREWARM:
+        transport.prewarm()
+
+def _summarize_history(summary, messages):
+    """Fold old messages into the rolling conversation summary.
+    
+    Runs on the history's background thread.
+    
+    Args:
+        summary (str): The current summary, or None
+        messages (list): The messages being folded away
+    
+    Returns:
+        str: The updated summary
+    """
+    transcript = "\n".join(f"{message['role']}: {message_text(message)}" for message in messages)
+    response = client.chat.completions.create(
+        model=DEFAULT_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You maintain a running summary of a conversation between a user and a voice "
+                           "assistant. Merge the new messages into the summary. Keep facts, names, numbers, "
+                           "decisions and results of function calls; drop small talk. Reply with the summary only."
+            },
+            {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"}
+        ]
+    )
+    return response.choices[0].message.content
+
+# Global conversation history, kept within a token budget
+conversation_history = ConversationHistory(summarize_func=_summarize_history)
+
+# Synthesized speech, reused when the same text is spoken again
+tts_cache = TTSCache() if TTS_CACHE_ENABLED else None
+
+# Replies to repeated questions, consulted before chat_with_gpt when enabled
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+# Single background thread that persists transcripts in order
+_transcript_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcript-writer")
+
+# Transcribes audio chat questions for the history while the reply streams
+_question_transcriber = ThreadPoolExecutor(max_workers=1, thread_name_prefix="question-transcriber")
+
+# Stands in for a spoken question whose transcription failed
+SPOKEN_QUESTION_PLACEHOLDER = "[spoken question]"
+
+# Content types for the upload formats produced by audio_preprocess
+UPLOAD_MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg"
+}
+
+def chat_with_gpt(user_message, stream=False, cancel_token=None):
     """Send a message to GPT and handle function calls.
     
     Args:
         user_message (str): The user's message
         stream (bool, optional): Whether to stream the response. Defaults to False.
+        cancel_token (CancellationToken, optional): Closes the streamed response and
+                                                    skips any further requests when cancelled
     
     Returns:
         If stream=False: The assistant's response as a string
@@ -37,7 +116,7 @@ def chat_with_gpt(user_message, stream=False):
         tools = FUNCTION_DEFINITIONS
         
         if stream:
-            return chat_with_gpt_streaming(tools)
+            return chat_with_gpt_streaming(tools, cancel_token)
         
         # Call the OpenAI API using the SDK
         response = client.chat.completions.create(
@@ -56,29 +135,10 @@ def chat_with_gpt(user_message, stream=False):
             # Add the assistant's message with function call to history
             conversation_history.append(assistant_message.model_dump())
             
-            # Process each function call
-            for tool_call in tool_calls:
-                if tool_call.type == "function":
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    logger.info(f"Function call: {function_name} with args: {function_args}")
-                    
-                    # Execute function if it exists
-                    if function_name in AVAILABLE_FUNCTIONS:
-                        function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
-                        
-                        # Add function response to history
-                        conversation_history.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": function_name,
-                            "content": json.dumps(function_response)
-                        })
-                        
-                        logger.info(f"Function response: {function_response}")
-                    else:
-                        logger.warning(f"Function {function_name} not found")
+            # Run all function calls in parallel, then record the results in call order
+            tool_calls = [tool_call.model_dump() for tool_call in tool_calls]
+            for tool_call, function_response in ToolCallDispatcher().results(tool_calls):
+                _record_tool_result(tool_call, function_response)
                         
             # Get final response after function call
             return get_final_response()
@@ -91,14 +151,96 @@ def chat_with_gpt(user_message, stream=False):
         logger.error(f"Error in chat request: {str(e)}")
         return f"Sorry, there was an error communicating with the assistant: {str(e)}"
 
-def chat_with_gpt_streaming(tools):
+def _merge_tool_call_delta(tool_calls, tool_call_delta):
+    """Merge one streamed tool call delta into the list of accumulated tool calls."""
+    # Get the tool call index
+    index = tool_call_delta.index
+    
+    # Ensure we have enough elements in our tracking list
+    while len(tool_calls) <= index:
+        tool_calls.append({
+            "id": "",
+            "type": "function",
+            "function": {"name": "", "arguments": ""}
+        })
+    
+    # Update the tool call information
+    if tool_call_delta.id:
+        tool_calls[index]["id"] = tool_call_delta.id
+    
+    if hasattr(tool_call_delta, 'function'):
+        if hasattr(tool_call_delta.function, 'name') and tool_call_delta.function.name:
+            tool_calls[index]["function"]["name"] = tool_call_delta.function.name
+        
+        if hasattr(tool_call_delta.function, 'arguments') and tool_call_delta.function.arguments:
+            tool_calls[index]["function"]["arguments"] += tool_call_delta.function.arguments
+
+def _record_tool_result(tool_call, function_response, history=None):
+    """Add a function's response to the conversation history.
+    
+    Args:
+        tool_call (dict): The tool call that was executed
+        function_response (dict): The function's response
+        history (list, optional): History to append the result to. Defaults to the
+                                  global conversation history.
+    """
+    if history is None:
+        history = conversation_history
+    
+    history.append({
+        "role": "tool",
+        "tool_call_id": tool_call["id"],
+        "name": tool_call["function"]["name"],
+        "content": json.dumps(function_response)
+    })
+
+def _until_cancelled(response_stream, cancel_token):
+    """Iterate a streamed response until it ends or the turn is cancelled.
+    
+    Cancelling closes the response from the cancelling thread, so the
+    connection is released at once instead of the rest of the answer being
+    downloaded; the error that raises in the reading thread is expected.
+    """
+    if cancel_token is None:
+        yield from response_stream
+        return
+    
+    with cancel_token.on_cancel(response_stream.close):
+        try:
+            for chunk in response_stream:
+                if cancel_token.cancelled:
+                    return
+                yield chunk
+        except Exception:
+            if not cancel_token.cancelled:
+                raise
+
+def _record_interrupted_reply(content):
+    """Keep what the model said before the user interrupted, so the history stays coherent."""
+    logger.info("Answer interrupted by the user")
+    if content:
+        conversation_history.append({
+            "role": "assistant",
+            "content": content
+        })
+
+def chat_with_gpt_streaming(tools, cancel_token=None):
     """Stream the chat response from the OpenAI API.
     
+    Args:
+        tools (list): Function definitions offered to the model
+        cancel_token (CancellationToken, optional): Stops the stream, pending function
+                                                    calls and the follow-up request when cancelled
+    
     Returns:
         Generator: Yields response chunks as they arrive
     """
+    if is_cancelled(cancel_token):
+        return
+    
     try:
         # Call the OpenAI API using the SDK with streaming enabled
+        tracer.mark("chat_request_sent")
         response_stream = client.chat.completions.create(
             model=DEFAULT_MODEL,
             messages=conversation_history,
@@ -111,14 +253,16 @@ def chat_with_gpt_streaming(tools):
         full_content = ""
         current_tool_calls = []
         current_tool_call = None
+        tool_dispatcher = ToolCallDispatcher()
         
         # Process the streaming response
-        for chunk in response_stream:
+        for chunk in _until_cancelled(response_stream, cancel_token):
             # Initialize an empty delta response to yield
             delta_response = {"content": ""}
             
             if chunk.choices[0].delta.content:
                 content = chunk.choices[0].delta.content
+                tracer.mark("first_token", once=True)
                 full_content += content
                 delta_response["content"] = content
                 yield {"type": "content", "data": content}
@@ -126,27 +270,9 @@ def chat_with_gpt_streaming(tools):
             # Handle streamed tool calls if present
             if hasattr(chunk.choices[0].delta, 'tool_calls') and chunk.choices[0].delta.tool_calls:
                 for tool_call_delta in chunk.choices[0].delta.tool_calls:
-                    # Get the tool call index
-                    index = tool_call_delta.index
-                    
-                    # Ensure we have enough elements in our tracking list
-                    while len(current_tool_calls) <= index:
-                        current_tool_calls.append({
-                            "id": "",
-                            "type": "function",
-                            "function": {"name": "", "arguments": ""}
-                        })
-                    
-                    # Update the tool call information
-                    if tool_call_delta.id:
-                        current_tool_calls[index]["id"] = tool_call_delta.id
-                    
-                    if hasattr(tool_call_delta, 'function'):
-                        if hasattr(tool_call_delta.function, 'name') and tool_call_delta.function.name:
-                            current_tool_calls[index]["function"]["name"] = tool_call_delta.function.name
-                        
-                        if hasattr(tool_call_delta.function, 'arguments') and tool_call_delta.function.arguments:
-                            current_tool_calls[index]["function"]["arguments"] += tool_call_delta.function.arguments
+                    _merge_tool_call_delta(current_tool_calls, tool_call_delta)
+                    # Start each call as soon as its arguments are complete
+                    tool_dispatcher.update(current_tool_calls)
                     
                     # Update the delta response
                     delta_response["tool_calls"] = current_tool_calls
@@ -156,6 +282,12 @@ def chat_with_gpt_streaming(tools):
             if chunk.choices[0].finish_reason:
                 yield {"type": "finish", "data": chunk.choices[0].finish_reason}
         
+        if is_cancelled(cancel_token):
+            # Functions that have not started yet are not needed any more
+            tool_dispatcher.cancel()
+            _record_interrupted_reply(full_content)
+            return
+        
         # After streaming completes, handle tool calls if any were detected
         if current_tool_calls:
             # Create the complete assistant message to add to history
@@ -168,33 +300,13 @@ def chat_with_gpt_streaming(tools):
             # Add the assistant's message to history
             conversation_history.append(assistant_message)
             
-            # Process each function call
-            for tool_call in current_tool_calls:
-                if tool_call["type"] == "function":
-                    function_name = tool_call["function"]["name"]
-                    function_args = json.loads(tool_call["function"]["arguments"])
-                    
-                    logger.info(f"Function call: {function_name} with args: {function_args}")
-                    
-                    # Execute function if it exists
-                    if function_name in AVAILABLE_FUNCTIONS:
-                        function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
-                        
-                        # Add function response to history
-                        conversation_history.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call["id"],
-                            "name": function_name,
-                            "content": json.dumps(function_response)
-                        })
-                        
-                        logger.info(f"Function response: {function_response}")
-                        yield {"type": "function_response", "name": function_name, "data": function_response}
-                    else:
-                        logger.warning(f"Function {function_name} not found")
+            # Collect the results; most calls were started while the stream was still open
+            for tool_call, function_response in tool_dispatcher.results(current_tool_calls):
+                _record_tool_result(tool_call, function_response)
+                yield {"type": "function_response", "name": tool_call["function"]["name"], "data": function_response}
             
             # Get final response after function calls
-            for chunk in get_final_response_streaming():
+            for chunk in get_final_response_streaming(cancel_token):
                 yield chunk
         else:
             # No function calls, just add the assistant message to history
@@ -234,12 +346,19 @@ def get_final_response(stream=False):
         logger.error(f"Error in final response request: {str(e)}")
         return f"Sorry, there was an error getting the final response: {str(e)}"
 
-def get_final_response_streaming():
-    """Stream the final response after function calls."""
+def get_final_response_streaming(cancel_token=None):
+    """Stream the final response after function calls.
+    
+    Args:
+        cancel_token (CancellationToken, optional): Closes the stream when cancelled
+    """
+    if is_cancelled(cancel_token):
+        return
     logger.info("Streaming final response after function execution...")
     
     try:
         # Call the OpenAI API using the SDK with streaming enabled
+        tracer.mark("chat_request_sent")
         response_stream = client.chat.completions.create(
             model=DEFAULT_MODEL,
             messages=conversation_history,
@@ -251,9 +370,10 @@ def get_final_response_streaming():
         full_content = ""
         
         # Process the streaming response
-        for chunk in response_stream:
+        for chunk in _until_cancelled(response_stream, cancel_token):
             if chunk.choices[0].delta.content:
                 content = chunk.choices[0].delta.content
+                tracer.mark("first_token", once=True)
                 full_content += content
                 yield {"type": "content", "data": content}
             
@@ -261,6 +381,10 @@ def get_final_response_streaming():
             if chunk.choices[0].finish_reason:
                 yield {"type": "finish", "data": chunk.choices[0].finish_reason}
         
+        if is_cancelled(cancel_token):
+            _record_interrupted_reply(full_content)
+            return
+        
         # Add the final assistant message to history
         conversation_history.append({
             "role": "assistant",
@@ -271,7 +395,197 @@ def get_final_response_streaming():
         logger.error(f"Error in streaming final response request: {str(e)}")
         yield {"type": "error", "data": f"Sorry, there was an error getting the final response: {str(e)}"}
 
-def text_to_speech(text, speed=1.0, instructions=None):
+def _delta_audio(delta):
+    """Get the audio part of a streamed delta (the SDK exposes it as an extra field)."""
+    audio = getattr(delta, "audio", None)
+    if audio is None:
+        return {}
+    return audio if isinstance(audio, dict) else audio.model_dump()
+
+def chat_with_audio(audio_data, buffer, cancel_token=None):
+    """Send a recording straight to the audio chat model and stream its spoken reply.
+    
+    Replaces the transcribe, chat and text-to-speech requests with a single
+    request: the WAV goes in as an input_audio message and the reply comes
+    back as streamed PCM16 audio plus its transcript. Tool calls are run and
+    answered with a follow-up request, as in chat_with_gpt. The conversation
+    history keeps a transcription of the question, made alongside the
+    request, rather than the recording itself.
+    
+    Args:
+        audio_data (io.BytesIO): The recorded WAV audio
+        buffer (JitterBuffer): Buffer receiving the reply audio; closed when the reply ends
+        cancel_token (CancellationToken, optional): Closes the stream and skips any
+                                                    follow-up request when cancelled
+    
+    Yields:
+        dict: The same chunks as chat_with_gpt(stream=True); "content" carries the
+              transcript of the spoken reply
+    """
+    # Re-sending every earlier recording would make each request larger, so the
+    # history keeps the question as text and only this turn's requests carry audio
+    question = _question_transcriber.submit(transcribe_audio, io.BytesIO(audio_data.getvalue()))
+    user_message = {"role": "user", "content": SPOKEN_QUESTION_PLACEHOLDER}
+    try:
+        # Trim silence and downsample; input_audio only accepts WAV or MP3
+        if UPLOAD_PREPROCESS:
+            audio_data, _ = prepare_for_upload(audio_data, codec="wav")
+        audio_message = {
+            "role": "user",
+            "content": [{
+                "type": "input_audio",
+                "input_audio": {"data": base64.b64encode(audio_data.getvalue()).decode("ascii"), "format": "wav"}
+            }]
+        }
+        conversation_history.append(user_message)
+        
+        while not is_cancelled(cancel_token):
+            logger.info(f"Sending audio to model: {AUDIO_CHAT_MODEL}...")
+            response_stream = client.chat.completions.create(
+                model=AUDIO_CHAT_MODEL,
+                modalities=["text", "audio"],
+                audio={"voice": AUDIO_CHAT_VOICE, "format": "pcm16"},
+                messages=[audio_message if message is user_message else message
+                          for message in conversation_history],
+                tools=FUNCTION_DEFINITIONS,
+                tool_choice="auto",
+                stream=True
+            )
+            
+            transcript = ""
+            current_tool_calls = []
+            tool_dispatcher = ToolCallDispatcher()
+            
+            for chunk in _until_cancelled(response_stream, cancel_token):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                
+                audio = _delta_audio(delta)
+                if audio.get("data"):
+                    buffer.write(base64.b64decode(audio["data"]))
+                if audio.get("transcript"):
+                    transcript += audio["transcript"]
+                    yield {"type": "content", "data": audio["transcript"]}
+                
+                if delta.content:
+                    transcript += delta.content
+                    yield {"type": "content", "data": delta.content}
+                
+                if getattr(delta, 'tool_calls', None):
+                    for tool_call_delta in delta.tool_calls:
+                        _merge_tool_call_delta(current_tool_calls, tool_call_delta)
+                    tool_dispatcher.update(current_tool_calls)
+                
+                if chunk.choices[0].finish_reason:
+                    yield {"type": "finish", "data": chunk.choices[0].finish_reason}
+            
+            if is_cancelled(cancel_token):
+                tool_dispatcher.cancel()
+                _record_interrupted_reply(transcript)
+                break
+            
+            if not current_tool_calls:
+                # Keep the reply as text; audio ids in history expire
+                conversation_history.append({"role": "assistant", "content": transcript})
+                break
+            
+            conversation_history.append({
+                "role": "assistant",
+                "content": transcript or None,
+                "tool_calls": current_tool_calls
+            })
+            for tool_call, function_response in tool_dispatcher.results(current_tool_calls):
+                _record_tool_result(tool_call, function_response)
+                yield {"type": "function_response", "name": tool_call["function"]["name"], "data": function_response}
+    
+    except Exception as e:
+        logger.error(f"Error in audio chat request: {str(e)}")
+        yield {"type": "error", "data": f"Sorry, there was an error communicating with the assistant: {str(e)}"}
+    finally:
+        buffer.close()
+        # Usually done long before the reply, since it ran alongside it
+        transcription = question.result()
+        if transcription:
+            conversation_history.replace(user_message, {"role": "user", "content": transcription})
+
+def _build_speech_params(text, speed, instructions, response_format):
+    """Build the request parameters for the speech endpoint."""
+    params = {
+        "model": TTS_MODEL,
+        "voice": TTS_VOICE,
+        "input": text,
+        "speed": speed,
+        "response_format": response_format
+    }
+    
+    # Add instructions if provided and if we're not using tts-1 or tts-1-hd
+    if instructions and not TTS_MODEL.startswith("tts-1"):
+        params["instructions"] = instructions
+    
+    return params
+
+def _cached_speech(text, speed, instructions, response_format):
+    """Look up synthesized speech in the cache.
+    
+    Returns:
+        tuple: (cache key or None if caching is disabled, cached audio or None)
+    """
+    if tts_cache is None:
+        return None, None
+    key = cache_key(text, speed, instructions, response_format)
+    audio = tts_cache.get(key)
+    if audio is not None:
+        logger.info("Text-to-speech cache hit")
+    return key, audio
+
+def _store_speech(key, audio):
+    """Add synthesized speech to the cache; the disk write happens in the background."""
+    if key is not None:
+        tts_cache.put(key, audio)
+
+def _write_temp_audio(audio):
+    """Write synthesized speech to a temporary file and return its path."""
+    with tempfile.NamedTemporaryFile(suffix=f".{TTS_FORMAT}", delete=False) as temp_file:
+        temp_file.write(audio)
+        return temp_file.name
+
+def warm_tts_cache(phrases=TTS_CACHE_WARMUP, speed=1.0, instructions=None):
+    """Synthesize phrases into the TTS cache in the background.
+    
+    Phrases are synthesized in the format the playback path requests (raw PCM
+    when streaming), so later hits match exactly.
+    
+    Args:
+        phrases (list, optional): Texts to cache. Defaults to TTS_CACHE_WARMUP.
+        speed (float, optional): Speech speed the phrases will be requested with
+        instructions (str, optional): Voice instructions the phrases will be requested with
+    
+    Returns:
+        threading.Thread: The warm-up thread, or None if there is nothing to do
+    """
+    if tts_cache is None or not phrases:
+        return None
+    response_format = "pcm" if TTS_STREAMING else TTS_FORMAT
+    
+    def warm():
+        for text in phrases:
+            key = cache_key(text, speed, instructions, response_format)
+            if tts_cache.contains(key):
+                continue
+            try:
+                params = _build_speech_params(text, speed, instructions, response_format)
+                tts_cache.put(key, client.audio.speech.create(**params).content)
+            except Exception as e:
+                logger.error(f"Error warming text-to-speech cache: {str(e)}")
+                return
+        logger.info(f"Text-to-speech cache warmed with {len(phrases)} phrases")
+    
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
+
+def text_to_speech(text, speed=1.0, instructions=None, in_memory=False, cancel_token=None):
     """Convert text to speech using OpenAI's Text-to-Speech API.
     
     Args:
@@ -279,77 +593,463 @@ def text_to_speech(text, speed=1.0, instructions=None):
         speed (float, optional): The speed of the generated audio (0.25 to 4.0). Defaults to 1.0.
         instructions (str, optional): Control the voice style with additional instructions. 
                                      Does not work with tts-1 or tts-1-hd. Defaults to None.
+        in_memory (bool, optional): Return the audio bytes instead of writing a temporary
+                                    file. Defaults to False.
+        cancel_token (CancellationToken, optional): No request is made once it is cancelled
     
     Returns:
-        str: Path to the generated audio file or None if there was an error
+        str or bytes: Path to the generated audio file (or the audio data if in_memory
+                      is True), or None if there was an error or the turn was cancelled
     """
+    if is_cancelled(cancel_token):
+        return None
     logger.info("Converting text to speech...")
     
     try:
-        # Prepare parameters
-        params = {
-            "model": TTS_MODEL,
-            "voice": TTS_VOICE,
-            "input": text,
-            "speed": speed
-        }
-        
-        # Add instructions if provided and if we're not using tts-1 or tts-1-hd
-        if instructions and not TTS_MODEL.startswith("tts-1"):
-            params["instructions"] = instructions
+        key, audio = _cached_speech(text, speed, instructions, TTS_FORMAT)
+        if audio is None:
+            params = _build_speech_params(text, speed, instructions, TTS_FORMAT)
+            
+            # Use the OpenAI SDK for text-to-speech
+            audio = client.audio.speech.create(**params).content
+            _store_speech(key, audio)
+        tracer.mark("first_tts_chunk_ready", once=True)
         
-        # Use the OpenAI SDK for text-to-speech
-        response = client.audio.speech.create(**params)
+        if in_memory:
+            return audio
         
         # Save audio to a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_file:
-            response.stream_to_file(temp_file.name)
-            temp_file_path = temp_file.name
-        
-        return temp_file_path
+        return _write_temp_audio(audio)
     
     except Exception as e:
         logger.error(f"Error in text-to-speech request: {str(e)}")
         return None
 
+def stream_speech(text, buffer, speed=1.0, instructions=None, cancel_token=None):
+    """Stream speech for text into a buffer while it downloads.
+    
+    Requests raw PCM (24kHz, 16-bit, mono) so the bytes can be played as soon
+    as they arrive, without decoding or waiting for the full clip.
+    
+    Args:
+        text (str): The text to convert to speech
+        buffer: Object with write(bytes) and close() methods, e.g. a JitterBuffer.
+                It is always closed when the function returns.
+        speed (float, optional): The speed of the generated audio (0.25 to 4.0). Defaults to 1.0.
+        instructions (str, optional): Control the voice style with additional instructions.
+        cancel_token (CancellationToken, optional): Closes the download when cancelled
+    
+    Returns:
+        bool: True if the whole clip was received, False if there was an error
+              or the turn was cancelled
+    """
+    if is_cancelled(cancel_token):
+        buffer.close()
+        return False
+    logger.info("Streaming text to speech...")
+    
+    # The finished clip, cached only once playback has seen its end
+    key, received_clip = None, None
+    try:
+        key, audio = _cached_speech(text, speed, instructions, "pcm")
+        if audio is not None:
+            # Closing the buffer right after lets playback start without a pre-roll wait
+            buffer.write(audio)
+            tracer.mark("first_tts_chunk_ready", once=True)
+            return True
+        
+        params = _build_speech_params(text, speed, instructions, "pcm")
+        received = bytearray()
+        
+        with client.audio.speech.with_streaming_response.create(**params) as response:
+            with on_cancel(cancel_token, response.close):
+                for data in response.iter_bytes(TTS_STREAM_READ_BYTES):
+                    if is_cancelled(cancel_token):
+                        break
+                    if not received:
+                        tracer.mark("first_tts_chunk_ready", once=True)
+                    buffer.write(data)
+                    received += data
+        
+        if is_cancelled(cancel_token):
+            # A partial clip must not be cached
+            return False
+        received_clip = bytes(received)
+        return True
+    
+    except Exception as e:
+        if is_cancelled(cancel_token):
+            logger.info("Speech download closed: the answer was interrupted")
+            return False
+        logger.error(f"Error in streaming text-to-speech request: {str(e)}")
+        return False
+    finally:
+        buffer.close()
+        if received_clip is not None:
+            _store_speech(key, received_clip)
+
 def clear_conversation_history():
     """Clear the conversation history."""
     global conversation_history
-    conversation_history = []
+    conversation_history = ConversationHistory(summarize_func=_summarize_history)
     logger.info("Conversation history cleared.")
 
-def transcribe_audio(audio_data):
-    """Transcribe audio data using OpenAI's Whisper API."""
-    # Create a temporary file that won't be auto-deleted (windows locks exclusively file and cannot be read.)
-    temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+def cached_response(user_message):
+    """Answer a message from the response cache, if it has a fresh reply.
+    
+    On a hit the exchange is added to the conversation history as if the
+    model had answered, so follow-up questions keep their context.
+    
+    Args:
+        user_message (str): The user's message
+    
+    Returns:
+        CachedResponse: The cached reply and its audio, or None if chat_with_gpt must be called
+    """
+    if response_cache is None:
+        return None
+    
+    entry = response_cache.lookup(user_message)
+    if entry is not None:
+        conversation_history.append({"role": "user", "content": user_message})
+        conversation_history.append({"role": "assistant", "content": entry.reply})
+    return entry
+
+def cache_response(user_message, audio=None, audio_format=None):
+    """Cache the reply chat_with_gpt just gave to user_message.
+    
+    Replies that called a time-dependent function, or whose function calls
+    failed, are not cached.
+    
+    Args:
+        user_message (str): The user's message
+        audio (list, optional): Audio of each spoken chunk of the reply, in order
+        audio_format (str, optional): "pcm" for streamed speech, otherwise the format of the clips
+    
+    Returns:
+        bool: True if the reply was cached
+    """
+    if response_cache is None:
+        return False
+    
+    # Find the turn for this message; older turns may have been folded away
+    for start in range(len(conversation_history) - 1, -1, -1):
+        message = conversation_history[start]
+        if message["role"] == "user" and message["content"] == user_message:
+            break
+    else:
+        return False
+    turn = conversation_history[start + 1:]
+    
+    function_names = []
+    for message in turn:
+        for tool_call in message.get("tool_calls") or []:
+            function_names.append(tool_call["function"]["name"])
+        if message["role"] == "tool":
+            result = json.loads(message["content"] or "{}")
+            if isinstance(result, dict) and "error" in result:
+                return False
+    
+    if not turn or turn[-1]["role"] != "assistant" or not turn[-1].get("content"):
+        return False
+    return response_cache.store(user_message, turn[-1]["content"], function_names, audio, audio_format)
+
+def _save_transcript(text):
+    """Write a transcript to the recordings directory (runs on the writer thread)."""
     try:
-        temp_file.write(audio_data.getvalue())
-        temp_file.flush()
-        temp_file.close()  # Close the file to release the lock on Windows
-        
-        logger.info("Transcribing audio...")
-        
-        # Open the file in binary mode for the API
-        with open(temp_file.name, 'rb') as audio_file:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-        
-        logger.info(f"Transcription: {transcription.text}")
-        
-        # Save transcription to a text file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         transcript_path = os.path.join(os.getcwd(), "recordings", f"transcript_{timestamp}.txt")
         
         with open(transcript_path, 'w') as f:
-            f.write(transcription.text)
+            f.write(text)
             
         logger.info(f"Transcription saved to {transcript_path}")
+    except Exception as e:
+        logger.error(f"Error saving transcription: {str(e)}")
+
+def save_transcript(text):
+    """Queue a transcript to be written to the recordings directory.
+    
+    Args:
+        text (str): The transcribed text
+    """
+    _transcript_writer.submit(_save_transcript, text)
+
+def flush_transcripts():
+    """Wait until every queued transcript has been written to disk."""
+    _transcript_writer.submit(lambda: None).result()
+
+def _build_transcription_params(audio_data, prompt):
+    """Preprocess a recording and build the request parameters for the transcription endpoint."""
+    # Trim silence and shrink the recording before it goes over the network
+    if UPLOAD_PREPROCESS:
+        audio_data, _ = prepare_for_upload(audio_data)
+    file_name = getattr(audio_data, "name", None) or "recording.wav"
+    extension = os.path.splitext(file_name)[1]
+    
+    params = {
+        "model": "whisper-1",
+        "file": (os.path.basename(file_name), audio_data.getvalue(), UPLOAD_MIME_TYPES.get(extension, "audio/wav"))
+    }
+    if prompt:
+        params["prompt"] = prompt
+    return params
+
+def transcribe_audio(audio_data, prompt=None, save=True):
+    """Transcribe audio data using OpenAI's Whisper API.
+    
+    The audio is uploaded straight from memory over the shared client's
+    keep-alive connection pool, and the transcript is saved to disk in the
+    background so the caller gets the text as soon as the API returns.
+    
+    Args:
+        audio_data (io.BytesIO): The recorded WAV audio
+        prompt (str, optional): Preceding text, used as context for a segment of a longer recording
+        save (bool, optional): Whether to save the transcript to disk. Defaults to True.
+    
+    Returns:
+        str: The transcribed text, or None if transcription failed
+    """
+    try:
+        with tracer.span("upload_encode"):
+            params = _build_transcription_params(audio_data, prompt)
+        
+        logger.info("Transcribing audio...")
+        
+        # Upload, recognition and response; the request goes out on a pre-warmed connection
+        with tracer.span("transcription_request"):
+            transcription = client.audio.transcriptions.create(**params)
+        tracer.mark("transcript", latest=True)
+        
+        logger.info(f"Transcription: {transcription.text}")
+        
+        # Save transcription to a text file off the critical path
+        if save:
+            save_transcript(transcription.text)
         return transcription.text
     except Exception as e:
         logger.error(f"Transcription failed: {str(e)}")
         return None
+
+# Async counterparts, built on async_client so one event loop can overlap many
+# requests without a thread per call
+
+async def chat_with_gpt_async(user_message, stream=False, history=None):
+    """Async counterpart of chat_with_gpt.
+    
+    Args:
+        user_message (str): The user's message
+        stream (bool, optional): Whether to stream the response. Defaults to False.
+        history (list, optional): Conversation to continue. Defaults to the global
+                                  conversation history; pass a separate list to run
+                                  independent conversations concurrently.
+    
+    Returns:
+        If stream=False: The assistant's response as a string
+        If stream=True: An async generator yielding response chunks
+    """
+    if history is None:
+        history = conversation_history
+    
+    # Add user message to conversation history
+    history.append({"role": "user", "content": user_message})
+    
+    logger.info(f"Sending message to model: {DEFAULT_MODEL}...")
+    
+    if stream:
+        return chat_with_gpt_streaming_async(FUNCTION_DEFINITIONS, history)
+    
+    try:
+        while True:
+            response = await async_client.chat.completions.create(
+                model=DEFAULT_MODEL,
+                messages=history,
+                tools=FUNCTION_DEFINITIONS,
+                tool_choice="auto"
+            )
+            
+            assistant_message = response.choices[0].message
+            history.append(assistant_message.model_dump())
+            
+            if not assistant_message.tool_calls:
+                return assistant_message.content
+            
+            # Run the requested functions in parallel, then ask again with their results
+            tool_calls = [tool_call.model_dump() for tool_call in assistant_message.tool_calls]
+            for tool_call, function_response in await ToolCallDispatcher().results_async(tool_calls):
+                _record_tool_result(tool_call, function_response, history)
+    
+    except Exception as e:
+        logger.error(f"Error in chat request: {str(e)}")
+        return f"Sorry, there was an error communicating with the assistant: {str(e)}"
+
+async def chat_with_gpt_streaming_async(tools, history=None):
+    """Async counterpart of chat_with_gpt_streaming.
+    
+    Args:
+        tools (list): Tool definitions offered to the model
+        history (list, optional): Conversation to continue. Defaults to the global
+                                  conversation history.
+    
+    Yields:
+        dict: The same chunks as chat_with_gpt_streaming
+    """
+    if history is None:
+        history = conversation_history
+    
+    try:
+        while True:
+            tracer.mark("chat_request_sent")
+            response_stream = await async_client.chat.completions.create(
+                model=DEFAULT_MODEL,
+                messages=history,
+                tools=tools,
+                tool_choice="auto",
+                stream=True
+            )
+            
+            full_content = ""
+            current_tool_calls = []
+            tool_dispatcher = ToolCallDispatcher()
+            
+            async for chunk in response_stream:
+                delta = chunk.choices[0].delta
+                
+                if delta.content:
+                    tracer.mark("first_token", once=True)
+                    full_content += delta.content
+                    yield {"type": "content", "data": delta.content}
+                
+                if getattr(delta, 'tool_calls', None):
+                    for tool_call_delta in delta.tool_calls:
+                        _merge_tool_call_delta(current_tool_calls, tool_call_delta)
+                    tool_dispatcher.update(current_tool_calls)
+                    yield {"type": "tool_call_update", "data": current_tool_calls}
+                
+                if chunk.choices[0].finish_reason:
+                    yield {"type": "finish", "data": chunk.choices[0].finish_reason}
+            
+            if not current_tool_calls:
+                history.append({"role": "assistant", "content": full_content})
+                return
+            
+            # Run the requested functions, then stream the answer to their results
+            history.append({"role": "assistant", "content": full_content, "tool_calls": current_tool_calls})
+            for tool_call, function_response in await tool_dispatcher.results_async(current_tool_calls):
+                _record_tool_result(tool_call, function_response, history)
+                yield {"type": "function_response", "name": tool_call["function"]["name"], "data": function_response}
+    
+    except Exception as e:
+        logger.error(f"Error in streaming chat request: {str(e)}")
+        yield {"type": "error", "data": f"Sorry, there was an error communicating with the assistant: {str(e)}"}
+
+async def text_to_speech_async(text, speed=1.0, instructions=None, in_memory=False):
+    """Async counterpart of text_to_speech.
+    
+    Args:
+        text (str): The text to convert to speech
+        speed (float, optional): The speed of the generated audio (0.25 to 4.0). Defaults to 1.0.
+        instructions (str, optional): Control the voice style with additional instructions.
+        in_memory (bool, optional): Return the audio bytes instead of writing a temporary
+                                    file. Defaults to False.
+    
+    Returns:
+        str or bytes: Path to the generated audio file (or the audio data if in_memory
+                      is True), or None if there was an error
+    """
+    logger.info("Converting text to speech...")
+    
+    try:
+        # Cache lookups may read from disk, so they run off the event loop
+        key, audio = await asyncio.to_thread(_cached_speech, text, speed, instructions, TTS_FORMAT)
+        if audio is None:
+            params = _build_speech_params(text, speed, instructions, TTS_FORMAT)
+            audio = (await async_client.audio.speech.create(**params)).content
+            _store_speech(key, audio)
+        tracer.mark("first_tts_chunk_ready", once=True)
+        
+        if in_memory:
+            return audio
+        
+        return await asyncio.to_thread(_write_temp_audio, audio)
+    
+    except Exception as e:
+        logger.error(f"Error in text-to-speech request: {str(e)}")
+        return None
+
+async def stream_speech_async(text, buffer, speed=1.0, instructions=None):
+    """Async counterpart of stream_speech.
+    
+    Args:
+        text (str): The text to convert to speech
+        buffer: Object with write(bytes) and close() methods, e.g. a JitterBuffer.
+                It is always closed when the coroutine returns.
+        speed (float, optional): The speed of the generated audio (0.25 to 4.0). Defaults to 1.0.
+        instructions (str, optional): Control the voice style with additional instructions.
+    
+    Returns:
+        bool: True if the whole clip was received, False if there was an error
+    """
+    logger.info("Streaming text to speech...")
+    
+    # The finished clip, cached only once playback has seen its end
+    key, received_clip = None, None
+    try:
+        key, audio = await asyncio.to_thread(_cached_speech, text, speed, instructions, "pcm")
+        if audio is not None:
+            buffer.write(audio)
+            tracer.mark("first_tts_chunk_ready", once=True)
+            return True
+        
+        params = _build_speech_params(text, speed, instructions, "pcm")
+        received = bytearray()
+        
+        async with async_client.audio.speech.with_streaming_response.create(**params) as response:
+            async for data in response.iter_bytes(TTS_STREAM_READ_BYTES):
+                if not received:
+                    tracer.mark("first_tts_chunk_ready", once=True)
+                buffer.write(data)
+                received += data
+        
+        received_clip = bytes(received)
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error in streaming text-to-speech request: {str(e)}")
+        return False
     finally:
-        # Clean up the temporary file
-        os.remove(temp_file.name)
\ No newline at end of file
+        buffer.close()
+        # Only updates memory; the disk write is queued
+        if received_clip is not None:
+            _store_speech(key, received_clip)
+
+async def transcribe_audio_async(audio_data, prompt=None, save=True):
+    """Async counterpart of transcribe_audio.
+    
+    Args:
+        audio_data (io.BytesIO): The recorded WAV audio
+        prompt (str, optional): Preceding text, used as context for a segment of a longer recording
+        save (bool, optional): Whether to save the transcript to disk. Defaults to True.
+    
+    Returns:
+        str: The transcribed text, or None if transcription failed
+    """
+    try:
+        # Trimming, resampling and encoding are CPU-bound; keep them off the event loop
+        with tracer.span("upload_encode"):
+            params = await asyncio.to_thread(_build_transcription_params, audio_data, prompt)
+        
+        logger.info("Transcribing audio...")
+        
+        with tracer.span("transcription_request"):
+            transcription = await async_client.audio.transcriptions.create(**params)
+        tracer.mark("transcript", latest=True)
+        
+        logger.info(f"Transcription: {transcription.text}")
+        
+        if save:
+            save_transcript(transcription.text)
+        return transcription.text
+    except Exception as e:
+        logger.error(f"Transcription failed: {str(e)}")
+        return None
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Realtime API backend for the Voice Assistant application.
+
+Instead of three HTTP round trips per turn (transcription, chat and speech),
+the recorder's PCM16 frames are streamed over one persistent WebSocket while
+the user is speaking. Committing the turn asks the model for a response whose
+audio deltas are written straight into a JitterBuffer for playback, and
+function calls are run in parallel and answered on the same connection.
+"""
+import base64
+import json
+import queue
+import threading
+import wave
+from contextlib import ExitStack
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+
+from src.config import logger, API_KEY, REALTIME_URL, REALTIME_MODEL, REALTIME_SAMPLE_RATE, TTS_VOICE
+from src.functions import FUNCTION_DEFINITIONS
+from src.audio_player import JitterBuffer
+from src.tool_executor import ToolCallDispatcher
+
+
+def _realtime_tools():
+    """Convert the chat completion tool definitions to the flat Realtime format."""
+    return [{"type": "function", **definition["function"]} for definition in FUNCTION_DEFINITIONS]
+
+
+class RealtimeTurn:
+    """One user turn and the model's (possibly multi-response) reply.
+
+    Iterating a turn yields the same chunk dicts as chat_with_gpt(stream=True)
+    ("content", "function_response" and "error"), plus "transcription" with
+    the server's transcript of the user's audio. The reply audio is available
+    as it arrives from `audio`.
+    """
+
+    def __init__(self):
+        """Initialize an empty turn."""
+        self.audio = JitterBuffer(rate=REALTIME_SAMPLE_RATE)
+        self.chunks = queue.Queue()
+        self.done = threading.Event()
+        # Function calls of the current response, started as their arguments arrive
+        self.tool_calls = []
+        self.tool_dispatcher = ToolCallDispatcher()
+
+    def _emit(self, chunk_type, data, **extra):
+        """Hand a chunk to whoever is iterating the turn."""
+        self.chunks.put({"type": chunk_type, "data": data, **extra})
+
+    def _finish(self):
+        """Mark the turn complete and release the audio and chunk consumers."""
+        if not self.done.is_set():
+            self.done.set()
+            self.audio.close()
+            self.chunks.put(None)
+
+    def __iter__(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class RealtimeSession:
+    """Persistent Realtime API connection fed by an AudioRecorder."""
+
+    def __init__(self, url=REALTIME_URL, model=REALTIME_MODEL, api_key=API_KEY, voice=TTS_VOICE, instructions=None):
+        """
+        Initialize the session; call connect() before use.
+
+        Args:
+            url (str, optional): WebSocket endpoint
+            model (str, optional): Realtime model name
+            api_key (str, optional): API key sent as a bearer token
+            voice (str, optional): Voice for the model's audio replies
+            instructions (str, optional): System instructions for the session
+        """
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.voice = voice
+        self.instructions = instructions
+        self.connection = None
+        # Holds the connection's context for the lifetime of the session
+        self.exit_stack = ExitStack()
+        self.outgoing = queue.Queue()
+        self.sender_thread = None
+        self.receiver_thread = None
+        self.turn_lock = threading.Lock()
+        self.current_turn = None
+
+        # Audio already streamed from the recorder's current capture buffer
+        self.recorder = None
+        self.streamed_buffer = None
+        self.streamed_bytes = 0
+
+    def _session_config(self):
+        """Session settings: PCM16 both ways, client-driven turns and our tools."""
+        session = {
+            "modalities": ["audio", "text"],
+            "voice": self.voice,
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "input_audio_transcription": {"model": "whisper-1"},
+            # Turns end on key release or local VAD, so the client commits them
+            "turn_detection": None,
+            "tools": _realtime_tools(),
+            "tool_choice": "auto"
+        }
+        if self.instructions:
+            session["instructions"] = self.instructions
+        return session
+
+    def connect(self):
+        """Open the WebSocket, configure the session and start the I/O threads."""
+        logger.info(f"Connecting to realtime model: {self.model}...")
+        self.connection = self.exit_stack.enter_context(connect(
+            f"{self.url}?model={self.model}",
+            additional_headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "OpenAI-Beta": "realtime=v1"
+            },
+            max_size=None
+        ))
+        self._send({"type": "session.update", "session": self._session_config()})
+
+        self.sender_thread = threading.Thread(target=self._sender_thread_func, daemon=True)
+        self.sender_thread.start()
+        self.receiver_thread = threading.Thread(target=self._receiver_thread_func, daemon=True)
+        self.receiver_thread.start()
+
+    def _send(self, event):
+        """Queue a client event; events go out in order on the sender thread."""
+        self.outgoing.put(event)
+
+    def _send_audio(self, pcm):
+        """Append PCM16 audio to the server's input buffer."""
+        if pcm:
+            self._send({"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm).decode("ascii")})
+
+    def _sender_thread_func(self):
+        """Write queued events to the socket, keeping the capture thread off the network."""
+        while True:
+            event = self.outgoing.get()
+            if event is None:
+                break
+            try:
+                self.connection.send(json.dumps(event))
+            except ConnectionClosed as e:
+                logger.error(f"Realtime connection closed while sending: {str(e)}")
+                break
+
+    def attach_recorder(self, recorder):
+        """Stream every recording made by recorder to the server as it is captured.
+
+        Args:
+            recorder (AudioRecorder): Recorder producing 24kHz 16-bit mono PCM
+
+        Raises:
+            ValueError: If the recorder's format does not match the Realtime API's pcm16
+        """
+        if recorder.config.sample_rate != REALTIME_SAMPLE_RATE or recorder.config.channels != 1:
+            raise ValueError(
+                f"Realtime audio must be {REALTIME_SAMPLE_RATE}Hz mono, "
+                f"recorder is {recorder.config.sample_rate}Hz with {recorder.config.channels} channel(s)"
+            )
+        self.recorder = recorder
+        recorder.add_frame_listener(self._on_frame)
+
+    def _on_frame(self, data):
+        """Forward newly captured audio while a recording is in progress (capture thread)."""
+        with self.recorder.capture_lock:
+            capture_buffer = self.recorder.capture_buffer
+            if not self.recorder.is_recording or capture_buffer is None:
+                return
+
+            if capture_buffer is not self.streamed_buffer:
+                # New recording: drop audio left over from a discarded one
+                self._send({"type": "input_audio_buffer.clear"})
+                self.streamed_buffer = capture_buffer
+                self.streamed_bytes = 0
+
+            # Read from the buffer rather than sending data, so a warm pre-roll is included
+            pcm = capture_buffer.read_pcm(self.streamed_bytes)
+            self.streamed_bytes += len(pcm)
+        self._send_audio(pcm)
+
+    def commit_turn(self, wav_buffer, cancel_token=None):
+        """
+        End the user's turn and ask the model to respond.
+
+        If the recording was streamed from an attached recorder, only the audio
+        not yet sent is appended; otherwise the whole recording is uploaded.
+
+        Args:
+            wav_buffer (io.BytesIO): The finished recording
+            cancel_token (CancellationToken, optional): Cancels the model's response
+                                                        and ends the turn when cancelled
+
+        Returns:
+            RealtimeTurn: The turn, yielding text chunks and reply audio as they arrive
+        """
+        previous = self.current_turn
+        if previous is not None:
+            previous.done.wait()
+
+        if self.streamed_buffer is not None and self.streamed_buffer.file is wav_buffer:
+            self._send_audio(self.streamed_buffer.read_pcm(self.streamed_bytes))
+        else:
+            self._send({"type": "input_audio_buffer.clear"})
+            wav_buffer.seek(0)
+            with wave.open(wav_buffer, 'rb') as wf:
+                self._send_audio(wf.readframes(wf.getnframes()))
+            wav_buffer.seek(0)
+        self.streamed_buffer = None
+        self.streamed_bytes = 0
+
+        turn = RealtimeTurn()
+        with self.turn_lock:
+            self.current_turn = turn
+        self._send({"type": "input_audio_buffer.commit"})
+        self._send({"type": "response.create"})
+        if cancel_token is not None:
+            cancel_token.add_callback(lambda: self.cancel_turn(turn))
+        return turn
+
+    def cancel_turn(self, turn):
+        """
+        Stop the model's response to a turn, e.g. when the user barges in.
+
+        Args:
+            turn (RealtimeTurn): The turn to end; nothing happens if it is already done
+        """
+        if turn.done.is_set():
+            return
+        logger.info("Answer interrupted by the user")
+        self._send({"type": "response.cancel"})
+        # Functions that have not started yet are not needed any more
+        turn.tool_dispatcher.cancel()
+        turn._finish()
+
+    def _receiver_thread_func(self):
+        """Dispatch server events until the connection closes."""
+        try:
+            for message in self.connection:
+                self._handle_event(json.loads(message))
+        except ConnectionClosed as e:
+            logger.error(f"Realtime connection closed: {str(e)}")
+        finally:
+            with self.turn_lock:
+                turn = self.current_turn
+            if turn is not None and not turn.done.is_set():
+                turn._emit("error", "Realtime connection closed")
+                turn._finish()
+
+    def _handle_event(self, event):
+        """Route one server event to the current turn."""
+        event_type = event.get("type")
+        with self.turn_lock:
+            turn = self.current_turn
+
+        if event_type == "error":
+            message = event.get("error", {}).get("message", "Unknown error")
+            logger.error(f"Realtime API error: {message}")
+            if turn is not None:
+                turn._emit("error", message)
+                turn._finish()
+            return
+
+        if turn is None or turn.done.is_set():
+            return
+
+        if event_type == "response.audio.delta":
+            turn.audio.write(base64.b64decode(event["delta"]))
+        elif event_type in ("response.audio_transcript.delta", "response.text.delta"):
+            turn._emit("content", event["delta"])
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            turn._emit("transcription", event.get("transcript", ""))
+        elif event_type == "response.function_call_arguments.done":
+            turn.tool_calls.append({
+                "id": event.get("call_id"),
+                "type": "function",
+                "function": {"name": event.get("name"), "arguments": event.get("arguments") or "{}"}
+            })
+            turn.tool_dispatcher.update(turn.tool_calls)
+        elif event_type == "response.done":
+            if turn.tool_calls:
+                self._send_function_outputs(turn)
+                # Let the model answer with the function results
+                self._send({"type": "response.create"})
+            else:
+                turn._finish()
+
+    def _send_function_outputs(self, turn):
+        """Wait for the response's function calls and send their outputs to the model."""
+        for tool_call, function_response in turn.tool_dispatcher.results(turn.tool_calls):
+            self._send({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "function_call_output",
+                    "call_id": tool_call["id"],
+                    "output": json.dumps(function_response)
+                }
+            })
+            turn._emit("function_response", function_response, name=tool_call["function"]["name"])
+        turn.tool_calls = []
+        turn.tool_dispatcher = ToolCallDispatcher()
+
+    def close(self):
+        """Detach from the recorder and close the connection."""
+        if self.recorder is not None:
+            self.recorder.remove_frame_listener(self._on_frame)
+            self.recorder = None
+        self.outgoing.put(None)
+        if self.sender_thread is not None:
+            self.sender_thread.join(timeout=2)
+        # Leaving the connection's context closes it
+        self.exit_stack.close()
+        if self.receiver_thread is not None:
+            self.receiver_thread.join(timeout=2)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Response cache for the Voice Assistant application.
+
+Answers to questions users ask again and again ("what's the weather like",
+"tell me a joke") are kept with the audio they were spoken with, so a repeat
+skips the chat and speech requests entirely. Transcripts are normalized, with
+spelled-out numbers written as digits, and matched exactly.
+
+Optionally they are also matched fuzzily with a character n-gram similarity
+index that scores every cached question in one matrix product. A fuzzy match
+must still use the same numbers and differ only in filler words, since a
+similar-looking question ("Austria" for "Australia") would otherwise be
+answered with no model in the loop.
+
+Entries expire after a TTL, shortened or disabled per function by
+FUNCTION_CACHE_TTLS, so answers that depend on the current time are never
+replayed.
+"""
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.config import logger, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_SIMILARITY, RESPONSE_CACHE_MAX_ENTRIES
+from src.functions import FUNCTION_CACHE_TTLS
+from src.audio_player import JitterBuffer
+
+
+# Spelled-out numbers, which the transcription model writes as often as digits
+_UNITS = {word: value for value, word in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+    "fifteen sixteen seventeen eighteen nineteen".split())}
+_TENS = {word: value * 10 for value, word in enumerate(
+    "twenty thirty forty fifty sixty seventy eighty ninety".split(), start=2)}
+_SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+
+# Words a question can gain or lose without changing what is asked
+_FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "s", "do", "does", "can", "could", "would", "you",
+    "please", "um", "uh", "er", "hmm", "so", "well", "hey", "hi", "ok", "okay", "just"
+}
+
+
+def _numbers_to_digits(words):
+    """Replace runs of English number words with digits, e.g. "twenty five" with "25"."""
+    result = []
+    total, current, last = 0, 0, None
+
+    def flush():
+        nonlocal total, current, last
+        if last is not None:
+            result.append(str(total + current))
+        total, current, last = 0, 0, None
+
+    for word in words:
+        if word in _UNITS:
+            value = _UNITS[word]
+            # "twenty five" continues a number, "two three" starts a new one
+            if last is not None and not (last == "scale" or (last == "tens" and value < 10)):
+                flush()
+            current += value
+            last = "unit"
+        elif word in _TENS:
+            if last is not None and last != "scale":
+                flush()
+            current += _TENS[word]
+            last = "tens"
+        elif word in _SCALES and last is not None:
+            if word == "hundred":
+                current = (current or 1) * 100
+            else:
+                total += (current or 1) * _SCALES[word]
+                current = 0
+            last = "scale"
+        else:
+            flush()
+            result.append(word)
+    flush()
+    return result
+
+
+def normalize_transcript(text):
+    """
+    Normalize a transcript for matching: lowercase, no punctuation, numbers as digits, single spaces.
+
+    Args:
+        text (str): The transcribed question
+
+    Returns:
+        str: The normalized question
+    """
+    words = re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", text.lower()).split()
+    return " ".join(_numbers_to_digits(words))
+
+
+def _numbers(text):
+    """Numbers mentioned in a normalized question, which must match exactly."""
+    return re.findall(r"\d+(?:\.\d+)?", text)
+
+
+def _same_question(question, other):
+    """Whether two similar normalized questions differ only in filler words and not in numbers."""
+    if _numbers(question) != _numbers(other):
+        return False
+    return set(question.split()) ^ set(other.split()) <= _FILLER_WORDS
+
+
+class NGramIndex:
+    """Cosine similarity search over hashed character n-gram vectors."""
+
+    def __init__(self, n=3, dimensions=2048):
+        """
+        Initialize an empty index.
+
+        Args:
+            n (int, optional): Length of the character n-grams. Defaults to 3.
+            dimensions (int, optional): Size of the hashed vectors. Defaults to 2048.
+        """
+        self.n = n
+        self.dimensions = dimensions
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+
+    def vectorize(self, text):
+        """Unit-length n-gram count vector of text."""
+        padded = f" {text} "
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        grams = [padded[i:i + self.n] for i in range(max(1, len(padded) - self.n + 1))]
+        indices = [zlib.crc32(gram.encode("utf-8")) % self.dimensions for gram in grams]
+        np.add.at(vector, indices, 1.0)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, text):
+        """Append text as the last row of the index."""
+        self.vectors = np.vstack([self.vectors, self.vectorize(text)[np.newaxis, :]])
+
+    def remove(self, row):
+        """Remove one row; later rows shift down by one."""
+        self.vectors = np.delete(self.vectors, row, axis=0)
+
+    def matches(self, text, min_similarity):
+        """
+        Find the indexed texts similar to a query, most similar first.
+
+        Args:
+            text (str): Normalized query
+            min_similarity (float): Minimum cosine similarity of a match
+
+        Returns:
+            list: (row, similarity) tuples in descending order of similarity
+        """
+        if not len(self.vectors):
+            return []
+        similarities = self.vectors @ self.vectorize(text)
+        rows = np.flatnonzero(similarities >= min_similarity)
+        rows = rows[np.argsort(-similarities[rows], kind="stable")]
+        return [(int(row), float(similarities[row])) for row in rows]
+
+
+class CachedResponse:
+    """A cached reply and the audio it was spoken with."""
+
+    def __init__(self, question, reply, audio=None, audio_format=None, expires=None):
+        """
+        Initialize a cache entry.
+
+        Args:
+            question (str): Normalized question
+            reply (str): The assistant's reply text
+            audio (list, optional): Audio of each spoken chunk, in order
+            audio_format (str, optional): "pcm" for raw 24kHz 16-bit mono, otherwise a
+                                          format play_audio accepts as bytes (e.g. "wav")
+            expires (float, optional): time.monotonic() value after which the entry is stale
+        """
+        self.question = question
+        self.reply = reply
+        self.audio = audio or []
+        self.audio_format = audio_format
+        self.expires = expires
+
+    def playable_audio(self):
+        """The cached audio as objects play_audio accepts, in order."""
+        if self.audio_format != "pcm":
+            return list(self.audio)
+        buffers = []
+        for pcm in self.audio:
+            buffer = JitterBuffer()
+            buffer.write(pcm)
+            buffer.close()
+            buffers.append(buffer)
+        return buffers
+
+
+class ResponseCache:
+    """Exact and fuzzy cache of replies to normalized transcripts, safe to share between threads."""
+
+    def __init__(self, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS, similarity=RESPONSE_CACHE_SIMILARITY,
+                 max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl_seconds (float, optional): Default lifetime of an entry
+            similarity (float, optional): Minimum cosine similarity for a fuzzy match, which
+                                          must also differ only in filler words. 1.0 allows
+                                          exact matches only
+            max_entries (int, optional): Oldest entries are evicted beyond this many
+        """
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # Entries in insertion order, aligned with the rows of the index
+        self.entries = []
+        self.by_question = {}
+        self.index = NGramIndex()
+        self.stats = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0, "bypassed": 0}
+
+    def ttl_for(self, function_names):
+        """
+        Lifetime of a reply that called the given functions.
+
+        Args:
+            function_names (iterable): Names of the functions called while answering
+
+        Returns:
+            float: TTL in seconds; 0 means the reply must not be cached
+        """
+        ttl = self.ttl_seconds
+        for name in function_names:
+            function_ttl = FUNCTION_CACHE_TTLS.get(name)
+            if function_ttl is not None:
+                ttl = min(ttl, function_ttl)
+        return ttl
+
+    def lookup(self, transcript):
+        """
+        Find a fresh cached reply to a transcript.
+
+        Args:
+            transcript (str): The transcribed question
+
+        Returns:
+            CachedResponse: The cached reply, or None on a miss
+        """
+        question = normalize_transcript(transcript)
+        with self.lock:
+            self._expire()
+            entry = self.by_question.get(question)
+            if entry is not None:
+                self.stats["exact_hits"] += 1
+                logger.info(f"Response cache hit: '{question}'")
+                return entry
+
+            if self.similarity < 1.0:
+                for row, similarity in self.index.matches(question, self.similarity):
+                    # Similar wording with different numbers or content words is a different question
+                    if _same_question(self.entries[row].question, question):
+                        self.stats["fuzzy_hits"] += 1
+                        logger.info(f"Response cache hit: '{question}' matched '{self.entries[row].question}' "
+                                    f"({similarity:.2f})")
+                        return self.entries[row]
+
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, transcript, reply, function_names=(), audio=None, audio_format=None):
+        """
+        Cache a reply, unless a function it called makes it time-dependent.
+
+        Args:
+            transcript (str): The transcribed question
+            reply (str): The assistant's reply text
+            function_names (iterable, optional): Functions called while answering
+            audio (list, optional): Audio of each spoken chunk, in order
+            audio_format (str, optional): Format of the audio; see CachedResponse
+
+        Returns:
+            bool: True if the reply was cached
+        """
+        ttl = self.ttl_for(function_names)
+        if ttl <= 0:
+            self.stats["bypassed"] += 1
+            logger.info("Response not cached: it depends on a time-sensitive function")
+            return False
+
+        question = normalize_transcript(transcript)
+        entry = CachedResponse(question, reply, audio, audio_format, time.monotonic() + ttl)
+        with self.lock:
+            if question in self.by_question:
+                self._remove(self.entries.index(self.by_question[question]))
+            self.entries.append(entry)
+            self.by_question[question] = entry
+            self.index.add(question)
+            while len(self.entries) > self.max_entries:
+                self._remove(0)
+        return True
+
+    def _remove(self, row):
+        """Drop one entry and its index row."""
+        entry = self.entries.pop(row)
+        del self.by_question[entry.question]
+        self.index.remove(row)
+
+    def _expire(self):
+        """Drop every entry past its TTL."""
+        now = time.monotonic()
+        for row in reversed(range(len(self.entries))):
+            if self.entries[row].expires <= now:
+                self._remove(row)
+
+    def log_stats(self):
+        """Log hit/miss statistics."""
+        logger.info(
+            f"Response cache: {self.stats['exact_hits']} exact hits, {self.stats['fuzzy_hits']} fuzzy hits, "
+            f"{self.stats['misses']} misses, {self.stats['bypassed']} replies not cached, "
+            f"{len(self.entries)} entries"
+        )
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tool call execution for the Voice Assistant application.
+
+Tool calls are dispatched to a shared worker pool as soon as their JSON
+arguments are complete, which in a streamed response is usually well before
+the stream ends. Calls run concurrently and each one has its own timeout, so
+a slow function cannot hold up the others or the rest of the turn.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from src.config import logger, TOOL_MAX_WORKERS, TOOL_TIMEOUT_SECONDS
+from src.functions import AVAILABLE_FUNCTIONS, FUNCTION_TIMEOUTS
+
+# Shared pool for every conversation, so calls never wait for a thread to start
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+
+def parse_arguments(arguments, final=False):
+    """
+    Parse a tool call's JSON arguments if they are complete.
+
+    The first streamed delta of a call carries its name with empty arguments,
+    so empty arguments only mean "no arguments" once the stream has ended.
+
+    Args:
+        arguments (str): Arguments accumulated so far
+        final (bool, optional): Whether the stream has ended. Defaults to False.
+
+    Returns:
+        dict: The parsed arguments, or None while the JSON is still incomplete
+    """
+    if not arguments or not arguments.strip():
+        return {} if final else None
+    try:
+        parsed = json.loads(arguments)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def run_function(function_name, function_args):
+    """
+    Run one function from AVAILABLE_FUNCTIONS, turning failures into error results.
+
+    Args:
+        function_name (str): Name of the function the model called
+        function_args (dict): Parsed arguments
+
+    Returns:
+        dict: The function's response, or {"error": ...} if it could not be run
+    """
+    logger.info(f"Function call: {function_name} with args: {function_args}")
+    if function_name not in AVAILABLE_FUNCTIONS:
+        logger.warning(f"Function {function_name} not found")
+        return {"error": f"Function {function_name} not found"}
+    try:
+        function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
+    except Exception as e:
+        logger.error(f"Error executing function {function_name}: {str(e)}")
+        return {"error": str(e)}
+    logger.info(f"Function response: {function_response}")
+    return function_response
+
+
+class ToolCallDispatcher:
+    """Start tool calls as their arguments complete and collect results in call order."""
+
+    def __init__(self, pool=None):
+        """
+        Initialize the dispatcher for one model response.
+
+        Args:
+            pool (ThreadPoolExecutor, optional): Pool to run functions on. Defaults to the shared pool.
+        """
+        self.pool = pool or _tool_pool
+        # Index of the tool call -> (future, deadline)
+        self.started = {}
+
+    def update(self, tool_calls, final=False):
+        """Dispatch every call in tool_calls whose arguments have become complete.
+
+        Args:
+            tool_calls (list): Tool calls accumulated so far, in the chat completion dict format
+            final (bool, optional): Whether the stream has ended, so empty arguments mean {}
+        """
+        for index, tool_call in enumerate(tool_calls):
+            if index in self.started or tool_call.get("type", "function") != "function":
+                continue
+            function_name = tool_call["function"]["name"]
+            function_args = parse_arguments(tool_call["function"]["arguments"], final)
+            if not function_name or function_args is None:
+                continue
+
+            timeout = FUNCTION_TIMEOUTS.get(function_name, TOOL_TIMEOUT_SECONDS)
+            future = self.pool.submit(run_function, function_name, function_args)
+            self.started[index] = (future, time.monotonic() + timeout)
+
+    def cancel(self):
+        """Cancel the calls that have not started running; running calls finish in the background."""
+        for future, _ in self.started.values():
+            future.cancel()
+
+    def _timed_out(self, tool_call):
+        """Result reported to the model for a call that missed its deadline."""
+        function_name = tool_call["function"]["name"]
+        logger.warning(f"Function {function_name} timed out")
+        return {"error": f"Function {function_name} timed out"}
+
+    def _invalid(self, tool_call):
+        """Result reported to the model for a call whose arguments never became valid JSON."""
+        logger.warning(f"Invalid arguments for function {tool_call['function']['name']}")
+        return {"error": "Invalid function arguments"}
+
+    def results(self, tool_calls):
+        """
+        Wait for every call in tool_calls, dispatching any not started yet.
+
+        Args:
+            tool_calls (list): The complete tool calls of the response
+
+        Returns:
+            list: (tool_call, function_response) pairs in call order
+        """
+        self.update(tool_calls, final=True)
+        results = []
+        for index, tool_call in enumerate(tool_calls):
+            if index not in self.started:
+                results.append((tool_call, self._invalid(tool_call)))
+                continue
+            future, deadline = self.started[index]
+            try:
+                results.append((tool_call, future.result(timeout=max(0.0, deadline - time.monotonic()))))
+            except TimeoutError:
+                results.append((tool_call, self._timed_out(tool_call)))
+        return results
+
+    async def results_async(self, tool_calls):
+        """Async counterpart of results(); waits without blocking the event loop."""
+        self.update(tool_calls, final=True)
+        results = []
+        for index, tool_call in enumerate(tool_calls):
+            if index not in self.started:
+                results.append((tool_call, self._invalid(tool_call)))
+                continue
+            future, deadline = self.started[index]
+            try:
+                response = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                  timeout=max(0.0, deadline - time.monotonic()))
+                results.append((tool_call, response))
+            except asyncio.TimeoutError:
+                results.append((tool_call, self._timed_out(tool_call)))
+        return results
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Per-turn latency tracing for the Voice Assistant application.
+
+Each turn gets a timeline of perf_counter() spans and marks: key release,
+WAV assembly, upload, transcript, chat request, first token, first speech
+chunk, first and last audio sample out. A turn starts when SPACE is pressed
+and its records are appended to a JSONL file when the next turn starts (or
+at exit), one line per record, with times in milliseconds relative to the
+key release. Writes happen on a background thread, so starting a turn never
+waits for the disk, and the file is rotated once it reaches TRACE_MAX_BYTES.
+benchmarks/trace_report.py summarizes the file as percentiles.
+
+Records are attributed to the turn started last, so with queued turns the
+tail of an answer that overlaps the next recording is counted in the newer
+turn.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.config import logger, TRACING_ENABLED, TRACE_FILE, TRACE_MAX_BYTES
+
+# Timeline origin: the moment the user finished speaking (SPACE released, or
+# the end of speech detected in hands-free mode)
+ORIGINS = ("key_release", "speech_end")
+
+
+class Tracer:
+    """Collect the spans of the current turn and export them as JSONL."""
+
+    def __init__(self, path=TRACE_FILE, enabled=TRACING_ENABLED, max_bytes=TRACE_MAX_BYTES):
+        """
+        Initialize the tracer.
+
+        Args:
+            path (str, optional): JSONL file the records are appended to
+            enabled (bool, optional): Whether to record anything. Defaults to TRACING_ENABLED.
+            max_bytes (int, optional): Size at which the file is renamed to path + ".1"
+                                       and a new one started
+        """
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.writer = None
+        self.lock = threading.Lock()
+        self.turn_id = None
+        self.turn_count = 0
+        # (name, start, end or None for marks) in perf_counter() seconds, in the order they ended
+        self.records = []
+        # Marks recorded with once=True or latest=True, by name
+        self.marked = {}
+
+    def begin_turn(self):
+        """Queue the previous turn for writing and start recording a new one."""
+        if not self.enabled:
+            return
+        with self.lock:
+            previous = self._take_turn()
+            self.turn_count += 1
+            self.turn_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.turn_count}"
+            if previous[0] is None or not previous[1]:
+                return
+            if self.writer is None:
+                self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-writer")
+        self.writer.submit(self._write, previous)
+
+    def mark(self, name, once=False, latest=False):
+        """
+        Record an instant in the current turn.
+
+        Args:
+            name (str): Milestone name, e.g. "first_token"
+            once (bool, optional): Ignore the mark if the turn already has one of this name
+            latest (bool, optional): Replace an earlier mark of this name, e.g. for
+                                     the last audio sample, which moves as chunks play
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if self.turn_id is None:
+                return
+            if name in self.marked:
+                if once:
+                    return
+                if latest:
+                    self.records.remove(self.marked[name])
+            record = (name, now, None)
+            self.records.append(record)
+            if once or latest:
+                self.marked[name] = record
+
+    @contextmanager
+    def span(self, name):
+        """Record how long the enclosed block takes, as part of the current turn."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                if self.turn_id is not None:
+                    self.records.append((name, start, end))
+
+    def _take_turn(self):
+        """Detach the current turn's records (lock held)."""
+        turn = (self.turn_id, self.records)
+        self.turn_id = None
+        self.records = []
+        self.marked = {}
+        return turn
+
+    def _write(self, turn):
+        """Append one turn's records to the JSONL file."""
+        turn_id, records = turn
+        if turn_id is None or not records:
+            return
+        origin = next((start for name, start, _ in records if name in ORIGINS),
+                      min(start for _, start, _ in records))
+        lines = [
+            json.dumps({
+                "turn": turn_id,
+                "name": name,
+                "kind": "mark" if end is None else "span",
+                "start_ms": round((start - origin) * 1000, 3),
+                "duration_ms": 0.0 if end is None else round((end - start) * 1000, 3)
+            })
+            for name, start, end in sorted(records, key=lambda record: record[1])
+        ]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write latency trace: {str(e)}")
+
+    def drain(self):
+        """Wait until every queued turn has been written."""
+        if self.writer is None:
+            return
+        try:
+            self.writer.submit(lambda: None).result()
+        except RuntimeError:
+            # At exit the writer has already finished its queue and shut down
+            pass
+
+    def flush(self):
+        """Write out the queued turns and the current one, e.g. at exit."""
+        if not self.enabled:
+            return
+        with self.lock:
+            turn = self._take_turn()
+        self.drain()
+        self._write(turn)
+
+
+# Global tracer shared by the recorder, the API client and the player
+tracer = Tracer()
+atexit.register(tracer.flush)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Text-to-speech audio cache for the Voice Assistant application.
+
+Synthesized audio is stored under a hash of everything that affects how it
+sounds: the normalized text, TTS model, voice, speed, instructions and audio
+format. Recent entries are kept in memory and every entry is written to disk,
+both bounded in size with least-recently-used eviction, so repeated phrases
+(greetings, confirmations, error messages) play without a network request.
+Disk writes happen on a background thread and files are read without holding
+the cache lock, so storing a clip never delays the speech being played.
+"""
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import logger, TTS_MODEL, TTS_VOICE, TTS_CACHE_DIR, TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DISK_BYTES
+
+
+def normalize_text(text):
+    """
+    Normalize text so trivially different spellings share a cache entry.
+
+    Only Unicode form and whitespace are normalized; case and punctuation
+    change how the text is spoken, so they are kept.
+
+    Args:
+        text (str): Text to be spoken
+
+    Returns:
+        str: The normalized text
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text, speed, instructions, response_format, model=TTS_MODEL, voice=TTS_VOICE):
+    """Content address of the audio for one speech request."""
+    identity = json.dumps([normalize_text(text), model, voice, float(speed), instructions or "", response_format])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Memory and disk LRU cache of synthesized speech, safe to share between threads."""
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, memory_bytes=TTS_CACHE_MEMORY_BYTES, disk_bytes=TTS_CACHE_DISK_BYTES):
+        """
+        Initialize the cache, indexing any entries already on disk.
+
+        Args:
+            cache_dir (str, optional): Directory for the on-disk entries, or None for memory only
+            memory_bytes (int, optional): Maximum size of the entries kept in memory
+            disk_bytes (int, optional): Maximum size of the entries kept on disk
+        """
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.lock = threading.Lock()
+
+        # key -> audio bytes, least recently used first
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        # key -> file size, least recently used first
+        self.disk = OrderedDict()
+        self.disk_size = 0
+        # Keys queued for the background writer
+        self.writing = set()
+        self.writer = None
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if self.cache_dir:
+            self._load_index()
+
+    def _path(self, key):
+        """File holding the entry for key."""
+        return os.path.join(self.cache_dir, f"{key}.audio")
+
+    def _load_index(self):
+        """Index existing disk entries, oldest access first."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".audio"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+        except OSError as e:
+            logger.error(f"Error reading TTS cache directory, using memory only: {str(e)}")
+            self.cache_dir = None
+            return
+
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_size += size
+        self._delete(self._evict_disk())
+        if self.disk:
+            logger.info(f"TTS cache: {len(self.disk)} entries ({self.disk_size // 1024} KB) on disk")
+
+    def contains(self, key):
+        """Whether key is cached, without counting a lookup or refreshing its use."""
+        with self.lock:
+            return key in self.memory or key in self.disk
+
+    def get(self, key):
+        """
+        Look up cached audio.
+
+        Args:
+            key (str): Key from cache_key()
+
+        Returns:
+            bytes: The audio, or None on a miss
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self.memory[key]
+
+            if key not in self.disk:
+                self.stats["misses"] += 1
+                return None
+            path = self._path(key)
+
+        # Read without the lock, so other lookups are not held up by the disk
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # The file's modification time records its last use across restarts
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"Dropping unreadable TTS cache entry: {str(e)}")
+            with self.lock:
+                if key in self.disk:
+                    self.disk_size -= self.disk.pop(key)
+                self.stats["misses"] += 1
+            return None
+
+        with self.lock:
+            if key in self.disk:
+                self.disk.move_to_end(key)
+            self.stats["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        """
+        Store synthesized audio in memory and queue it for writing to disk.
+
+        Args:
+            key (str): Key from cache_key()
+            audio (bytes): The complete audio for the request
+        """
+        if not audio:
+            return
+        with self.lock:
+            self.stats["stores"] += 1
+            self._remember(key, audio)
+            write = bool(self.cache_dir) and key not in self.disk and key not in self.writing
+            if write:
+                self.writing.add(key)
+                if self.writer is None:
+                    self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-cache-writer")
+        if write:
+            self.writer.submit(self._write, key, audio)
+
+    def flush(self):
+        """Wait until every queued disk write has finished."""
+        if self.writer is not None:
+            self.writer.submit(lambda: None).result()
+
+    def _remember(self, key, audio):
+        """Keep audio in memory, evicting the least recently used entries."""
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key))
+        self.memory[key] = audio
+        self.memory_size += len(audio)
+        while self.memory_size > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    def _write(self, key, audio):
+        """Write an entry to disk on the writer thread, evicting the least recently used files."""
+        written = False
+        if len(audio) <= self.disk_bytes:
+            path = self._path(key)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write then rename, so a crash never leaves a truncated entry
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(audio)
+                os.replace(f"{path}.tmp", path)
+                written = True
+            except OSError as e:
+                logger.warning(f"Could not write TTS cache entry: {str(e)}")
+
+        with self.lock:
+            self.writing.discard(key)
+            if not written:
+                return
+            self.disk[key] = len(audio)
+            self.disk_size += len(audio)
+            evicted = self._evict_disk()
+        self._delete(evicted)
+
+    def _evict_disk(self):
+        """Drop the least recently used entries until the disk budget is met (lock held).
+
+        Returns:
+            list: Keys whose files must be deleted
+        """
+        evicted = []
+        while self.disk_size > self.disk_bytes:
+            key, size = self.disk.popitem(last=False)
+            self.disk_size -= size
+            self.stats["evictions"] += 1
+            evicted.append(key)
+        return evicted
+
+    def _delete(self, keys):
+        """Delete the files of evicted entries."""
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache."""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def log_stats(self):
+        """Log hit/miss statistics."""
+        logger.info(
+            f"TTS cache: {self.stats['memory_hits']} memory hits, {self.stats['disk_hits']} disk hits, "
+            f"{self.stats['misses']} misses ({self.hit_rate():.0%} hit rate), "
+            f"{len(self.memory)} entries in memory, {len(self.disk)} on disk ({self.disk_size // 1024} KB)"
+        )
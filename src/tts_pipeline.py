@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Text-to-speech pipeline for the Voice Assistant application.
+
+Chunks of the assistant's reply are synthesized on a bounded worker pool while
+the LLM keeps streaming, and handed to playback strictly in the order they
+were submitted. In streaming mode each chunk is handed to playback as a
+JitterBuffer right away and starts playing while it is still downloading.
+With a cancellation token, chunks not yet synthesized are never requested
+once it is cancelled, and nothing more is handed to the player.
+"""
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.config import logger, TTS_MAX_WORKERS
+from src.audio_player import JitterBuffer
+from src.cancellation import is_cancelled
+
+
+class _RecordingBuffer:
+    """Buffer wrapper that keeps a copy of everything streamed into it."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+        self.buffer.write(data)
+
+    def close(self):
+        self.buffer.close()
+
+
+class TTSPipeline:
+    """Synthesize text chunks in parallel and play them back in order."""
+
+    def __init__(self, tts_func, play_func, speed=1.0, max_workers=TTS_MAX_WORKERS, stream_func=None, keep_audio=False,
+                 cancel_token=None):
+        """
+        Initialize the pipeline and start its dispatcher thread.
+
+        Args:
+            tts_func (callable): Function converting (text, speed) to playable audio
+            play_func (callable): Function playing audio, accepting a `block` keyword
+            speed (float, optional): Speech speed passed to tts_func. Defaults to 1.0.
+            max_workers (int, optional): Maximum number of concurrent TTS requests.
+            stream_func (callable, optional): Function streaming (text, buffer, speed) into
+                                              a JitterBuffer. If given, it is used instead
+                                              of tts_func.
+            keep_audio (bool, optional): Keep the synthesized audio for audio(). Defaults to False.
+            cancel_token (CancellationToken, optional): Token of the turn being spoken. It is
+                                                        passed on to tts_func, stream_func and
+                                                        play_func as a `cancel_token` keyword.
+        """
+        self.tts_func = tts_func
+        self.play_func = play_func
+        self.speed = speed
+        self.stream_func = stream_func
+        self.cancel_token = cancel_token
+        self.token_kwargs = {"cancel_token": cancel_token} if cancel_token is not None else {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self.pending = queue.Queue()
+        # (future, recording buffer or None) per chunk when keeping audio
+        self.kept = [] if keep_audio else None
+        self.dispatcher_thread = threading.Thread(target=self._dispatcher_thread_func)
+        self.dispatcher_thread.daemon = True
+        self.dispatcher_thread.start()
+
+    def submit(self, text, block=False):
+        """Queue a chunk of text for synthesis.
+
+        Synthesis starts immediately if a worker is free; playback happens
+        once every previously submitted chunk has been handed to the player.
+
+        Args:
+            text (str): The text to synthesize
+            block (bool, optional): Whether playback of this chunk should block
+                                    the dispatcher until it finishes. Defaults to False.
+
+        Returns:
+            Future: Resolves to the result of tts_func (or stream_func) for this chunk
+        """
+        if is_cancelled(self.cancel_token):
+            future = Future()
+            future.cancel()
+            return future
+        
+        logger.info(f"Queueing chunk for speech synthesis: '{text}'")
+        if self.stream_func:
+            # The buffer is played right away; the player waits for its pre-roll
+            buffer = JitterBuffer()
+            target = _RecordingBuffer(buffer) if self.kept is not None else buffer
+            future = self.executor.submit(self._stream, text, target)
+            if self.kept is not None:
+                self.kept.append((future, target))
+            ready = Future()
+            ready.set_result(buffer)
+            self.pending.put((ready, block))
+            return future
+
+        future = self.executor.submit(self._synthesize, text)
+        if self.kept is not None:
+            self.kept.append((future, None))
+        self.pending.put((future, block))
+        return future
+
+    def _synthesize(self, text):
+        """Run tts_func for one chunk, unless the turn was cancelled while it was queued."""
+        if is_cancelled(self.cancel_token):
+            return None
+        return self.tts_func(text, self.speed, **self.token_kwargs)
+
+    def _stream(self, text, buffer):
+        """Run stream_func for one chunk, unless the turn was cancelled while it was queued."""
+        if is_cancelled(self.cancel_token):
+            buffer.close()
+            return False
+        return self.stream_func(text, buffer, self.speed, **self.token_kwargs)
+
+    def _dispatcher_thread_func(self):
+        """Hand synthesized chunks to the player in submission order."""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+
+            future, block = item
+            if is_cancelled(self.cancel_token):
+                # Don't wait for chunks nobody will hear
+                continue
+            try:
+                audio = future.result()
+            except Exception as e:
+                logger.error(f"Error synthesizing speech chunk: {str(e)}")
+                continue
+
+            if audio and not is_cancelled(self.cancel_token):
+                self.play_func(audio, block=block, **self.token_kwargs)
+
+    def finish(self):
+        """Wait until every submitted chunk has been handed to the player.
+
+        If the last chunk was submitted with block=True, this also waits for
+        its playback to finish.
+        """
+        self.pending.put(None)
+        self.dispatcher_thread.join()
+        # After a cancel, requests still in flight finish in the background
+        self.executor.shutdown(wait=not is_cancelled(self.cancel_token), cancel_futures=True)
+
+    def audio(self):
+        """Audio of every chunk in submission order, for a pipeline created with keep_audio=True.
+
+        Call after finish(). Streamed chunks are returned as raw PCM, others as
+        returned by tts_func.
+
+        Returns:
+            list: The audio of each chunk, or None if any chunk failed to synthesize
+        """
+        clips = []
+        for future, recording in self.kept or []:
+            try:
+                result = future.result()
+            except Exception:
+                return None
+            if not result:
+                return None
+            clips.append(bytes(recording.data) if recording is not None else result)
+        return clips
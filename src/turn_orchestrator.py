@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Asyncio turn orchestrator for the Voice Assistant application.
+
+One event loop drives every stage of a turn: waiting for the recording,
+transcription, the streamed chat response, speech synthesis of each chunk and
+in-order handoff to the playback queue. Requests are coroutines on the async
+OpenAI client, so turns can overlap without a thread per request.
+"""
+import asyncio
+
+from src.config import logger, TTS_MAX_WORKERS, TTS_STREAMING
+from src.audio_player import JitterBuffer
+from src.openai_client import (chat_with_gpt_async, text_to_speech_async, stream_speech_async,
+                               transcribe_audio_async, transport)
+from src.utils import SentenceChunker
+
+
+class AsyncTurnOrchestrator:
+    """Run voice assistant turns as coroutines on a single event loop."""
+
+    def __init__(self, play_func, recorder=None, speed=2.0, max_tts_requests=TTS_MAX_WORKERS, streaming=TTS_STREAMING):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            play_func (callable): Function queueing audio for playback, accepting a `block`
+                                  keyword and returning a Future that resolves once played
+            recorder (SpaceKeyRecorder or HandsFreeRecorder, optional): Source of recordings for run()
+            speed (float, optional): Speech speed for synthesized replies. Defaults to 2.0.
+            max_tts_requests (int, optional): Maximum concurrent speech requests across all turns
+            streaming (bool, optional): Stream PCM into playback instead of waiting for whole clips
+        """
+        self.play_func = play_func
+        self.recorder = recorder
+        self.speed = speed
+        self.streaming = streaming
+        self.max_tts_requests = max_tts_requests
+        self.tts_limit = None
+
+    async def _synthesize(self, text):
+        """Synthesize one chunk, limited to max_tts_requests at a time."""
+        async with self.tts_limit:
+            return await text_to_speech_async(text, self.speed, in_memory=True)
+
+    async def _stream(self, text, buffer):
+        """Stream one chunk into a JitterBuffer, limited to max_tts_requests at a time."""
+        try:
+            async with self.tts_limit:
+                return await stream_speech_async(text, buffer, self.speed)
+        finally:
+            buffer.close()
+
+    def _start_speech(self, text):
+        """Start synthesizing a chunk and return an awaitable for its playable audio."""
+        if self.streaming:
+            # Playback starts on the buffer right away and waits for its pre-roll
+            buffer = JitterBuffer()
+            task = asyncio.create_task(self._stream(text, buffer))
+            ready = asyncio.get_running_loop().create_future()
+            ready.set_result(buffer)
+            return ready, task
+        task = asyncio.create_task(self._synthesize(text))
+        return task, task
+
+    async def _play_in_order(self, pending):
+        """Hand synthesized chunks to the playback queue in submission order."""
+        last_playback = None
+        while True:
+            audio = await pending.get()
+            if audio is None:
+                break
+            audio = await audio
+            if audio:
+                last_playback = self.play_func(audio, block=False) or last_playback
+        if last_playback is not None:
+            await asyncio.wrap_future(last_playback)
+
+    async def run_turn(self, wav_buffer, history=None, on_text=None):
+        """
+        Transcribe a recording, stream the reply and speak it.
+
+        Args:
+            wav_buffer (io.BytesIO): The recorded WAV audio
+            history (list, optional): Conversation to continue; see chat_with_gpt_async
+            on_text (callable, optional): Called with the transcription and each reply chunk
+
+        Returns:
+            str: The full reply, or None if the recording could not be transcribed
+        """
+        if self.tts_limit is None:
+            self.tts_limit = asyncio.Semaphore(self.max_tts_requests)
+
+        transcription = await transcribe_audio_async(wav_buffer)
+        if transcription is None:
+            logger.error("Failed to transcribe audio.")
+            return None
+        if on_text:
+            on_text(f"You said: {transcription}\n")
+
+        pending = asyncio.Queue()
+        player = asyncio.create_task(self._play_in_order(pending))
+        synthesis_tasks = []
+        full_response = ""
+        chunker = SentenceChunker()
+
+        try:
+            async for chunk in await chat_with_gpt_async(transcription, stream=True, history=history):
+                if chunk["type"] == "content":
+                    full_response += chunk["data"]
+                    if on_text:
+                        on_text(chunk["data"])
+                    for chunk_to_process in chunker.feed(chunk["data"]):
+                        audio, task = self._start_speech(chunk_to_process)
+                        synthesis_tasks.append(task)
+                        pending.put_nowait(audio)
+                elif chunk["type"] == "function_response":
+                    logger.info(f"Function {chunk['name']} returned: {chunk['data']}")
+                elif chunk["type"] == "error":
+                    logger.error(f"Error in streaming: {chunk['data']}")
+                    full_response += f"\nError: {chunk['data']}"
+
+            remaining = chunker.flush()
+            if remaining.strip():
+                audio, task = self._start_speech(remaining)
+                synthesis_tasks.append(task)
+                pending.put_nowait(audio)
+        finally:
+            pending.put_nowait(None)
+            await player
+            await asyncio.gather(*synthesis_tasks, return_exceptions=True)
+
+        return full_response
+
+    async def run(self, on_text=None):
+        """
+        Record and answer turns until the user exits.
+
+        Args:
+            on_text (callable, optional): Called with the transcription and each reply chunk
+        """
+        # Every request of a turn goes through the async client, so warm its pool on SPACE
+        transport.use_event_loop(asyncio.get_running_loop())
+        try:
+            while True:
+                wav_buffer, _ = await self.recorder.wait_for_space_key_recording_async()
+                if wav_buffer is None:
+                    if self.recorder.exit_requested:
+                        break
+                    continue
+                await self.run_turn(wav_buffer, on_text=on_text)
+        finally:
+            transport.use_event_loop(None)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Queued turns for the Voice Assistant application.
+
+By default a turn is recorded, transcribed, answered and spoken before the
+next recording can start. With queued turns, capture runs on its own: every
+recording is handed to a background transcription as soon as SPACE is
+released, and a single answering thread takes the transcripts in the order
+they were recorded. Users firing several short commands in a row no longer
+wait for each spoken answer before giving the next one.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import logger, QUEUED_TURNS_MAX_PENDING
+
+
+class TurnQueue:
+    """Record and transcribe turns while earlier ones are still being answered."""
+
+    def __init__(self, recorder, answer_func, max_pending=QUEUED_TURNS_MAX_PENDING):
+        """
+        Initialize the queue.
+
+        Args:
+            recorder (SpaceKeyRecorder or HandsFreeRecorder): Source of recordings
+            answer_func (callable): Function taking (transcription, turn_started) that
+                                    answers one turn; turn_started is the perf_counter()
+                                    value when the recording was released
+            max_pending (int, optional): Turns waiting for an answer before capture waits
+        """
+        self.recorder = recorder
+        self.answer_func = answer_func
+        self.turns = queue.Queue(maxsize=max_pending)
+        # Transcriptions run concurrently; the queue keeps them in recording order
+        self.transcriber = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="turn-transcriber")
+        self.answered = 0
+        self.started = None
+
+    def run(self):
+        """Capture turns until the user exits, then finish answering the queued ones."""
+        self.started = time.perf_counter()
+        answerer = threading.Thread(target=self._answer_loop, daemon=True)
+        answerer.start()
+        try:
+            while True:
+                wav_buffer, _ = self.recorder.wait_for_space_key_recording()
+                if wav_buffer is None:
+                    if self.recorder.exit_requested:
+                        break
+                    continue
+
+                turn_started = time.perf_counter()
+                future = self.transcriber.submit(self.recorder.transcribe, wav_buffer)
+                # Blocks only if max_pending turns are already waiting
+                self.turns.put((future, turn_started))
+                logger.info(f"Turn queued ({self.turns.qsize()} waiting for an answer)")
+        finally:
+            self.turns.put(None)
+            answerer.join()
+            self.transcriber.shutdown(wait=False)
+
+    def _answer_loop(self):
+        """Answer queued turns one at a time, in the order they were recorded."""
+        while True:
+            item = self.turns.get()
+            if item is None:
+                break
+
+            future, turn_started = item
+            try:
+                transcription = future.result()
+            except Exception as e:
+                logger.error(f"Error transcribing queued turn: {str(e)}")
+                continue
+            if transcription is None:
+                logger.error("Failed to transcribe audio.")
+                continue
+
+            try:
+                self.answer_func(transcription, turn_started)
+            except Exception as e:
+                logger.error(f"Error answering queued turn: {str(e)}")
+                continue
+            self.answered += 1
+
+    def commands_per_minute(self):
+        """Turns answered per minute since run() started."""
+        if self.started is None:
+            return 0.0
+        minutes = (time.perf_counter() - self.started) / 60
+        return self.answered / minutes if minutes > 0 else 0.0
+
+    def log_stats(self):
+        """Log how many turns were answered and the resulting throughput."""
+        logger.info(f"Queued turns: {self.answered} answered ({self.commands_per_minute():.1f} commands per minute)")
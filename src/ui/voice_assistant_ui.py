@@ -5,12 +5,24 @@ import time
 from enum import Enum
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, 
                            QVBoxLayout, QHBoxLayout, QLabel, QFrame, QTextEdit)
-from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QColor, QPalette, QTextCursor
+from PyQt5.QtGui import QIcon, QFont, QPixmap, QPainter, QColor, QPalette, QTextCursor, QTextOption
 from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal, QThread
 
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import logger, QUEUED_TURNS, QUEUED_TURNS_MAX_PENDING
+from src.tts_pipeline import TTSPipeline
+from src.cancellation import CancellationToken
+
 # Path to assets
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 
+# Streamed text is added to the transcript at most this many times per second
+TEXT_FRAME_RATE_HZ = 30
+
+# Oldest paragraphs are dropped beyond this, keeping long sessions responsive
+MAX_TRANSCRIPT_BLOCKS = 1000
+
 class AssistantState(Enum):
     """States for the voice assistant."""
     IDLE = 0
@@ -41,74 +53,103 @@ class RecordingThread(QThread):
         self.running = False
 
 class ProcessingThread(QThread):
-    """Thread for processing audio and generating response."""
-    finished = pyqtSignal()
-    text_updated = pyqtSignal(str)
+    """Thread for processing audio and generating response.
+    
+    Each turn gets its own cancellation token; cancel() stops the chat and
+    speech requests and the playback of the turn, and run() returns soon after.
+    """
+    finished = pyqtSignal(object)  # The token of the turn that finished
+    text_updated = pyqtSignal(str)  # New transcript text only, never the whole turn
     state_changed = pyqtSignal(AssistantState)
     
-    def __init__(self, transcribe_func, chat_func, tts_func, play_func, chunk_text_func):
+    def __init__(self, transcribe_func, chat_func, tts_func, play_func, chunker_factory, stream_func=None):
         super().__init__()
         self.wav_buffer = None
+        self.transcription = None
         self.transcribe_func = transcribe_func
         self.chat_func = chat_func
         self.tts_func = tts_func
         self.play_func = play_func
-        self.chunk_text_func = chunk_text_func
+        self.chunker_factory = chunker_factory
+        self.stream_func = stream_func
+        self.cancel_token = CancellationToken()
+        
+    def set_audio(self, wav_buffer, transcription=None):
+        """Set the audio buffer to process and start a new turn.
+        
+        Args:
+            wav_buffer (io.BytesIO): The recorded WAV audio
+            transcription (Future, optional): Transcription already started in the background
         
-    def set_audio(self, wav_buffer):
-        """Set the audio buffer to process."""
+        Returns:
+            CancellationToken: The token that interrupts the new turn
+        """
         self.wav_buffer = wav_buffer
+        self.transcription = transcription
+        self.cancel_token = CancellationToken()
+        return self.cancel_token
+    
+    def cancel(self):
+        """Interrupt the turn being processed."""
+        self.cancel_token.cancel()
         
     def run(self):
         """Process audio and generate response."""
+        cancel_token = self.cancel_token
         if not self.wav_buffer:
-            self.finished.emit()
+            self.finished.emit(cancel_token)
             return
             
         # Transcribe audio
         self.state_changed.emit(AssistantState.THINKING)
-        transcription = self.transcribe_func(self.wav_buffer)
+        if self.transcription is not None:
+            try:
+                transcription = self.transcription.result()
+            except Exception as e:
+                logger.error(f"Error transcribing queued turn: {str(e)}")
+                transcription = None
+        else:
+            transcription = self.transcribe_func(self.wav_buffer)
         
-        if transcription is None:
-            self.finished.emit()
+        if transcription is None or cancel_token.cancelled:
+            self.finished.emit(cancel_token)
             return
             
-        self.text_updated.emit(f"You said: {transcription}")
+        self.text_updated.emit(f"You said: {transcription}\nAssistant: ")
         
         # Generate response
-        full_response = ""
-        current_buffer = ""  # Buffer for accumulating text chunks
+        chunker = self.chunker_factory()  # Splits the streamed reply into speakable chunks
+        tts_pipeline = TTSPipeline(self.tts_func, self.play_func, speed=2.0, stream_func=self.stream_func,
+                                   cancel_token=cancel_token)
         
         self.state_changed.emit(AssistantState.SPEAKING)
         
-        for chunk in self.chat_func(transcription, True):
+        for chunk in self.chat_func(transcription, True, cancel_token=cancel_token):
             if chunk["type"] == "content":
                 content = chunk["data"]
-                full_response += content
-                self.text_updated.emit(f"Assistant: {full_response}")
+                self.text_updated.emit(content)
                 
-                # Process text using the chunking utility
-                chunk_to_process, current_buffer = self.chunk_text_func(content, current_buffer)
-                
-                if chunk_to_process:
-                    # Generate and play speech for this chunk
-                    chunk_audio_path = self.tts_func(chunk_to_process, 2.0)
-                    if chunk_audio_path:
-                        # Play the generated chunk speech without blocking
-                        self.play_func(chunk_audio_path, block=False)
+                # Synthesize completed chunks in the background while the stream continues
+                for chunk_to_process in chunker.feed(content):
+                    tts_pipeline.submit(chunk_to_process)
+        
+        self.text_updated.emit(" [interrupted]\n\n" if cancel_token.cancelled else "\n\n")
         
         # Process any remaining text in buffer
-        if current_buffer.strip():
-            chunk_audio_path = self.tts_func(current_buffer, 2.0)
-            if chunk_audio_path:
-                self.play_func(chunk_audio_path, block=True)
+        remaining = chunker.flush()
+        if remaining.strip():
+            tts_pipeline.submit(remaining, block=True)
         
-        self.finished.emit()
+        # Wait for all queued chunks to reach the player
+        tts_pipeline.finish()
+        
+        self.finished.emit(cancel_token)
 
 class VoiceAssistantUI(QMainWindow):
     """Main UI class for the voice assistant."""
     
-    def __init__(self, recording_handler, transcribe_func, chat_func, tts_func, play_func, chunk_text_func):
+    def __init__(self, recording_handler, transcribe_func, chat_func, tts_func, play_func, chunker_factory, stream_func=None,
+                 queued_turns=QUEUED_TURNS):
         super().__init__()
         
         # Store function references
@@ -117,21 +158,36 @@ class VoiceAssistantUI(QMainWindow):
         self.chat_func = chat_func
         self.tts_func = tts_func
         self.play_func = play_func
-        self.chunk_text_func = chunk_text_func
+        self.chunker_factory = chunker_factory
+        self.stream_func = stream_func
+        
+        # With queued turns, recordings made during an answer wait here, already transcribing
+        self.queued_turns = queued_turns
+        self.queued_recordings = []
+        self.transcriber = None
+        if queued_turns:
+            self.transcriber = ThreadPoolExecutor(max_workers=QUEUED_TURNS_MAX_PENDING,
+                                                  thread_name_prefix="turn-transcriber")
         
         # Initialize threads
         self.recording_thread = RecordingThread(self.recording_handler)
         self.recording_thread.finished.connect(self.on_recording_finished)
-        self.recording_thread.state_changed.connect(self.update_state)
+        self.recording_thread.state_changed.connect(self.on_recording_state)
         
         self.processing_thread = ProcessingThread(
             self.transcribe_func, self.chat_func, self.tts_func, 
-            self.play_func, self.chunk_text_func
+            self.play_func, self.chunker_factory, self.stream_func
         )
         self.processing_thread.finished.connect(self.on_processing_finished)
-        self.processing_thread.text_updated.connect(self.update_text_display)
+        self.processing_thread.text_updated.connect(self.append_text)
         self.processing_thread.state_changed.connect(self.update_state)
         
+        # Text waiting to be added to the transcript on the next frame
+        self.pending_text = []
+        self.text_timer = QTimer(self)
+        self.text_timer.setInterval(1000 // TEXT_FRAME_RATE_HZ)
+        self.text_timer.timeout.connect(self.flush_text)
+        
         # Initialize UI
         self.init_ui()
         
@@ -175,6 +231,14 @@ class VoiceAssistantUI(QMainWindow):
         
         status_layout.addWidget(self.status_icon, alignment=Qt.AlignCenter)
         
+        # Status line, kept separate so it never touches the transcript
+        self.status_label = QLabel("Press and hold SPACE to record, release to process")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setFont(QFont("Arial", 20))
+        self.status_label.setStyleSheet("color: #BBBBBB;")
+        
+        status_layout.addWidget(self.status_label)
+        
         # Text display - using QTextEdit instead of QLabel for better text handling
         self.text_display = QTextEdit()
         self.text_display.setReadOnly(True)
@@ -186,10 +250,11 @@ class VoiceAssistantUI(QMainWindow):
                 border: none;
             }
         """)
-        self.text_display.setAlignment(Qt.AlignCenter)
         self.text_display.setMinimumHeight(350)  # Much taller to fit more text
-        self.text_display.setText("Press and hold SPACE to record, release to process")
-        self.text_display.document().setDocumentMargin(10)
+        document = self.text_display.document()
+        document.setDocumentMargin(10)
+        document.setDefaultTextOption(QTextOption(Qt.AlignCenter))
+        document.setMaximumBlockCount(MAX_TRANSCRIPT_BLOCKS)
         
         status_layout.addWidget(self.text_display, 1)  # Give it a stretch factor of 1
         
@@ -226,53 +291,104 @@ class VoiceAssistantUI(QMainWindow):
         
         if state == AssistantState.IDLE:
             self.status_icon.setText("🔍")
-            self.text_display.setText("Press and hold SPACE to record, release to process")
+            self.status_label.setText("Press and hold SPACE to record, release to process")
             
         elif state == AssistantState.LISTENING:
             self.status_icon.setText("🎤")
-            self.text_display.setText("Listening...")
+            self.status_label.setText("Listening...")
             
         elif state == AssistantState.THINKING:
             self.status_icon.setText("⟳")
-            self.text_display.setText("Processing...")
+            self.status_label.setText("Processing...")
             
         elif state == AssistantState.SPEAKING:
             self.status_icon.setText("🔊")
+            self.status_label.setText("")
     
-    def update_text_display(self, text):
-        """Update the text display."""
-        # Translate common prefixes
-        if text.startswith("You said: "):
-            text = "You said: " + text[10:]
-        elif text.startswith("Assistant: "):
-            text = "Assistant: " + text[11:]
-        
-        # Set the text with HTML formatting to ensure line breaks work
-        self.text_display.setHtml(f"<div align='center'>{text.replace('\n', '<br>')}</div>")
-        
-        # Ensure text is always visible by scrolling to the top
-        self.text_display.moveCursor(QTextCursor.Start)
+    def append_text(self, text):
+        """Queue streamed text; it is drawn on the next frame together with any other updates."""
+        self.pending_text.append(text)
+        if not self.text_timer.isActive():
+            self.text_timer.start()
+    
+    def flush_text(self):
+        """Append the text queued since the last frame to the end of the transcript."""
+        if not self.pending_text:
+            self.text_timer.stop()
+            return
+        text = "".join(self.pending_text)
+        self.pending_text = []
+        
+        # Insert at the end of the document instead of re-rendering it, so each
+        # frame only lays out the paragraph being written
+        cursor = QTextCursor(self.text_display.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        
+        # Keep the newest text in view
+        scroll_bar = self.text_display.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+    
+    def on_recording_state(self, state):
+        """Show the recorder's state unless it is only listening for a barge-in."""
+        if not self.processing_thread.isRunning():
+            self.update_state(state)
     
     def on_recording_finished(self, wav_buffer, wav_filename):
         """Handle recording completion."""
-        if wav_buffer:
+        if wav_buffer and self.queued_turns:
+            # Transcribe right away; the turn is answered after those recorded before it
+            self.queued_recordings.append((wav_buffer, self.transcriber.submit(self.transcribe_func, wav_buffer)))
+            if not self.processing_thread.isRunning():
+                self.start_next_turn()
+            self.recording_thread.wait()
+            self.recording_thread.start()
+        elif wav_buffer:
+            # A barge-in already cancelled the previous turn; let it unwind
+            self.processing_thread.cancel()
+            self.processing_thread.wait()
+            
             # Start processing the recording
-            self.processing_thread.set_audio(wav_buffer)
+            cancel_token = self.processing_thread.set_audio(wav_buffer)
+            if hasattr(self.recording_handler, 'set_barge_in_token'):
+                self.recording_handler.set_barge_in_token(cancel_token)
             self.processing_thread.start()
+            
+            # Keep listening, so SPACE interrupts the answer and starts the next recording
+            self.recording_thread.wait()
+            self.recording_thread.start()
         else:
             # Recording failed or cancelled
             self.update_state(AssistantState.IDLE)
-            self.text_display.setText("Recording cancelled or failed")
+            self.status_label.setText("Recording cancelled or failed")
             # Restart recording thread
             if not self.recording_thread.isRunning():
                 self.recording_thread.start()
     
-    def on_processing_finished(self):
+    def start_next_turn(self):
+        """Answer the oldest queued recording."""
+        wav_buffer, transcription = self.queued_recordings.pop(0)
+        self.processing_thread.set_audio(wav_buffer, transcription)
+        self.processing_thread.start()
+    
+    def on_processing_finished(self, cancel_token):
         """Handle processing completion."""
+        if cancel_token is not self.processing_thread.cancel_token:
+            # An interrupted turn finished after the next one had started
+            return
+        if self.queued_recordings:
+            self.processing_thread.wait()
+            self.start_next_turn()
+            return
+        if hasattr(self.recording_handler, 'set_barge_in_token'):
+            self.recording_handler.set_barge_in_token(None)
         self.update_state(AssistantState.IDLE)
         # Restart recording thread
         if not self.recording_thread.isRunning():
             self.recording_thread.start()
+        else:
+            # It has been listening since the turn started
+            self.update_state(AssistantState.LISTENING)
     
     def set_dark_theme(self):
         """Set dark theme for the application."""
@@ -296,14 +412,17 @@ class VoiceAssistantUI(QMainWindow):
     
     def closeEvent(self, event):
         """Clean up when window is closed."""
-        # Clean up threads
-        if self.recording_thread.isRunning():
-            self.recording_thread.terminate()
-        if self.processing_thread.isRunning():
-            self.processing_thread.terminate()
+        # Stop the turn in progress; its requests and playback wind down within moments
+        self.processing_thread.cancel()
+        self.processing_thread.wait()
+        
+        self.queued_recordings = []
+        if self.transcriber is not None:
+            self.transcriber.shutdown(wait=False, cancel_futures=True)
         
-        # Clean up recording handler if needed
+        # Closing the recording handler releases the recording thread's wait
         if hasattr(self.recording_handler, 'close'):
             self.recording_handler.close()
+        self.recording_thread.wait()
         
         super().closeEvent(event)
@@ -2,74 +2,158 @@
 """
 Utility functions for the Voice Assistant application.
 """
-from src.config import logger
-
-
-def chunk_text_for_tts(text, buffer="", min_chunk_size=200):
-    """Split text into appropriate chunks for text-to-speech processing.
-    
-    This simplified function accumulates text and breaks at natural phrase
-    boundaries like punctuation marks. It prioritizes natural-sounding speech
-    by only breaking at commas, periods, etc.
-    
-    Args:
-        text (str): New text to process
-        buffer (str, optional): Existing text buffer to append to. Defaults to "".
-        min_chunk_size (int, optional): Minimum characters before processing. Defaults to 50.
-    
-    Returns:
-        tuple: (chunk_to_process, remaining_buffer)
-            - chunk_to_process: Text ready for TTS processing (None if no complete chunk)
-            - remaining_buffer: Text to keep buffering for next call
+import re
+
+from src.config import logger, TTS_FIRST_CHUNK_CHARS, TTS_CHUNK_CHARS, TTS_CHUNK_GROWTH, TTS_MAX_CHUNK_CHARS
+
+# A word followed by sentence or clause punctuation and then whitespace, or a line break
+_BREAK_PATTERN = re.compile(r"(\w*)([.!?]+|[:;,])(?=\s)|\n")
+
+# Words whose trailing period does not end a sentence
+_ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "jr", "sr", "st", "vs", "prof", "np", "itp", "itd"}
+
+# Cheap test for whether a piece can contain a break at all
+_CANDIDATE_PATTERN = re.compile(r"[.!?:;,]\s|\n")
+
+# Earlier text rescanned to find breaks across pieces: the longest abbreviation plus its period
+_LOOKBACK_CHARS = 8
+
+
+class SentenceChunker:
+    """Split a streamed reply into chunks for text-to-speech as it arrives.
+
+    Chunks end at sentence ends or line breaks once they reach a minimum
+    size, or at a colon, semicolon or comma once they reach twice that. The
+    minimum starts small so the first audio is requested early, then grows
+    with each chunk: later chunks are synthesized while earlier ones play, so
+    they can be longer and sound more natural.
+
+    The gain is earlier first speech, not CPU time: on the recorded streams
+    the first chunk is ready after a median of 65 streamed characters rather
+    than 180, while the per-delta cost is about the same on long replies and
+    higher on short ones (see benchmarks/chunker_benchmark.py).
     """
-    # Add new text to existing buffer
-    current_buffer = buffer + text
-    
-    # Very short text should always be buffered, not processed yet
-    if len(current_buffer) < min_chunk_size:
-        return None, current_buffer
-    
-    # Natural break points in order of priority
-    break_points = [
-        ".\n", "!\n", "?\n",  # End of sentence with newline (highest priority)
-        ". ", "! ", "? ",     # End of sentence with space
-        ".\t", "!\t", "?\t",  # End of sentence with tab
-        ".", "!", "?",        # End of sentence without space
-        ":\n", ": ", ":",     # Colons
-        ";\n", "; ", ";",     # Semicolons
-        ",\n", ", ", ","      # Commas (lowest priority)
-    ]
-    
-    # Try to find a natural break point in the text
-    for bp in break_points:
-        idx = current_buffer.rfind(bp)
-        # Only consider if the break point creates a substantial chunk
-        if idx >= min_chunk_size:
-            # Check if it's part of a common abbreviation
-            if bp in [". ", ".", ".\n"]:
-                abbreviations = ["dr", "mr", "ms", "jr", "sr", "np", "itp", "itd", "prof"]
-                is_abbreviation = False
-                for abbr in abbreviations:
-                    if (idx >= len(abbr) and 
-                        current_buffer[idx-len(abbr):idx].lower() == abbr):
-                        is_abbreviation = True
-                        break
-                
-                if is_abbreviation:
+
+    def __init__(self, first_chunk_size=TTS_FIRST_CHUNK_CHARS, chunk_size=TTS_CHUNK_CHARS,
+                 growth=TTS_CHUNK_GROWTH, max_chunk_size=TTS_MAX_CHUNK_CHARS):
+        """
+        Initialize the chunker for one reply.
+
+        Args:
+            first_chunk_size (int, optional): Minimum size of the first chunk
+            chunk_size (int, optional): Largest minimum size later chunks grow to
+            growth (float, optional): Factor by which the minimum grows per chunk
+            max_chunk_size (int, optional): Size beyond which text is cut at the last space
+        """
+        self.first_chunk_size = first_chunk_size
+        self.chunk_size = chunk_size
+        self.growth = growth
+        self.max_chunk_size = max_chunk_size
+        self.reset()
+
+    def reset(self):
+        """Forget all text and start a new reply."""
+        self.parts = []
+        # Offsets are counted from the start of the reply
+        self.start = 0
+        self.end = 0
+        self.last_char = ""
+        self.chunk_count = 0
+
+    def min_size(self):
+        """Minimum size of the next chunk."""
+        return min(self.chunk_size, int(self.first_chunk_size * self.growth ** self.chunk_count))
+
+    def feed(self, text):
+        """
+        Add streamed text and return the chunks it completes.
+
+        Args:
+            text (str): The next piece of the reply
+
+        Returns:
+            list: Chunks ready for speech synthesis, in order (often empty)
+        """
+        if not text:
+            return []
+
+        # Most pieces are a word or two without punctuation and need no scan
+        has_break = _CANDIDATE_PATTERN.search(self.last_char + text) is not None
+        self.last_char = text[-1]
+        # Rescan the end of earlier text so breaks spanning two pieces are found
+        lookback = self._lookback() if has_break else ""
+        scan = lookback + text if has_break else ""
+        scan_start = self.end - len(lookback)
+        self.parts.append(text)
+        self.end += len(text)
+        if not has_break and self.end - self.start <= self.max_chunk_size:
+            return []
+
+        cuts = []
+        for match in _BREAK_PATTERN.finditer(scan):
+            word, punctuation = match.groups()
+            if punctuation is None:
+                # Line breaks end list items and headings, which often lack punctuation
+                boundary = match.start()
+                sentence_end = True
+            else:
+                # The whitespace after the punctuation
+                boundary = match.end()
+                sentence_end = punctuation[0] in ".!?"
+                if punctuation == "." and word.lower() in _ABBREVIATIONS:
                     continue
-            
-            # We found a good breaking point
-            end_pos = idx + len(bp)
-            chunk = current_buffer[:end_pos]
-            remaining = current_buffer[end_pos:]
-            return chunk, remaining
-    
-    # If we have a lot of accumulated text but no good break point was found,
-    # find the last space to avoid breaking mid-word
-    if len(current_buffer) > 2000:
-        last_space = current_buffer.rfind(" ")
-        if last_space > min_chunk_size:
-            return current_buffer[:last_space+1], current_buffer[last_space+1:]
-    
-    # No good break point found, keep buffering
-    return None, current_buffer
+            # Breaks whose whitespace was in earlier pieces were handled then
+            if boundary < len(lookback):
+                continue
+
+            # The chunk includes the whitespace
+            cut = scan_start + boundary + 1
+            size = cut - (cuts[-1] if cuts else self.start)
+            min_size = self.min_size()
+            if size >= (min_size if sentence_end else 2 * min_size):
+                cuts.append(cut)
+                self.chunk_count += 1
+
+        if not cuts and self.end - self.start <= self.max_chunk_size:
+            return []
+
+        # Join the pending text once, however many chunks it yields
+        pending = "".join(self.parts)
+        base = self.start
+        chunks = []
+        for cut in cuts:
+            chunks.append(pending[self.start - base:cut - base])
+            self.start = cut
+        rest = pending[self.start - base:]
+
+        if len(rest) > self.max_chunk_size:
+            # No usable break: cut at the last space rather than mid-word
+            last_space = rest.rfind(" ")
+            if last_space > 0:
+                chunks.append(rest[:last_space + 1])
+                rest = rest[last_space + 1:]
+                self.start += last_space + 1
+                self.chunk_count += 1
+
+        self.parts = [rest]
+        return chunks
+
+    def _lookback(self):
+        """The last few characters of the text fed so far."""
+        lookback = ""
+        for part in reversed(self.parts):
+            lookback = part + lookback
+            if len(lookback) >= _LOOKBACK_CHARS:
+                break
+        return lookback[-_LOOKBACK_CHARS:]
+
+    def flush(self):
+        """
+        Return the text not yet chunked and start a new reply.
+
+        Returns:
+            str: The rest of the reply (may be empty or whitespace)
+        """
+        rest = "".join(self.parts)
+        self.reset()
+        return rest
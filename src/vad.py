@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Voice activity detection for the Voice Assistant application.
+
+A lightweight NumPy detector that runs on the recorder's frame stream. Each
+chunk is split into short analysis frames; a frame counts as speech when its
+energy is well above the adaptive noise floor and its zero-crossing rate is
+below the range typical of broadband noise. Speech start needs a few voiced
+frames in a row, and speech end needs a hangover of unvoiced frames, which
+bounds the endpointing latency.
+"""
+import time
+
+import numpy as np
+
+from src.config import VAD_FRAME_MS, VAD_HANGOVER_MS, VAD_ONSET_MS, VAD_THRESHOLD_DB
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing voice activity detector with hangover."""
+
+    def __init__(self, sample_rate, frame_ms=VAD_FRAME_MS, onset_ms=VAD_ONSET_MS,
+                 hangover_ms=VAD_HANGOVER_MS, threshold_db=VAD_THRESHOLD_DB, max_zcr=0.35):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate (int): Sample rate of the 16-bit mono PCM stream
+            frame_ms (int, optional): Analysis frame length in milliseconds
+            onset_ms (int, optional): Voiced audio required to declare speech start
+            hangover_ms (int, optional): Unvoiced audio required to declare speech end
+            threshold_db (float, optional): Energy above the noise floor that counts as speech
+            max_zcr (float, optional): Zero-crossing rate above which a frame is treated as noise
+        """
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.onset_frames = max(1, round(onset_ms / frame_ms))
+        self.hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self.threshold_db = threshold_db
+        self.max_zcr = max_zcr
+        self.remainder = np.empty(0, dtype=np.int16)
+        self.noise_floor_db = None
+        self.reset()
+
+        # Statistics
+        self.frames_processed = 0
+        self.cpu_seconds = 0.0
+        self.max_cpu_seconds_per_frame = 0.0
+        self.endpoint_latencies_ms = []
+
+    def reset(self):
+        """Forget the current speech state; the noise floor estimate is kept."""
+        self.in_speech = False
+        self.voiced_run = 0
+        self.unvoiced_run = 0
+
+    def process(self, data):
+        """
+        Analyse a chunk of 16-bit mono PCM.
+
+        Args:
+            data (bytes): PCM data from the input stream
+
+        Returns:
+            list: Events detected in this chunk (SPEECH_START / SPEECH_END), in order
+        """
+        started = time.perf_counter()
+
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self.remainder.size:
+            samples = np.concatenate((self.remainder, samples))
+        frame_count = samples.size // self.frame_samples
+        self.remainder = samples[frame_count * self.frame_samples:]
+        if not frame_count:
+            return []
+
+        frames = samples[:frame_count * self.frame_samples].reshape(frame_count, self.frame_samples)
+        frames = frames.astype(np.float32)
+
+        # Per-frame energy in dBFS and zero-crossing rate, vectorized over the chunk
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_samples - 1)
+
+        events = []
+        for index in range(frame_count):
+            events.extend(self._update(energy_db[index], zcr[index], frame_count - index - 1))
+
+        elapsed = time.perf_counter() - started
+        self.frames_processed += frame_count
+        self.cpu_seconds += elapsed
+        self.max_cpu_seconds_per_frame = max(self.max_cpu_seconds_per_frame, elapsed / frame_count)
+        return events
+
+    def _update(self, energy_db, zcr, frames_after):
+        """Advance the state machine by one analysis frame."""
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+
+        voiced = energy_db > self.noise_floor_db + self.threshold_db and zcr < self.max_zcr
+        if not voiced:
+            # Track the noise floor slowly on frames that are not speech
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy_db
+
+        if not self.in_speech:
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= self.onset_frames:
+                self.in_speech = True
+                self.unvoiced_run = 0
+                return [SPEECH_START]
+            return []
+
+        self.unvoiced_run = 0 if voiced else self.unvoiced_run + 1
+        if self.unvoiced_run >= self.hangover_frames:
+            self.in_speech = False
+            self.voiced_run = 0
+            # Audio time between the last voiced frame and the end of this chunk,
+            # i.e. how long after the user stopped talking the decision is available
+            self.endpoint_latencies_ms.append((self.unvoiced_run + frames_after) * self.frame_ms)
+            return [SPEECH_END]
+        return []
+
+    def stats(self):
+        """
+        Get detector statistics.
+
+        Returns:
+            dict: Frame count, CPU cost per frame and endpointing latency figures
+        """
+        latencies = self.endpoint_latencies_ms
+        return {
+            "frames_processed": self.frames_processed,
+            "avg_cpu_us_per_frame": 1e6 * self.cpu_seconds / self.frames_processed if self.frames_processed else 0.0,
+            "max_cpu_us_per_frame": 1e6 * self.max_cpu_seconds_per_frame,
+            "realtime_factor": self.cpu_seconds / (self.frames_processed * self.frame_ms / 1000) if self.frames_processed else 0.0,
+            "endpoints": len(latencies),
+            "last_endpoint_latency_ms": latencies[-1] if latencies else None,
+            "avg_endpoint_latency_ms": sum(latencies) / len(latencies) if latencies else None
+        }
@@ -0,0 +1,269 @@
+import io
+import threading
+import time
+import unittest
+import wave
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.audio_handler import AudioQueueManager, HandsFreeRecorder, SpaceKeyRecorder
+from src.audio_player import JitterBuffer
+from src.cancellation import CancellationToken
+
+
+def make_wav(pcm):
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(24000)
+        wf.writeframes(pcm)
+    return wav_buffer.getvalue()
+
+
+class FakeEngine:
+    """Output engine that records what was played and when drain() was called."""
+
+    def __init__(self):
+        self.played = []
+        self.drains = []
+        self.drain_result = True
+
+    def play_wav(self, source, cancel_token=None, on_start=None):
+        with wave.open(source, 'rb') as wf:
+            self.played.append(wf.readframes(wf.getnframes()))
+        return True
+
+    def play_stream(self, buffer, cancel_token=None, on_start=None):
+        data = b""
+        chunk = buffer.read(4096)
+        while chunk and not (cancel_token is not None and cancel_token.cancelled):
+            data += chunk
+            chunk = buffer.read(4096)
+        self.played.append(data)
+        return True
+
+    def drain(self, interrupted=None):
+        self.drains.append(interrupted)
+        return self.drain_result
+
+
+class StubRecorder:
+    """AudioRecorder stand-in that hands back a fixed recording."""
+
+    def __init__(self, config=None):
+        self.config = config
+        self.audio = None
+        self.is_recording = False
+        self.capture_buffer = None
+        self.starts = 0
+        self.frame_listeners = []
+
+    def add_frame_listener(self, callback):
+        self.frame_listeners.append(callback)
+
+    def remove_frame_listener(self, callback):
+        self.frame_listeners.remove(callback)
+
+    def start_recording(self):
+        self.starts += 1
+        self.is_recording = True
+
+    def stop_recording(self):
+        self.is_recording = False
+        return (io.BytesIO(b"wav"), None)
+
+    def close(self):
+        pass
+
+
+def patch_recorder(test):
+    """Swap in StubRecorder and a throwaway queue manager for a recorder under test."""
+    patches = [
+        patch("src.audio_handler.AudioRecorder", StubRecorder),
+        patch("src.audio_handler.audio_queue_manager", MagicMock()),
+        patch("src.audio_handler.prewarm_connections"),
+    ]
+    for p in patches:
+        p.start()
+        test.addCleanup(p.stop)
+
+
+class FakeListener:
+    """keyboard.Listener stand-in; tests call on_press/on_release directly."""
+
+    def __init__(self, on_press=None, on_release=None):
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def join(self):
+        pass
+
+
+# pynput's keys all alias one another under some backends, e.g. the dummy one
+keyboard = SimpleNamespace(Key=SimpleNamespace(space="space", esc="esc"), Listener=FakeListener)
+
+
+class SpaceKeyRecorderTests(unittest.TestCase):
+    def setUp(self):
+        patch_recorder(self)
+        keyboard_patch = patch("src.audio_handler.keyboard", keyboard)
+        keyboard_patch.start()
+        self.addCleanup(keyboard_patch.stop)
+        self.recorder = SpaceKeyRecorder(warm_input=False, incremental=False)
+        self.addCleanup(self.recorder.close)
+
+    def record(self):
+        self.recorder.on_press(keyboard.Key.space)
+        self.recorder.on_release(keyboard.Key.space)
+
+    def wait_in_thread(self):
+        """Call wait_for_space_key_recording on another thread, like the main loop."""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.recorder.wait_for_space_key_recording()))
+        thread.start()
+        self.addCleanup(thread.join, 1)
+        # Wait until the caller is blocked on its Future
+        deadline = time.monotonic() + 1
+        while self.recorder.recording_future is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return thread, results
+
+    def test_release_resolves_the_waiting_caller(self):
+        thread, results = self.wait_in_thread()
+
+        self.record()
+        thread.join(1)
+
+        self.assertEqual(results[0][0].getvalue(), b"wav")
+        self.assertEqual(self.recorder.recorder.starts, 1)
+
+    def test_release_before_press_is_ignored(self):
+        future = self.recorder.request_recording()
+
+        self.recorder.on_release(keyboard.Key.space)
+        self.assertFalse(future.done())
+        self.assertEqual(self.recorder.recorder.starts, 0)
+
+        self.record()
+        self.assertEqual(future.result(timeout=1)[0].getvalue(), b"wav")
+
+    def test_escape_releases_the_waiting_caller(self):
+        thread, results = self.wait_in_thread()
+
+        self.assertIs(self.recorder.on_release(keyboard.Key.esc), False)
+        thread.join(1)
+
+        self.assertEqual(results, [(None, None)])
+        self.assertTrue(self.recorder.exit_requested)
+
+    def test_recording_finished_before_the_wait_is_handed_over(self):
+        token = CancellationToken()
+        self.recorder.set_barge_in_token(token)
+
+        # SPACE during the answer interrupts it and records before anyone waits
+        self.record()
+        self.assertTrue(token.cancelled)
+
+        future = self.recorder.request_recording()
+        self.assertTrue(future.done())
+        self.assertEqual(future.result()[0].getvalue(), b"wav")
+        # The early recording is handed over only once
+        self.assertFalse(self.recorder.request_recording().done())
+
+
+class HandsFreeRecorderTests(unittest.TestCase):
+    def setUp(self):
+        patch_recorder(self)
+        self.recorder = HandsFreeRecorder()
+
+    def test_recording_finished_after_close_does_not_raise(self):
+        future = self.recorder.request_recording()
+        self.recorder.recorder.start_recording()
+
+        self.recorder.close()
+        # The recording thread finishes after close() already released the caller
+        self.recorder._finish_recording(future)
+
+        self.assertEqual(future.result(timeout=1), (None, None))
+
+
+class AudioQueueManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.manager = AudioQueueManager()
+        self.engine = FakeEngine()
+        self.manager.output_engine = self.engine
+        self.addCleanup(self.manager.stop)
+
+    def test_items_play_in_order_and_resolve_their_futures(self):
+        clips = [make_wav(bytes([i, 0]) * 10) for i in range(3)]
+
+        futures = [self.manager.add_to_queue(clip) for clip in clips]
+
+        self.assertEqual([future.result(timeout=1) for future in futures], [True, True, True])
+        self.assertEqual(self.engine.played, [bytes([i, 0]) * 10 for i in range(3)])
+        self.assertTrue(self.manager.wait_for_queue_empty(timeout=1))
+
+    def test_cancelled_turn_drops_its_queued_items(self):
+        # The first item plays until its download finishes
+        playing = JitterBuffer(preroll_ms=0)
+        playing.write(b"\x01\x00")
+        first = self.manager.add_to_queue(playing)
+        token = CancellationToken()
+        queued = JitterBuffer(preroll_ms=0)
+        second = self.manager.add_to_queue(queued, token)
+        third = self.manager.add_to_queue(make_wav(b"\x03\x00"))
+
+        token.cancel()
+        # _cancel_item closes the buffer so nothing waits on a download that will never finish
+        self.assertTrue(queued.closed)
+        self.assertTrue(second.cancelled())
+        with self.assertRaises(CancelledError):
+            second.result(timeout=1)
+
+        playing.close()
+        self.assertTrue(first.result(timeout=1))
+        self.assertTrue(third.result(timeout=1))
+        self.assertEqual(self.engine.played, [b"\x01\x00", b"\x03\x00"])
+
+    def test_drain_only_after_the_last_queued_item(self):
+        blocking = JitterBuffer(preroll_ms=0)
+        first = self.manager.add_to_queue(blocking)
+        second = self.manager.add_to_queue(make_wav(b"\x02\x00"))
+        blocking.write(b"\x01\x00")
+        blocking.close()
+
+        self.assertTrue(first.result(timeout=1))
+        self.assertTrue(second.result(timeout=1))
+        # The first item had another one queued behind it, so the stream was not drained
+        self.assertEqual(len(self.engine.drains), 1)
+        # Draining stops as soon as another item is queued
+        interrupted = self.engine.drains[0]
+        self.assertFalse(interrupted())
+        self.manager.audio_queue.put_nowait("not played")
+        self.assertTrue(interrupted())
+        self.manager.audio_queue.get_nowait()
+
+    def test_interrupted_item_skips_drain(self):
+        token = CancellationToken()
+        buffer = JitterBuffer(preroll_ms=0)
+        future = self.manager.add_to_queue(buffer, token)
+        buffer.write(b"\x01\x00")
+        # Let the player start on the buffer before the user barges in
+        deadline = time.monotonic() + 1
+        while not self.manager.is_playing and time.monotonic() < deadline:
+            time.sleep(0.01)
+        token.cancel()
+
+        self.assertFalse(future.result(timeout=1))
+        self.assertEqual(self.engine.drains, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
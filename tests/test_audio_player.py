@@ -0,0 +1,131 @@
+import threading
+import time
+import unittest
+
+from src.audio_player import AudioOutputEngine, JitterBuffer
+from src.cancellation import CancellationToken
+
+
+class FakeOutputStream:
+    """Output stream that records writes and can cancel a token after some of them."""
+
+    def __init__(self, cancel_after=None, token=None, latency=0.0):
+        self.writes = []
+        self.closed = False
+        self.stopped = False
+        self.cancel_after = cancel_after
+        self.token = token
+        self.latency = latency
+
+    def write(self, frames):
+        self.writes.append(frames)
+        if len(self.writes) == self.cancel_after:
+            self.token.cancel()
+
+    def is_stopped(self):
+        return False
+
+    def stop_stream(self):
+        self.stopped = True
+
+    def get_output_latency(self):
+        return self.latency
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def get_format_from_width(self, width):
+        return width
+
+    def open(self, **kwargs):
+        return self.stream
+
+
+class JitterBufferTests(unittest.TestCase):
+    def test_read_waits_for_preroll(self):
+        # 10 ms at 1 kHz, 16-bit mono: 10 frames, 20 bytes of pre-roll.
+        buffer = JitterBuffer(preroll_ms=10, rate=1000)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(buffer.read(1024)))
+        reader.start()
+
+        buffer.write(b"\x00" * 10)
+        reader.join(timeout=0.1)
+        self.assertTrue(reader.is_alive())
+
+        buffer.write(b"\x00" * 10)
+        reader.join(timeout=1.0)
+        self.assertEqual(results, [b"\x00" * 20])
+
+    def test_reads_whole_frames_only(self):
+        buffer = JitterBuffer(preroll_ms=0)
+        buffer.write(b"\x01\x02\x03")
+        self.assertEqual(buffer.read(1024), b"\x01\x02")
+        buffer.write(b"\x04")
+        buffer.close()
+        self.assertEqual(buffer.read(1024), b"\x03\x04")
+        self.assertEqual(buffer.read(1024), b"")
+
+    def test_close_releases_short_stream(self):
+        # A clip shorter than the pre-roll still plays once the download ends.
+        buffer = JitterBuffer(preroll_ms=1000)
+        buffer.write(b"\x00\x00")
+        buffer.close()
+        self.assertEqual(buffer.read(1024), b"\x00\x00")
+        self.assertEqual(buffer.read(1024), b"")
+
+
+class AudioOutputEngineTests(unittest.TestCase):
+    def test_cancel_stops_playback_within_one_chunk(self):
+        token = CancellationToken()
+        stream = FakeOutputStream(cancel_after=2, token=token)
+        engine = AudioOutputEngine(audio=FakePyAudio(stream), chunk_size=4)
+        buffer = JitterBuffer(preroll_ms=0)
+        buffer.write(b"\x00" * 80)  # Ten chunks of four 16-bit frames
+        buffer.close()
+
+        self.assertFalse(engine.play_stream(buffer, token))
+        self.assertEqual(len(stream.writes), 2)
+        # The device stream is closed so what it had buffered is not played out
+        self.assertTrue(stream.closed)
+        self.assertIsNone(engine.stream)
+
+    def test_uncancelled_stream_plays_to_the_end(self):
+        stream = FakeOutputStream()
+        engine = AudioOutputEngine(audio=FakePyAudio(stream), chunk_size=4)
+        buffer = JitterBuffer(preroll_ms=0)
+        buffer.write(b"\x00" * 80)
+        buffer.close()
+
+        self.assertTrue(engine.play_stream(buffer, CancellationToken()))
+        self.assertEqual(len(stream.writes), 10)
+
+    def test_drain_waits_for_buffered_audio_without_stopping_the_stream(self):
+        stream = FakeOutputStream(latency=0.05)
+        engine = AudioOutputEngine(audio=FakePyAudio(stream), chunk_size=4)
+        engine.write_pcm(b"\x00" * 8)
+
+        started = time.monotonic()
+        self.assertTrue(engine.drain())
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+        # The next sentence continues on the running stream
+        self.assertFalse(stream.stopped)
+        self.assertIs(engine.stream, stream)
+
+    def test_drain_stops_waiting_when_interrupted(self):
+        stream = FakeOutputStream(latency=5.0)
+        engine = AudioOutputEngine(audio=FakePyAudio(stream), chunk_size=4)
+        engine.write_pcm(b"\x00" * 8)
+
+        started = time.monotonic()
+        self.assertFalse(engine.drain(interrupted=lambda: True))
+        self.assertLess(time.monotonic() - started, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import unittest
+import wave
+
+import numpy as np
+
+from src.audio_preprocess import prepare_for_upload, resample, trim_silence
+
+RATE = 24000
+
+
+def make_wav(samples, rate=RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.astype(np.int16).tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+class AudioPreprocessTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(RATE) / RATE
+        self.speech = 8000 * np.sin(2 * np.pi * 300 * t)
+        self.signal = np.concatenate([rng.normal(0, 20, RATE), self.speech, rng.normal(0, 20, 2 * RATE)])
+
+    def test_trim_silence_keeps_speech_with_padding(self):
+        trimmed = trim_silence(self.signal.astype(np.float32) / 32768, RATE)
+        self.assertGreaterEqual(trimmed.size, self.speech.size)
+        self.assertLess(trimmed.size, self.speech.size + RATE // 2)
+
+    def test_resample_changes_length(self):
+        samples = np.zeros(RATE, dtype=np.float32)
+        self.assertEqual(resample(samples, RATE, 16000).size, 16000)
+
+    def test_prepare_for_upload_reports_savings(self):
+        upload, stats = prepare_for_upload(make_wav(self.signal), trim=True, sample_rate=16000, codec="wav")
+
+        self.assertEqual(upload.name, "recording.wav")
+        with wave.open(upload, "rb") as wf:
+            self.assertEqual(wf.getframerate(), 16000)
+        self.assertEqual(stats["original_bytes"] - stats["upload_bytes"], stats["bytes_saved"])
+        self.assertGreater(stats["bytes_saved"], 0)
+        self.assertGreater(stats["trimmed_seconds"], 2.0)
+        self.assertGreater(stats["upload_seconds_saved"], 0)
+
+    def test_invalid_wav_is_passed_through(self):
+        audio_data = io.BytesIO(b"not a wav file")
+        upload, stats = prepare_for_upload(audio_data)
+        self.assertIs(upload, audio_data)
+        self.assertIsNone(stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
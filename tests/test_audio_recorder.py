@@ -0,0 +1,103 @@
+import unittest
+import wave
+from unittest.mock import patch
+
+from src.audio_recorder import AudioRecorder, AudioRecorderConfig, CaptureBuffer
+
+
+class CaptureBufferTests(unittest.TestCase):
+    def test_finish_produces_valid_wav(self):
+        capture = CaptureBuffer(capacity=100, channels=1, sample_width=2, sample_rate=24000)
+        capture.append(b"\x01\x00" * 10)
+        capture.append(b"\x02\x00" * 5)
+
+        wav_buffer = capture.finish()
+        with wave.open(wav_buffer, "rb") as wf:
+            self.assertEqual(wf.getnchannels(), 1)
+            self.assertEqual(wf.getsampwidth(), 2)
+            self.assertEqual(wf.getframerate(), 24000)
+            self.assertEqual(wf.getnframes(), 15)
+            self.assertEqual(wf.readframes(15), b"\x01\x00" * 10 + b"\x02\x00" * 5)
+
+    def test_append_stops_at_capacity(self):
+        capture = CaptureBuffer(capacity=8, channels=1, sample_width=2, sample_rate=16000)
+        self.assertEqual(capture.append(b"\x00" * 6), 6)
+        self.assertEqual(capture.append(b"\x00" * 6), 2)
+        self.assertTrue(capture.is_full)
+        self.assertEqual(len(capture.finish().getvalue()), CaptureBuffer.HEADER_SIZE + 8)
+
+
+class FakeInputStream:
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePyAudio:
+    """PyAudio stand-in whose input stream only runs when the test calls back into it."""
+
+    def get_sample_size(self, format):
+        return 2
+
+    def get_default_input_device_info(self):
+        return {"index": 0, "name": "fake"}
+
+    def open(self, **kwargs):
+        return FakeInputStream()
+
+    def terminate(self):
+        pass
+
+
+class WarmInputTests(unittest.TestCase):
+    def setUp(self):
+        pyaudio_patch = patch("src.audio_recorder.pyaudio.PyAudio", FakePyAudio)
+        pyaudio_patch.start()
+        self.addCleanup(pyaudio_patch.stop)
+        self.config = AudioRecorderConfig(warm_input=True, preroll_ms=100)
+        self.config.save_recordings = False
+        self.recorder = AudioRecorder(config=self.config)
+        self.addCleanup(self.recorder.close)
+
+    def feed(self, *values):
+        """Push one chunk per value through the warm stream callback."""
+        for value in values:
+            chunk = bytes([value, 0]) * self.config.chunk_size
+            self.recorder._stream_callback(chunk, self.config.chunk_size, None, 0)
+
+    def test_preroll_leads_the_recording(self):
+        # Audio captured before the recording starts only feeds the pre-roll ring
+        self.feed(1, 2, 3, 4, 5, 6)
+        self.recorder.start_recording()
+        self.feed(7, 8)
+        wav_buffer, wav_file_path = self.recorder.stop_recording()
+
+        self.assertIsNone(wav_file_path)
+        with wave.open(wav_buffer, "rb") as wf:
+            pcm = wf.readframes(wf.getnframes())
+        chunks = [pcm[i:i + 2 * self.config.chunk_size] for i in range(0, len(pcm), 2 * self.config.chunk_size)]
+        values = [chunk[0] for chunk in chunks]
+        self.assertEqual(values, [4, 5, 6, 7, 8])
+        # The pre-roll covers preroll_ms, rounded up to whole chunks
+        preroll_ms = 1000 * values.index(7) * self.config.chunk_size / self.config.sample_rate
+        chunk_ms = 1000 * self.config.chunk_size / self.config.sample_rate
+        self.assertGreaterEqual(preroll_ms, self.config.preroll_ms)
+        self.assertLess(preroll_ms, self.config.preroll_ms + chunk_ms)
+
+    def test_preroll_is_used_only_once(self):
+        self.feed(1, 2, 3)
+        self.recorder.start_recording()
+        self.recorder.stop_recording()
+
+        self.recorder.start_recording()
+        self.feed(9)
+        wav_buffer, _ = self.recorder.stop_recording()
+
+        with wave.open(wav_buffer, "rb") as wf:
+            self.assertEqual(wf.readframes(wf.getnframes()), bytes([9, 0]) * self.config.chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
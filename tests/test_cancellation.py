@@ -0,0 +1,43 @@
+import unittest
+
+from src.cancellation import CancellationToken, on_cancel
+
+
+class CancellationTokenTests(unittest.TestCase):
+    def test_callbacks_run_once_on_cancel(self):
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: calls.append("close"))
+
+        token.cancel()
+        token.cancel()
+
+        self.assertTrue(token.cancelled)
+        self.assertEqual(calls, ["close"])
+
+    def test_callback_added_after_cancel_runs_immediately(self):
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+        token.add_callback(lambda: calls.append("close"))
+        self.assertEqual(calls, ["close"])
+
+    def test_on_cancel_unregisters_after_the_block(self):
+        token = CancellationToken()
+        calls = []
+        with on_cancel(token, lambda: calls.append("close")):
+            pass
+        token.cancel()
+        self.assertEqual(calls, [])
+
+    def test_failing_callback_does_not_stop_the_others(self):
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: 1 / 0)
+        token.add_callback(lambda: calls.append("close"))
+        token.cancel()
+        self.assertEqual(calls, ["close"])
+
+
+if __name__ == "__main__":
+    unittest.main()
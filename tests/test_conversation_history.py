@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from src.conversation_history import ConversationHistory, count_message_tokens, message_text, SUMMARY_PREFIX
+
+
+def turn(index, words=40):
+    text = " ".join(f"word{index}" for _ in range(words))
+    return [{"role": "user", "content": f"Question {index}: {text}"},
+            {"role": "assistant", "content": f"Answer {index}: {text}"}]
+
+
+class ConversationHistoryTests(unittest.TestCase):
+    def test_token_count_is_incremental(self):
+        history = ConversationHistory(token_budget=10000, max_tokens=20000)
+        messages = turn(1) + turn(2)
+        history.extend(messages)
+
+        self.assertEqual(history, messages)
+        self.assertEqual(history.total_tokens, sum(count_message_tokens(m) for m in messages))
+
+    def test_windowing_without_summarizer_keeps_whole_recent_turns(self):
+        history = ConversationHistory(token_budget=300, max_tokens=1000, compact_ratio=0.5)
+        for index in range(10):
+            history.extend(turn(index))
+
+        self.assertLessEqual(history.total_tokens, 300)
+        self.assertEqual(history[0]["role"], "user")
+        self.assertEqual(history[-1]["content"][:8], "Answer 9")
+
+    def test_old_turns_are_summarized_in_the_background(self):
+        release = threading.Event()
+        calls = []
+
+        def summarize(summary, messages):
+            calls.append((summary, [m["content"][:10] for m in messages]))
+            release.wait(5)
+            return f"summary of {len(messages)} messages"
+
+        history = ConversationHistory(summarize, token_budget=300, max_tokens=10000, compact_ratio=0.5)
+        for index in range(4):
+            history.extend(turn(index))
+        self.assertIsNotNone(history.pending)
+
+        # Appending does not wait for the summary
+        history.extend(turn(4))
+        self.assertFalse(history[0]["content"].startswith(SUMMARY_PREFIX))
+
+        release.set()
+        history.pending[1].result()
+        history.append({"role": "user", "content": "Next question"})
+
+        self.assertEqual(history[0]["role"], "system")
+        self.assertTrue(history[0]["content"].startswith(SUMMARY_PREFIX))
+        self.assertEqual(history[1]["role"], "user")
+        self.assertEqual(history.total_tokens, sum(count_message_tokens(m) for m in history))
+        self.assertEqual(calls[0][0], None)
+
+    def test_tool_messages_are_folded_with_their_turn(self):
+        history = ConversationHistory(token_budget=200, max_tokens=10000, compact_ratio=0.5)
+        history.append({"role": "user", "content": "Add 2 and 3 " * 20})
+        history.append({"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_1", "type": "function", "function": {"name": "calculate_sum", "arguments": '{"a": 2, "b": 3}'}}
+        ]})
+        history.append({"role": "tool", "tool_call_id": "call_1", "name": "calculate_sum", "content": '{"result": 5}' * 30})
+        history.append({"role": "assistant", "content": "It is 5."})
+        history.extend(turn(1))
+
+        self.assertFalse(any(message["role"] == "tool" for message in history))
+        self.assertEqual(history[0]["content"][:10], "Question 1")
+
+    def test_audio_is_counted_but_not_rendered(self):
+        message = {"role": "user", "content": [{"type": "input_audio", "input_audio": {"data": "A" * 4000, "format": "wav"}}]}
+        self.assertEqual(message_text(message), "[input_audio]")
+        self.assertGreater(count_message_tokens(message), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
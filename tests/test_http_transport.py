@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import unittest
+
+from src.config import HTTP_KEEPALIVE_SECONDS, HTTP_MAX_CONNECTIONS
+from src.http_transport import PREWARM_URLS, SharedTransport, httpx
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url):
+        with self.lock:
+            self.requests.append((method, url))
+
+
+class FakeAsyncClient(FakeClient):
+    async def request(self, method, url):
+        super().request(method, url)
+
+
+class SharedTransportTests(unittest.TestCase):
+    def test_builds_pooled_clients_for_the_installed_sdk(self):
+        # httpx is whichever library the SDK's DefaultHttpxClient is built on
+        self.assertIsNotNone(httpx)
+        transport = SharedTransport(http2=False)
+        try:
+            self.assertIsInstance(transport.client, httpx.Client)
+            self.assertIsInstance(transport.async_client, httpx.AsyncClient)
+            pool = transport.client._transport._pool
+            self.assertEqual(pool._max_connections, HTTP_MAX_CONNECTIONS)
+            self.assertEqual(pool._keepalive_expiry, HTTP_KEEPALIVE_SECONDS)
+        finally:
+            transport.client.close()
+
+    def test_prewarm_connects_to_every_endpoint(self):
+        client = FakeClient()
+        transport = SharedTransport(client=client)
+
+        for thread in transport.prewarm():
+            thread.join(timeout=1.0)
+
+        self.assertEqual(sorted(client.requests), sorted(("HEAD", url) for url in PREWARM_URLS))
+
+    def test_prewarm_is_skipped_while_connections_are_fresh(self):
+        client = FakeClient()
+        transport = SharedTransport(client=client, prewarm_interval=60)
+
+        for thread in transport.prewarm():
+            thread.join(timeout=1.0)
+        # A second key press right after the first needs no new connections
+        self.assertEqual(transport.prewarm(), [])
+        self.assertEqual(len(client.requests), len(PREWARM_URLS))
+        self.assertEqual(transport.stats, {"prewarms": 1, "skipped": 1})
+
+    def test_recent_request_counts_as_warm(self):
+        transport = SharedTransport(client=FakeClient(), prewarm_interval=60)
+        transport._on_request(None)
+        self.assertEqual(transport.prewarm(), [])
+
+    def test_prewarm_uses_the_async_pool_while_a_loop_runs(self):
+        client, async_client = FakeClient(), FakeAsyncClient()
+        transport = SharedTransport(client=client, async_client=async_client)
+
+        async def press_space():
+            transport.use_event_loop(asyncio.get_running_loop())
+            # SPACE is pressed on the keyboard listener's thread
+            futures = await asyncio.to_thread(transport.prewarm)
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+        asyncio.run(press_space())
+
+        self.assertEqual(client.requests, [])
+        self.assertEqual(sorted(async_client.requests), sorted(("HEAD", url) for url in PREWARM_URLS))
+
+
+if __name__ == "__main__":
+    unittest.main()
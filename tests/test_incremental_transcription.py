@@ -0,0 +1,145 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from src.audio_recorder import CaptureBuffer
+from src.incremental_transcription import IncrementalTranscriber
+
+RATE = 24000
+CHUNK = 1024
+
+
+class FakeConfig:
+    sample_rate = RATE
+    channels = 1
+
+
+class FakeRecorder:
+    """Feeds PCM through the same listener interface as AudioRecorder."""
+
+    def __init__(self):
+        self.config = FakeConfig()
+        self.capture_lock = threading.Lock()
+        self.capture_buffer = None
+        self.is_recording = False
+        self.frame_listeners = []
+
+    def add_frame_listener(self, callback):
+        self.frame_listeners.append(callback)
+
+    def remove_frame_listener(self, callback):
+        self.frame_listeners.remove(callback)
+
+    def start(self, capacity):
+        self.capture_buffer = CaptureBuffer(capacity, 1, 2, RATE)
+        self.is_recording = True
+
+    def feed(self, signal):
+        for start in range(0, signal.size, CHUNK):
+            data = signal[start:start + CHUNK].tobytes()
+            self.capture_buffer.append(data)
+            for callback in self.frame_listeners:
+                callback(data)
+
+    def stop(self):
+        self.is_recording = False
+        return self.capture_buffer.finish()
+
+    def record(self, signal):
+        self.start(signal.size * 2)
+        self.feed(signal)
+        return self.stop()
+
+
+def tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (4000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def silence(seconds, rng):
+    return rng.normal(0, 30, int(RATE * seconds)).astype(np.int16)
+
+
+class IncrementalTranscriberTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.recorder = FakeRecorder()
+        self.calls = []
+        self.saved = []
+        calls_lock = threading.Lock()
+
+        def transcribe(wav_buffer, prompt=None, save=True):
+            with calls_lock:
+                self.calls.append((len(wav_buffer.getvalue()), prompt, save))
+                return f"part{len(self.calls)}"
+
+        self.transcriber = IncrementalTranscriber(
+            self.recorder, transcribe, save_func=self.saved.append,
+            pause_ms=300, min_segment_seconds=1.0, max_workers=1
+        )
+
+    def tearDown(self):
+        self.transcriber.close()
+
+    def wait_for_calls(self, count):
+        # Segments are transcribed on the worker threads
+        deadline = time.monotonic() + 2
+        while len(self.calls) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(len(self.calls), count)
+
+    def test_segments_are_cut_at_pauses_while_recording(self):
+        signal = np.concatenate([
+            silence(0.3, self.rng), tone(1.5), silence(0.6, self.rng),
+            tone(1.5), silence(0.6, self.rng), tone(0.5)
+        ])
+        wav_buffer = self.recorder.record(signal)
+
+        # Two segments were sent before the recording stopped
+        self.wait_for_calls(2)
+
+        text = self.transcriber.transcribe(wav_buffer)
+        self.assertEqual(text, "part1 part2 part3")
+        self.assertEqual(len(self.calls), 3)
+        # Only the tail is uploaded after release
+        self.assertLess(self.calls[-1][0], len(wav_buffer.getvalue()) / 3)
+        self.assertFalse(any(save for _, _, save in self.calls))
+        self.assertEqual(self.saved, ["part1 part2 part3"])
+
+    def test_short_recording_is_transcribed_in_one_request(self):
+        wav_buffer = self.recorder.record(np.concatenate([silence(0.2, self.rng), tone(0.5)]))
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.transcriber.transcribe(wav_buffer), "part1")
+        self.assertEqual(self.calls, [(len(wav_buffer.getvalue()), None, True)])
+        self.assertEqual(self.saved, [])
+
+    def test_silent_tail_is_not_uploaded(self):
+        signal = np.concatenate([silence(0.3, self.rng), tone(1.5), silence(1.0, self.rng)])
+        wav_buffer = self.recorder.record(signal)
+
+        self.assertEqual(self.transcriber.transcribe(wav_buffer), "part1")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_queued_turn_keeps_its_segments_when_the_next_starts(self):
+        speech = np.concatenate([silence(0.3, self.rng), tone(1.5), silence(0.6, self.rng), tone(0.5)])
+        first = self.recorder.record(speech)
+        self.wait_for_calls(1)
+
+        # The next turn is recorded up to its first cut before the first is transcribed
+        self.recorder.start(speech.size * 2)
+        self.recorder.feed(speech[:int(RATE * 2.4)])
+        self.wait_for_calls(2)
+
+        self.assertEqual(self.transcriber.transcribe(first), "part1 part3")
+
+        self.recorder.feed(speech[int(RATE * 2.4):])
+        second = self.recorder.stop()
+        self.assertEqual(self.transcriber.transcribe(second), "part2 part4")
+        self.assertEqual(len(self.calls), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,14 @@ import io
 import json
 import os
 import tempfile
+import threading
 import unittest
+import asyncio
+import base64
+import wave
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 import src.openai_client as openai_client
 # Import functions and global variables from openai_client.py
 from src.openai_client import (
@@ -13,12 +18,19 @@ from src.openai_client import (
     get_final_response,
     get_final_response_streaming,
     text_to_speech,
+    stream_speech,
+    chat_with_audio,
+    chat_with_gpt_async,
+    transcribe_audio_async,
     clear_conversation_history,
     transcribe_audio,
+    flush_transcripts,
     conversation_history,
-    FUNCTION_DEFINITIONS,  # Used for streaming tests
-    AVAILABLE_FUNCTIONS  # May be useful for extended testing
+    FUNCTION_DEFINITIONS  # Used for streaming tests
 )
+from src.tts_cache import TTSCache
+from src.response_cache import ResponseCache
+from src.cancellation import CancellationToken
 
 # Dummy classes to simulate OpenAI API responses.
 class DummyMessage:
@@ -51,10 +63,44 @@ class DummyChunk:
         self.choices[0].delta.tool_calls = tool_calls_delta if tool_calls_delta else None
         self.choices[0].finish_reason = finish_reason
 
+class DummyAudioChunk:
+    """Streamed audio chat chunk with optional audio, transcript and tool call deltas."""
+    def __init__(self, audio=None, transcript=None, tool_calls_delta=None, finish_reason=None):
+        audio_delta = None
+        if audio or transcript:
+            audio_delta = {"id": "audio_1"}
+            if audio:
+                audio_delta["data"] = base64.b64encode(audio).decode()
+            if transcript:
+                audio_delta["transcript"] = transcript
+        delta = SimpleNamespace(content=None, audio=audio_delta, tool_calls=tool_calls_delta)
+        self.choices = [SimpleNamespace(delta=delta, finish_reason=finish_reason)]
+
+def make_wav(seconds=0.5):
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(24000)
+        wf.writeframes(b"\x10\x00" * int(24000 * seconds))
+    wav_buffer.seek(0)
+    return wav_buffer
+
+async def dummy_async_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def collect(async_generator):
+    return [chunk async for chunk in async_generator]
+
 class OpenAIClientTests(unittest.TestCase):
     def setUp(self):
         # Clear conversation history before each test
         clear_conversation_history()
+        # Every speech test starts with an empty in-memory cache
+        cache_patcher = patch.object(openai_client, "tts_cache", TTSCache(cache_dir=None))
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
 
     @patch("src.openai_client.client.chat.completions.create")
     def test_chat_with_gpt_exception(self, mock_create):
@@ -78,16 +124,113 @@ class OpenAIClientTests(unittest.TestCase):
 
     @patch("src.openai_client.client.audio.speech.create")
     def test_text_to_speech(self, mock_speech_create):
-        # Create a dummy response that writes audio data to a file.
         dummy_response = MagicMock()
-        dummy_response.stream_to_file = lambda file_path: open(file_path, "wb").write(b"audio data")
+        dummy_response.content = b"audio data"
         mock_speech_create.return_value = dummy_response
         
         file_path = text_to_speech("Hello world")
         self.assertTrue(os.path.exists(file_path))
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), b"audio data")
         # Clean up the temporary file.
         os.remove(file_path)
 
+    @patch("src.openai_client.client.audio.speech.create")
+    def test_text_to_speech_in_memory(self, mock_speech_create):
+        dummy_response = MagicMock()
+        dummy_response.content = b"RIFF audio data"
+        mock_speech_create.return_value = dummy_response
+        
+        with patch("src.openai_client.tempfile.NamedTemporaryFile") as mock_temp_file:
+            audio = text_to_speech("Hello world", in_memory=True)
+            mock_temp_file.assert_not_called()
+        self.assertEqual(audio, b"RIFF audio data")
+
+    @patch("src.openai_client.client.audio.speech.with_streaming_response.create")
+    def test_stream_speech(self, mock_streaming_create):
+        # Simulate a streamed PCM response arriving in several pieces.
+        dummy_response = MagicMock()
+        dummy_response.iter_bytes.return_value = [b"\x01\x00", b"\x02\x00\x03\x00"]
+        mock_streaming_create.return_value.__enter__.return_value = dummy_response
+        buffer = MagicMock()
+        
+        self.assertTrue(stream_speech("Hello world", buffer))
+        self.assertEqual(mock_streaming_create.call_args.kwargs["response_format"], "pcm")
+        buffer.write.assert_any_call(b"\x01\x00")
+        buffer.write.assert_any_call(b"\x02\x00\x03\x00")
+        buffer.close.assert_called_once()
+
+    @patch("src.openai_client.client.audio.speech.with_streaming_response.create")
+    def test_stream_speech_exception_closes_buffer(self, mock_streaming_create):
+        mock_streaming_create.side_effect = Exception("TTS failure")
+        buffer = MagicMock()
+        
+        self.assertFalse(stream_speech("Hello world", buffer))
+        buffer.close.assert_called_once()
+
+    @patch("src.openai_client.client.audio.speech.create")
+    def test_text_to_speech_cache_hit_skips_request(self, mock_speech_create):
+        dummy_response = MagicMock()
+        dummy_response.content = b"RIFF audio data"
+        mock_speech_create.return_value = dummy_response
+        
+        first = text_to_speech("Sure,  one moment.", speed=2.0, in_memory=True)
+        second = text_to_speech(" Sure, one moment. ", speed=2.0, in_memory=True)
+        self.assertEqual(first, second)
+        mock_speech_create.assert_called_once()
+        self.assertEqual(openai_client.tts_cache.stats["memory_hits"], 1)
+        
+        # A different speed is different audio
+        text_to_speech("Sure, one moment.", speed=1.0, in_memory=True)
+        self.assertEqual(mock_speech_create.call_count, 2)
+
+    @patch("src.openai_client.client.audio.speech.with_streaming_response.create")
+    def test_stream_speech_cache_hit_writes_whole_clip(self, mock_streaming_create):
+        dummy_response = MagicMock()
+        dummy_response.iter_bytes.return_value = [b"\x01\x00", b"\x02\x00"]
+        mock_streaming_create.return_value.__enter__.return_value = dummy_response
+        self.assertTrue(stream_speech("Hello world", MagicMock()))
+        
+        buffer = MagicMock()
+        self.assertTrue(stream_speech("Hello world", buffer))
+        mock_streaming_create.assert_called_once()
+        buffer.write.assert_called_once_with(b"\x01\x00\x02\x00")
+        buffer.close.assert_called_once()
+
+    @patch("src.openai_client.client.audio.speech.with_streaming_response.create")
+    def test_failed_stream_is_not_cached(self, mock_streaming_create):
+        mock_streaming_create.side_effect = Exception("TTS failure")
+        stream_speech("Hello world", MagicMock())
+        self.assertEqual(len(openai_client.tts_cache.memory), 0)
+
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_response_cache_round_trip(self, mock_create):
+        mock_create.return_value = DummyResponse([DummyChoice("Paris.")])
+        with patch.object(openai_client, "response_cache", ResponseCache(similarity=1.0)):
+            self.assertIsNone(openai_client.cached_response("Capital of France?"))
+            chat_with_gpt("Capital of France?")
+            self.assertTrue(openai_client.cache_response("Capital of France?", [b"pcm"], "pcm"))
+            
+            entry = openai_client.cached_response("capital of france")
+            self.assertEqual(entry.reply, "Paris.")
+            self.assertEqual(entry.audio, [b"pcm"])
+            # The cached exchange is part of the conversation
+            self.assertEqual(openai_client.conversation_history[-2], {"role": "user", "content": "capital of france"})
+            self.assertEqual(openai_client.conversation_history[-1], {"role": "assistant", "content": "Paris."})
+        mock_create.assert_called_once()
+
+    def test_response_cache_skips_failed_function_calls(self):
+        with patch.object(openai_client, "response_cache", ResponseCache()):
+            openai_client.conversation_history.append({"role": "user", "content": "Add 1 and x"})
+            openai_client.conversation_history.append({"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_1", "type": "function", "function": {"name": "calculate_sum", "arguments": "{}"}}
+            ]})
+            openai_client.conversation_history.append({"role": "tool", "tool_call_id": "call_1", "name": "calculate_sum",
+                                                       "content": json.dumps({"error": "bad arguments"})})
+            openai_client.conversation_history.append({"role": "assistant", "content": "I couldn't add those."})
+            
+            self.assertFalse(openai_client.cache_response("Add 1 and x"))
+
     @patch("src.openai_client.client.audio.transcriptions.create")
     def test_transcribe_audio(self, mock_transcribe_create):
         # Set up a dummy transcription response.
@@ -101,10 +244,17 @@ class OpenAIClientTests(unittest.TestCase):
         recordings_dir = os.path.join(os.getcwd(), "recordings")
         os.makedirs(recordings_dir, exist_ok=True)
         
-        transcription_text = transcribe_audio(audio_data)
+        with patch("src.openai_client.tempfile.NamedTemporaryFile") as mock_temp_file:
+            transcription_text = transcribe_audio(audio_data)
+            mock_temp_file.assert_not_called()
         self.assertEqual(transcription_text, "Transcribed text")
         
-        # Verify that a transcript file was created.
+        # The audio is uploaded from memory as a (name, bytes, content type) tuple.
+        uploaded_file = mock_transcribe_create.call_args.kwargs["file"]
+        self.assertEqual(uploaded_file[1], b"dummy audio data")
+        
+        # Verify that a transcript file was created once pending writes are flushed.
+        flush_transcripts()
         transcript_files = os.listdir(recordings_dir)
         self.assertTrue(any("transcript_" in filename for filename in transcript_files))
         
@@ -130,6 +280,39 @@ class OpenAIClientTests(unittest.TestCase):
         self.assertEqual(combined_content, "Chunk 1, Chunk 2")
         self.assertTrue(any(chunk["data"] == "stop" for chunk in finish_chunks))
 
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_chat_stream_stops_and_closes_when_cancelled(self, mock_create):
+        token = CancellationToken()
+        stream = MagicMock()
+        stream.__iter__.return_value = iter([
+            DummyChunk(content="Partial answer. "),
+            DummyChunk(content="Never heard", finish_reason="stop")
+        ])
+        mock_create.return_value = stream
+        
+        outputs = []
+        for chunk in chat_with_gpt("Question", True, cancel_token=token):
+            outputs.append(chunk)
+            token.cancel()
+        
+        self.assertEqual(outputs, [{"type": "content", "data": "Partial answer. "}])
+        stream.close.assert_called_once()
+        # What was said before the interruption stays in the history
+        self.assertEqual(openai_client.conversation_history[-1],
+                         {"role": "assistant", "content": "Partial answer. "})
+
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_cancelled_turn_makes_no_requests(self, mock_create):
+        token = CancellationToken()
+        token.cancel()
+        buffer = MagicMock()
+        
+        self.assertEqual(list(chat_with_gpt_streaming(FUNCTION_DEFINITIONS, token)), [])
+        self.assertIsNone(text_to_speech("Hello", in_memory=True, cancel_token=token))
+        self.assertFalse(stream_speech("Hello", buffer, cancel_token=token))
+        mock_create.assert_not_called()
+        buffer.close.assert_called_once()
+
     @patch("src.openai_client.client.chat.completions.create")
     def test_get_final_response_streaming(self, mock_create):
         chunks = [
@@ -143,5 +326,164 @@ class OpenAIClientTests(unittest.TestCase):
         self.assertEqual(content, "Final chunk 1, Final chunk 2")
         self.assertTrue(any(chunk["data"] == "stop" for chunk in outputs if chunk["type"] == "finish"))
 
+    @patch("src.openai_client.transcribe_audio", return_value="What is 2 plus 3?")
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_chat_with_audio_streams_reply_and_runs_tools(self, mock_create, mock_transcribe):
+        tool_call = SimpleNamespace(
+            index=0, id="call_1",
+            function=SimpleNamespace(name="calculate_sum", arguments='{"a": 2, "b": 3}')
+        )
+        mock_create.side_effect = [
+            dummy_streaming_response([DummyAudioChunk(tool_calls_delta=[tool_call], finish_reason="tool_calls")]),
+            dummy_streaming_response([
+                DummyAudioChunk(audio=b"\x01\x00", transcript="It is "),
+                DummyAudioChunk(audio=b"\x02\x00", transcript="5."),
+                DummyAudioChunk(finish_reason="stop")
+            ])
+        ]
+        buffer = MagicMock()
+        
+        outputs = list(chat_with_audio(make_wav(), buffer))
+        
+        content = "".join(chunk["data"] for chunk in outputs if chunk["type"] == "content")
+        self.assertEqual(content, "It is 5.")
+        self.assertIn({"type": "function_response", "name": "calculate_sum", "data": {"result": 5}}, outputs)
+        self.assertEqual([c.args[0] for c in buffer.write.call_args_list], [b"\x01\x00", b"\x02\x00"])
+        buffer.close.assert_called_once()
+        
+        # One request carries the audio in and asks for audio out
+        first_call = mock_create.call_args_list[0].kwargs
+        self.assertEqual(first_call["modalities"], ["text", "audio"])
+        self.assertEqual(first_call["audio"]["format"], "pcm16")
+        user_message = first_call["messages"][0]
+        self.assertEqual(user_message["content"][0]["type"], "input_audio")
+        self.assertEqual(user_message["content"][0]["input_audio"]["format"], "wav")
+        self.assertEqual(openai_client.conversation_history[-1], {"role": "assistant", "content": "It is 5."})
+        self.assertEqual(openai_client.conversation_history[0], {"role": "user", "content": "What is 2 plus 3?"})
+
+    @patch("src.openai_client.transcribe_audio", side_effect=["First question", None, "Third question"])
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_chat_with_audio_history_keeps_text_not_audio(self, mock_create, mock_transcribe):
+        mock_create.side_effect = lambda **kwargs: dummy_streaming_response([
+            DummyAudioChunk(audio=b"\x01\x00", transcript="Answer."),
+            DummyAudioChunk(finish_reason="stop")
+        ])
+        
+        for _ in range(3):
+            list(chat_with_audio(make_wav(), MagicMock()))
+        
+        history = openai_client.conversation_history
+        self.assertEqual([message["content"] for message in history if message["role"] == "user"],
+                         ["First question", openai_client.SPOKEN_QUESTION_PLACEHOLDER, "Third question"])
+        self.assertEqual(len(history), 6)
+        # Each request carries only its own recording
+        for call in mock_create.call_args_list:
+            messages = call.kwargs["messages"]
+            audio_parts = [m for m in messages if isinstance(m["content"], list)]
+            self.assertEqual(audio_parts, [messages[-1]])
+        self.assertLess(history.total_tokens, 100)
+
+    @patch("src.openai_client.transcribe_audio", return_value="What is 2 plus 3?")
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_chat_with_audio_stops_when_cancelled(self, mock_create, mock_transcribe):
+        stream = MagicMock()
+        stream.__iter__.return_value = iter([
+            DummyAudioChunk(audio=b"\x01\x00", transcript="It is "),
+            DummyAudioChunk(audio=b"\x02\x00", transcript="5."),
+            DummyAudioChunk(finish_reason="stop")
+        ])
+        mock_create.return_value = stream
+        buffer = MagicMock()
+        cancel_token = CancellationToken()
+        
+        outputs = []
+        for chunk in chat_with_audio(make_wav(), buffer, cancel_token):
+            outputs.append(chunk)
+            # The user barges in after the first words
+            cancel_token.cancel()
+        
+        self.assertEqual(outputs, [{"type": "content", "data": "It is "}])
+        stream.close.assert_called_once()
+        buffer.close.assert_called_once()
+        mock_create.assert_called_once()
+        self.assertEqual(openai_client.conversation_history[-1], {"role": "assistant", "content": "It is "})
+
+    @patch("src.openai_client.transcribe_audio", return_value=None)
+    @patch("src.openai_client.client.chat.completions.create")
+    def test_chat_with_audio_exception_closes_buffer(self, mock_create, mock_transcribe):
+        mock_create.side_effect = Exception("API failure")
+        buffer = MagicMock()
+        
+        outputs = list(chat_with_audio(make_wav(), buffer))
+        self.assertEqual(outputs[-1]["type"], "error")
+        buffer.close.assert_called_once()
+
+    @patch("src.openai_client.async_client.chat.completions.create", new_callable=AsyncMock)
+    def test_chat_with_gpt_async_streaming_runs_tools(self, mock_create):
+        tool_call = SimpleNamespace(
+            index=0, id="call_1",
+            function=SimpleNamespace(name="calculate_sum", arguments='{"a": 1, "b": 2}')
+        )
+        mock_create.side_effect = [
+            dummy_async_stream([DummyChunk(tool_calls_delta=[tool_call], finish_reason="tool_calls")]),
+            dummy_async_stream([DummyChunk(content="It is 3.", finish_reason="stop")])
+        ]
+        history = []
+        
+        async def run():
+            return await collect(await chat_with_gpt_async("Add 1 and 2", stream=True, history=history))
+        outputs = asyncio.run(run())
+        
+        self.assertIn({"type": "function_response", "name": "calculate_sum", "data": {"result": 3}}, outputs)
+        self.assertEqual("".join(c["data"] for c in outputs if c["type"] == "content"), "It is 3.")
+        self.assertEqual([message["role"] for message in history], ["user", "assistant", "tool", "assistant"])
+        # The separate history leaves the global conversation untouched
+        self.assertEqual(openai_client.conversation_history, [])
+
+    @patch("src.openai_client.async_client.audio.transcriptions.create", new_callable=AsyncMock)
+    def test_transcribe_audio_async(self, mock_transcribe_create):
+        mock_transcribe_create.return_value = SimpleNamespace(text="Async text")
+        
+        text = asyncio.run(transcribe_audio_async(make_wav(), save=False))
+        self.assertEqual(text, "Async text")
+        self.assertEqual(mock_transcribe_create.call_args.kwargs["model"], "whisper-1")
+
+    @patch("src.openai_client.async_client.audio.transcriptions.create", new_callable=AsyncMock)
+    @patch("src.openai_client.async_client.chat.completions.create", new_callable=AsyncMock)
+    def test_async_turn_emits_trace_milestones(self, mock_create, mock_transcribe_create):
+        mock_transcribe_create.return_value = SimpleNamespace(text="Hello")
+        mock_create.return_value = dummy_async_stream([DummyChunk(content="Hi.", finish_reason="stop")])
+        tracer = MagicMock()
+        
+        async def run():
+            await transcribe_audio_async(make_wav(), save=False)
+            await collect(await chat_with_gpt_async("Hello", stream=True, history=[]))
+        with patch("src.openai_client.tracer", tracer):
+            asyncio.run(run())
+        
+        marks = [c.args[0] for c in tracer.mark.call_args_list]
+        spans = [c.args[0] for c in tracer.span.call_args_list]
+        self.assertEqual(marks, ["transcript", "chat_request_sent", "first_token"])
+        self.assertEqual(spans, ["upload_encode", "transcription_request"])
+
+    @patch("src.openai_client.async_client.audio.transcriptions.create", new_callable=AsyncMock)
+    def test_transcribe_audio_async_encodes_off_the_event_loop(self, mock_transcribe_create):
+        mock_transcribe_create.return_value = SimpleNamespace(text="Async text")
+        build_params = openai_client._build_transcription_params
+        threads = []
+        
+        def record_thread(*args):
+            threads.append(threading.get_ident())
+            return build_params(*args)
+        
+        async def run():
+            await transcribe_audio_async(make_wav(), save=False)
+            return threading.get_ident()
+        with patch("src.openai_client._build_transcription_params", side_effect=record_thread):
+            loop_thread = asyncio.run(run())
+        
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
 if __name__ == "__main__":
     unittest.main()
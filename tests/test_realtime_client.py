@@ -0,0 +1,160 @@
+import base64
+import io
+import json
+import threading
+import time
+import unittest
+import wave
+
+from websockets.sync.server import serve
+
+from src.cancellation import CancellationToken
+from src.realtime_client import RealtimeSession
+
+REPLY_AUDIO = bytes(range(256)) * 20
+
+# Server events recorded from a turn where the model calls a function and then answers
+FUNCTION_CALL_RESPONSE = [
+    {"type": "response.created", "response": {"id": "resp_001"}},
+    {"type": "response.function_call_arguments.delta", "call_id": "call_001", "delta": "{\"a\": 2,"},
+    {"type": "response.function_call_arguments.done", "call_id": "call_001", "name": "calculate_sum",
+     "arguments": "{\"a\": 2, \"b\": 3}"},
+    {"type": "response.done", "response": {"id": "resp_001", "status": "completed"}},
+]
+AUDIO_RESPONSE = [
+    {"type": "response.created", "response": {"id": "resp_002"}},
+    {"type": "response.audio_transcript.delta", "delta": "The sum "},
+    {"type": "response.audio.delta", "delta": base64.b64encode(REPLY_AUDIO[:2000]).decode()},
+    {"type": "response.audio_transcript.delta", "delta": "is 5."},
+    {"type": "response.audio.delta", "delta": base64.b64encode(REPLY_AUDIO[2000:]).decode()},
+    {"type": "response.audio.done"},
+    {"type": "response.done", "response": {"id": "resp_002", "status": "completed"}},
+]
+
+
+class ReplayServer:
+    """Stand-in Realtime server replaying recorded event sequences on response.create."""
+
+    def __init__(self, responses, on_commit=()):
+        self.responses = list(responses)
+        self.on_commit = list(on_commit)
+        self.received = []
+        self.server = serve(self.handler, "localhost", 0)
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def handler(self, websocket):
+        self.headers = websocket.request.headers
+        for message in websocket:
+            event = json.loads(message)
+            self.received.append(event)
+            if event["type"] == "input_audio_buffer.commit":
+                replay = self.on_commit
+            elif event["type"] == "response.create" and self.responses:
+                replay = self.responses.pop(0)
+            else:
+                continue
+            for server_event in replay:
+                websocket.send(json.dumps(server_event))
+
+    def events(self, event_type):
+        return [event for event in self.received if event["type"] == event_type]
+
+    def close(self):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def make_wav(pcm):
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(24000)
+        wf.writeframes(pcm)
+    wav_buffer.seek(0)
+    return wav_buffer
+
+
+def read_all(buffer):
+    data = b""
+    chunk = buffer.read(4096)
+    while chunk:
+        data += chunk
+        chunk = buffer.read(4096)
+    return data
+
+
+class RealtimeSessionTests(unittest.TestCase):
+    def start(self, responses, on_commit=()):
+        self.server = ReplayServer(responses, on_commit)
+        self.addCleanup(self.server.close)
+        session = RealtimeSession(url=f"ws://localhost:{self.server.port}", api_key="test-key")
+        session.connect()
+        self.addCleanup(session.close)
+        return session
+
+    def test_function_call_then_audio_reply(self):
+        transcription = [{"type": "conversation.item.input_audio_transcription.completed", "transcript": "Add 2 and 3"}]
+        session = self.start([FUNCTION_CALL_RESPONSE, AUDIO_RESPONSE], transcription)
+        pcm = b"\x01\x00" * 4800
+
+        turn = session.commit_turn(make_wav(pcm))
+        chunks = list(turn)
+
+        self.assertEqual(read_all(turn.audio), REPLY_AUDIO)
+        self.assertEqual(chunks[0], {"type": "transcription", "data": "Add 2 and 3"})
+        self.assertEqual(chunks[1], {"type": "function_response", "data": {"result": 5}, "name": "calculate_sum"})
+        self.assertEqual("".join(c["data"] for c in chunks if c["type"] == "content"), "The sum is 5.")
+
+        # The recording was uploaded before the commit, and the function result was sent back
+        types = [event["type"] for event in self.server.received]
+        self.assertEqual(types[0], "session.update")
+        self.assertLess(types.index("input_audio_buffer.append"), types.index("input_audio_buffer.commit"))
+        sent_audio = b"".join(base64.b64decode(e["audio"]) for e in self.server.events("input_audio_buffer.append"))
+        self.assertEqual(sent_audio, pcm)
+        output = self.server.events("conversation.item.create")[0]["item"]
+        self.assertEqual(output["call_id"], "call_001")
+        self.assertEqual(json.loads(output["output"]), {"result": 5})
+        self.assertEqual(len(self.server.events("response.create")), 2)
+        self.assertEqual(self.server.headers["Authorization"], "Bearer test-key")
+
+    def test_session_registers_tools(self):
+        session = self.start([AUDIO_RESPONSE])
+        list(session.commit_turn(make_wav(b"\x00\x00" * 100)))
+
+        config = self.server.events("session.update")[0]["session"]
+        self.assertEqual({tool["name"] for tool in config["tools"]}, {"calculate_sum", "get_current_time"})
+        self.assertEqual(config["input_audio_format"], "pcm16")
+        self.assertIsNone(config["turn_detection"])
+
+    def test_error_event_ends_turn(self):
+        error = [{"type": "error", "error": {"type": "invalid_request_error", "message": "Buffer too small"}}]
+        session = self.start([error])
+
+        turn = session.commit_turn(make_wav(b"\x00\x00" * 10))
+
+        self.assertEqual(list(turn), [{"type": "error", "data": "Buffer too small"}])
+        self.assertEqual(read_all(turn.audio), b"")
+
+    def test_cancelling_a_turn_cancels_the_response(self):
+        # The response is still streaming: no response.done yet
+        session = self.start([AUDIO_RESPONSE[:3]])
+        cancel_token = CancellationToken()
+
+        turn = session.commit_turn(make_wav(b"\x00\x00" * 100), cancel_token)
+        chunks = iter(turn)
+        self.assertEqual(next(chunks), {"type": "content", "data": "The sum "})
+        cancel_token.cancel()
+
+        self.assertEqual(list(chunks), [])
+        self.assertTrue(turn.done.is_set())
+        deadline = time.monotonic() + 2
+        while not self.server.events("response.cancel") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.events("response.cancel")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
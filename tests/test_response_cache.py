@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+
+from src.response_cache import NGramIndex, ResponseCache, normalize_transcript
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_normalize_transcript(self):
+        self.assertEqual(normalize_transcript("  What's 2.5 plus 3?  "), "what s 2.5 plus 3")
+        self.assertEqual(normalize_transcript("Tell me a joke."), "tell me a joke")
+
+    def test_normalize_spelled_out_numbers(self):
+        self.assertEqual(normalize_transcript("What's twenty-five plus three?"), "what s 25 plus 3")
+        self.assertEqual(normalize_transcript("one hundred and five"), "100 and 5")
+        self.assertEqual(normalize_transcript("two thousand three hundred twelve"), "2312")
+        self.assertEqual(normalize_transcript("two three"), "2 3")
+
+    def test_exact_match_after_normalization(self):
+        cache = ResponseCache(similarity=1.0)
+        self.assertTrue(cache.store("Tell me a joke.", "Why did the chicken...", audio=[b"pcm"], audio_format="pcm"))
+
+        entry = cache.lookup("tell me a joke")
+        self.assertEqual(entry.reply, "Why did the chicken...")
+        self.assertEqual(entry.audio, [b"pcm"])
+        self.assertIsNone(cache.lookup("tell me a story"))
+        self.assertEqual(cache.stats["exact_hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_fuzzy_match(self):
+        cache = ResponseCache(similarity=0.8)
+        cache.store("What is the capital of France?", "Paris.")
+        cache.store("Tell me a joke", "No.")
+
+        self.assertEqual(cache.lookup("what's the capital of France").reply, "Paris.")
+        self.assertEqual(cache.stats["fuzzy_hits"], 1)
+        self.assertIsNone(cache.lookup("how far away is the moon"))
+
+    def test_fuzzy_match_requires_the_same_numbers(self):
+        cache = ResponseCache(similarity=0.5)
+        cache.store("Add 2 and 3", "That's 5.", ["calculate_sum"])
+
+        self.assertIsNone(cache.lookup("Add 2 and 4"))
+        self.assertEqual(cache.lookup("add 2 and 3 please").reply, "That's 5.")
+        self.assertEqual(cache.lookup("Add two and three").reply, "That's 5.")
+
+    def test_near_miss_questions_are_not_fuzzy_hits(self):
+        cache = ResponseCache(similarity=0.8)
+        cache.store("What is the capital of Austria?", "Vienna.")
+        cache.store("What is the sum of twelve and five?", "Seventeen.", ["calculate_sum"])
+
+        self.assertIsNone(cache.lookup("What is the capital of Australia?"))
+        self.assertIsNone(cache.lookup("What is the sum of twenty and five?"))
+        self.assertEqual(cache.stats["fuzzy_hits"], 0)
+
+    def test_fuzzy_match_falls_back_to_the_next_candidate(self):
+        cache = ResponseCache(similarity=0.8)
+        cache.store("What is the capital of France?", "Paris.")
+        cache.store("What's the capital of Frances?", "Frances is not a country.")
+
+        # "Frances" scores higher but differs in a content word
+        self.assertEqual(cache.lookup("what's the capital of France").reply, "Paris.")
+        self.assertEqual(cache.stats["fuzzy_hits"], 1)
+
+    def test_exact_matching_by_default(self):
+        cache = ResponseCache()
+        cache.store("What is the capital of France?", "Paris.")
+
+        self.assertIsNone(cache.lookup("what's the capital of France"))
+        self.assertEqual(cache.lookup("What is the capital of France").reply, "Paris.")
+
+    def test_time_dependent_functions_bypass_the_cache(self):
+        cache = ResponseCache()
+        self.assertFalse(cache.store("What time is it?", "It's noon.", ["get_current_time"]))
+        self.assertIsNone(cache.lookup("What time is it?"))
+        self.assertEqual(cache.stats["bypassed"], 1)
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttl_seconds=10)
+        with patch("src.response_cache.time.monotonic", return_value=100.0):
+            cache.store("Tell me a joke", "No.")
+        with patch("src.response_cache.time.monotonic", return_value=105.0):
+            self.assertIsNotNone(cache.lookup("Tell me a joke"))
+        with patch("src.response_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.lookup("Tell me a joke"))
+        self.assertEqual(len(cache.index.vectors), 0)
+
+    def test_oldest_entries_are_evicted(self):
+        cache = ResponseCache(similarity=1.0, max_entries=2)
+        for question in ("first question", "second question", "third question"):
+            cache.store(question, question.upper())
+
+        self.assertIsNone(cache.lookup("first question"))
+        self.assertEqual(cache.lookup("third question").reply, "THIRD QUESTION")
+        self.assertEqual(len(cache.index.vectors), 2)
+
+    def test_index_similarity(self):
+        index = NGramIndex()
+        index.add("turn on the lights")
+        index.add("what is the weather")
+
+        matches = index.matches("what is the weather", 0.9)
+        self.assertEqual(len(matches), 1)
+        row, similarity = matches[0]
+        self.assertEqual(row, 1)
+        self.assertAlmostEqual(similarity, 1.0, places=5)
+        self.assertEqual([row for row, _ in index.matches("what is the weather", 0.0)], [1, 0])
+        index.remove(0)
+        self.assertEqual(index.matches("what is the weather", 0.9)[0][0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.openai_client import _merge_tool_call_delta
+from src.tool_executor import ToolCallDispatcher, parse_arguments
+
+
+def tool_call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+class ToolCallDispatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.release = threading.Event()
+
+        def slow(seconds):
+            self.started.append(seconds)
+            time.sleep(seconds)
+            return {"slept": seconds}
+
+        def blocking():
+            self.release.wait(5)
+            return {"done": True}
+
+        functions = patch.dict("src.tool_executor.AVAILABLE_FUNCTIONS", {"slow": slow, "blocking": blocking})
+        timeouts = patch.dict("src.tool_executor.FUNCTION_TIMEOUTS", {"blocking": 0.1})
+        functions.start()
+        timeouts.start()
+        self.addCleanup(functions.stop)
+        self.addCleanup(timeouts.stop)
+        self.addCleanup(self.release.set)
+
+    def test_parse_arguments_waits_for_complete_json(self):
+        self.assertIsNone(parse_arguments('{"a": 1,'))
+        self.assertEqual(parse_arguments('{"a": 1}'), {"a": 1})
+        # Empty arguments are incomplete until the stream ends
+        self.assertIsNone(parse_arguments(""))
+        self.assertIsNone(parse_arguments("  "))
+        self.assertEqual(parse_arguments("", final=True), {})
+
+    def test_streamed_call_waits_for_its_arguments(self):
+        def delta(arguments, name=None, call_id=None):
+            return SimpleNamespace(index=0, id=call_id,
+                                   function=SimpleNamespace(name=name, arguments=arguments))
+
+        dispatcher = ToolCallDispatcher()
+        calls = []
+        # The first delta names the function before any argument has arrived
+        for fragment in [delta("", "slow", "call_1"), delta('{"sec'), delta('onds": 0.'), delta("01")]:
+            _merge_tool_call_delta(calls, fragment)
+            dispatcher.update(calls)
+            self.assertEqual(dispatcher.started, {})
+
+        _merge_tool_call_delta(calls, delta("}"))
+        dispatcher.update(calls)
+        self.assertIn(0, dispatcher.started)
+        self.assertEqual(dispatcher.results(calls), [(calls[0], {"slept": 0.01})])
+
+    def test_call_without_arguments_runs_when_stream_ends(self):
+        calls = [tool_call("call_1", "blocking", "")]
+        dispatcher = ToolCallDispatcher()
+        dispatcher.update(calls)
+        self.assertEqual(dispatcher.started, {})
+
+        self.release.set()
+        self.assertEqual(dispatcher.results(calls), [(calls[0], {"done": True})])
+
+    def test_calls_start_as_soon_as_arguments_complete(self):
+        dispatcher = ToolCallDispatcher()
+        calls = [tool_call("call_1", "slow", '{"seconds": 0.0')]
+        dispatcher.update(calls)
+        self.assertEqual(dispatcher.started, {})
+
+        calls[0]["function"]["arguments"] += "1}"
+        dispatcher.update(calls)
+        self.assertIn(0, dispatcher.started)
+        # Updating again does not run the call twice
+        dispatcher.update(calls)
+        self.assertEqual(dispatcher.results(calls), [(calls[0], {"slept": 0.01})])
+        self.assertEqual(self.started, [0.01])
+
+    def test_calls_run_in_parallel_and_keep_order(self):
+        calls = [tool_call(f"call_{i}", "slow", '{"seconds": 0.2}') for i in range(3)]
+
+        started = time.monotonic()
+        results = ToolCallDispatcher().results(calls)
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual([call["id"] for call, _ in results], ["call_0", "call_1", "call_2"])
+
+    def test_per_tool_timeout_and_errors(self):
+        calls = [
+            tool_call("call_1", "blocking", "{}"),
+            tool_call("call_2", "missing", "{}"),
+            tool_call("call_3", "slow", '{"seconds": "x"}'),
+            tool_call("call_4", "slow", '{"seconds": ')
+        ]
+
+        results = [response for _, response in ToolCallDispatcher().results(calls)]
+
+        self.assertEqual(results[0], {"error": "Function blocking timed out"})
+        self.assertEqual(results[1], {"error": "Function missing not found"})
+        self.assertIn("error", results[2])
+        self.assertEqual(results[3], {"error": "Invalid function arguments"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.tracing import Tracer
+
+
+class TracerTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "trace", "trace.jsonl")
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_turn_is_written_relative_to_key_release(self):
+        tracer = Tracer(self.path, enabled=True)
+        tracer.begin_turn()
+        tracer.mark("key_press")
+        time.sleep(0.01)
+        tracer.mark("key_release")
+        with tracer.span("wav_assembly"):
+            time.sleep(0.01)
+        tracer.flush()
+
+        records = {record["name"]: record for record in self.read()}
+        self.assertLess(records["key_press"]["start_ms"], 0)
+        self.assertEqual(records["key_release"]["start_ms"], 0)
+        self.assertEqual(records["wav_assembly"]["kind"], "span")
+        self.assertGreaterEqual(records["wav_assembly"]["duration_ms"], 10)
+        self.assertEqual(len({record["turn"] for record in records.values()}), 1)
+
+    def test_once_keeps_the_first_mark_and_latest_the_last(self):
+        tracer = Tracer(self.path, enabled=True)
+        tracer.begin_turn()
+        tracer.mark("key_release")
+        tracer.mark("first_token", once=True)
+        tracer.mark("last_audio_out", latest=True)
+        time.sleep(0.01)
+        tracer.mark("first_token", once=True)
+        tracer.mark("last_audio_out", latest=True)
+        tracer.flush()
+
+        records = self.read()
+        first_token = [record for record in records if record["name"] == "first_token"]
+        last_audio = [record for record in records if record["name"] == "last_audio_out"]
+        self.assertEqual(len(first_token), 1)
+        self.assertEqual(len(last_audio), 1)
+        self.assertGreater(last_audio[0]["start_ms"], first_token[0]["start_ms"])
+
+    def test_nothing_is_recorded_outside_a_turn(self):
+        tracer = Tracer(self.path, enabled=True)
+        tracer.mark("first_token")
+        with tracer.span("transcription_request"):
+            pass
+        tracer.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_next_turn_writes_the_previous_one(self):
+        tracer = Tracer(self.path, enabled=True)
+        tracer.begin_turn()
+        tracer.mark("key_release")
+        tracer.begin_turn()
+        tracer.mark("key_release")
+        tracer.drain()
+        self.assertEqual(len(self.read()), 1)
+        tracer.flush()
+        self.assertEqual(len({record["turn"] for record in self.read()}), 2)
+
+    def test_begin_turn_does_not_wait_for_the_disk(self):
+        tracer = Tracer(self.path, enabled=True)
+        tracer.begin_turn()
+        tracer.mark("key_release")
+        release = threading.Event()
+        write = tracer._write
+
+        def slow_write(turn):
+            release.wait(5)
+            write(turn)
+
+        with patch.object(tracer, "_write", side_effect=slow_write):
+            started = time.perf_counter()
+            tracer.begin_turn()
+            self.assertLess(time.perf_counter() - started, 1)
+            self.assertFalse(os.path.exists(self.path))
+            release.set()
+            tracer.drain()
+        self.assertEqual(len(self.read()), 1)
+
+    def test_file_is_rotated_at_its_size_limit(self):
+        tracer = Tracer(self.path, enabled=True, max_bytes=1)
+        for _ in range(3):
+            tracer.begin_turn()
+            tracer.mark("key_release")
+        tracer.flush()
+
+        # Each write found a full file and started a new one
+        self.assertEqual(len(self.read()), 1)
+        with open(f"{self.path}.1", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.tts_cache import TTSCache, cache_key, normalize_text
+
+
+class TTSCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_key_covers_everything_that_changes_the_audio(self):
+        base = cache_key("Hello there.", 1.0, None, "pcm")
+        self.assertEqual(base, cache_key("  Hello\nthere. ", 1.0, None, "pcm"))
+        self.assertNotEqual(base, cache_key("hello there.", 1.0, None, "pcm"))
+        self.assertNotEqual(base, cache_key("Hello there.", 2.0, None, "pcm"))
+        self.assertNotEqual(base, cache_key("Hello there.", 1.0, "Cheerful", "pcm"))
+        self.assertNotEqual(base, cache_key("Hello there.", 1.0, None, "wav"))
+        self.assertNotEqual(base, cache_key("Hello there.", 1.0, None, "pcm", voice="alloy"))
+        self.assertEqual(normalize_text(" a \t b "), "a b")
+
+    def test_memory_lru_eviction(self):
+        cache = TTSCache(cache_dir=None, memory_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+        cache.put("c", b"12345")
+
+        self.assertEqual(cache.get("a"), b"12345")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"12345")
+        self.assertEqual(cache.stats["memory_hits"], 3)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_disk_entries_survive_a_restart(self):
+        cache = TTSCache(cache_dir=self.tmp.name, memory_bytes=100, disk_bytes=100)
+        cache.put("a", b"audio")
+        cache.flush()
+
+        reopened = TTSCache(cache_dir=self.tmp.name, memory_bytes=100, disk_bytes=100)
+        self.assertEqual(reopened.get("a"), b"audio")
+        self.assertEqual(reopened.stats["disk_hits"], 1)
+        # The disk hit is promoted to memory
+        self.assertEqual(reopened.get("a"), b"audio")
+        self.assertEqual(reopened.stats["memory_hits"], 1)
+
+    def test_disk_lru_eviction_deletes_files(self):
+        cache = TTSCache(cache_dir=self.tmp.name, memory_bytes=0, disk_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.flush()
+        cache.get("a")
+        cache.put("c", b"12345")
+        cache.flush()
+
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["a.audio", "c.audio"])
+        self.assertEqual(cache.stats["evictions"], 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertAlmostEqual(cache.hit_rate(), 0.5)
+
+    def test_put_does_not_wait_for_the_disk(self):
+        cache = TTSCache(cache_dir=self.tmp.name, memory_bytes=100, disk_bytes=100)
+        release = threading.Event()
+        write = cache._write
+
+        def slow_write(key, audio):
+            release.wait(5)
+            write(key, audio)
+
+        with patch.object(cache, "_write", side_effect=slow_write):
+            cache.put("a", b"audio")
+            # Served from memory while the file is still being written
+            self.assertEqual(cache.get("a"), b"audio")
+            self.assertEqual(os.listdir(self.tmp.name), [])
+            release.set()
+            cache.flush()
+        self.assertEqual(os.listdir(self.tmp.name), ["a.audio"])
+        self.assertIn("a", cache.disk)
+
+
+if __name__ == "__main__":
+    unittest.main()
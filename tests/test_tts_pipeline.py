@@ -0,0 +1,152 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.audio_player import JitterBuffer
+from src.cancellation import CancellationToken
+from src.tts_pipeline import TTSPipeline
+
+
+class TTSPipelineTests(unittest.TestCase):
+    def test_playback_order_matches_submission_order(self):
+        # Later chunks finish synthesizing first; playback must still be in order.
+        delays = {"first": 0.2, "second": 0.1, "third": 0.0}
+        played = []
+
+        def fake_tts(text, speed):
+            time.sleep(delays[text])
+            return f"{text}.wav"
+
+        def fake_play(audio, block=True):
+            played.append(audio)
+
+        pipeline = TTSPipeline(fake_tts, fake_play, max_workers=3)
+        for text in ("first", "second", "third"):
+            pipeline.submit(text)
+        pipeline.finish()
+
+        self.assertEqual(played, ["first.wav", "second.wav", "third.wav"])
+
+    def test_chunks_are_synthesized_concurrently(self):
+        barrier = threading.Barrier(2, timeout=1.0)
+
+        def fake_tts(text, speed):
+            # Both chunks must be in flight at the same time to pass the barrier.
+            barrier.wait()
+            return text
+
+        played = []
+        pipeline = TTSPipeline(fake_tts, lambda audio, block=True: played.append(audio), max_workers=2)
+        pipeline.submit("a")
+        pipeline.submit("b")
+        pipeline.finish()
+
+        self.assertEqual(played, ["a", "b"])
+
+    def test_failed_chunk_is_skipped(self):
+        def fake_tts(text, speed):
+            if text == "bad":
+                raise RuntimeError("synthesis failed")
+            return text if text != "empty" else None
+
+        played = []
+        pipeline = TTSPipeline(fake_tts, lambda audio, block=True: played.append(audio))
+        for text in ("ok", "bad", "empty", "last"):
+            pipeline.submit(text)
+        pipeline.finish()
+
+        self.assertEqual(played, ["ok", "last"])
+
+    def test_kept_audio_includes_streamed_chunks(self):
+        def fake_stream(text, buffer, speed):
+            buffer.write(text.encode())
+            buffer.close()
+            return True
+
+        played = []
+        pipeline = TTSPipeline(None, lambda audio, block=True: played.append(audio),
+                               stream_func=fake_stream, keep_audio=True)
+        pipeline.submit("ab")
+        pipeline.submit("cd")
+        pipeline.finish()
+
+        self.assertEqual(pipeline.audio(), [b"ab", b"cd"])
+        self.assertEqual([buffer.read(10) for buffer in played], [b"ab", b"cd"])
+
+    def test_kept_audio_is_none_if_a_chunk_failed(self):
+        pipeline = TTSPipeline(lambda text, speed: None if text == "bad" else text.encode(),
+                               lambda audio, block=True: None, keep_audio=True)
+        pipeline.submit("ok")
+        pipeline.submit("bad")
+        pipeline.finish()
+
+        self.assertIsNone(pipeline.audio())
+
+    def test_cancel_skips_queued_chunks(self):
+        token = CancellationToken()
+        requested = []
+        played = []
+
+        def fake_tts(text, speed, cancel_token):
+            requested.append(text)
+            if text == "first":
+                # The user barges in while the first chunk is being synthesized
+                cancel_token.cancel()
+            return text
+
+        pipeline = TTSPipeline(fake_tts, lambda audio, block=True, cancel_token=None: played.append(audio),
+                               max_workers=1, cancel_token=token)
+        for text in ("first", "second", "third"):
+            pipeline.submit(text)
+        pipeline.finish()
+        late = pipeline.submit("fourth")
+
+        self.assertEqual(requested, ["first"])
+        self.assertEqual(played, [])
+        self.assertTrue(late.cancelled())
+
+    def test_stream_chunks_submitted_after_cancel_are_not_requested(self):
+        token = CancellationToken()
+        token.cancel()
+        played = []
+        pipeline = TTSPipeline(None, lambda audio, block=True, cancel_token=None: played.append(audio),
+                               stream_func=lambda text, buffer, speed, cancel_token: self.fail("requested"),
+                               cancel_token=token)
+        self.assertTrue(pipeline.submit("text").cancelled())
+        pipeline.finish()
+        self.assertEqual(played, [])
+
+    def test_cancelled_stream_chunks_close_their_buffers(self):
+        token = CancellationToken()
+        release = threading.Event()
+        buffers = []
+
+        class TrackedBuffer(JitterBuffer):
+            def __init__(self):
+                super().__init__()
+                buffers.append(self)
+
+        def fake_stream(text, buffer, speed, cancel_token):
+            release.wait(1.0)
+            buffer.close()
+            return True
+
+        with patch("src.tts_pipeline.JitterBuffer", TrackedBuffer):
+            pipeline = TTSPipeline(None, lambda audio, block=True, cancel_token=None: None,
+                                   max_workers=1, stream_func=fake_stream, cancel_token=token)
+            pipeline.submit("first")
+            queued = pipeline.submit("second")
+
+        # The second chunk is cancelled while it waits for the only worker
+        token.cancel()
+        release.set()
+        self.assertFalse(queued.result(timeout=1))
+        pipeline.finish()
+
+        self.assertEqual(len(buffers), 2)
+        self.assertTrue(buffers[1].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from concurrent.futures import Future
+from unittest.mock import AsyncMock, patch
+
+from src.turn_orchestrator import AsyncTurnOrchestrator
+
+
+def fake_chat(replies, streaming=None):
+    """Build a chat_with_gpt_async stand-in streaming each reply word by word.
+
+    If given, streaming collects the number of replies being streamed at each word.
+    """
+    active = set()
+
+    async def chat(message, stream=False, history=None):
+        async def generate():
+            active.add(message)
+            for word in replies[message]:
+                # Yield to the loop like a network read would
+                await asyncio.sleep(0.01)
+                if streaming is not None:
+                    streaming.append(len(active))
+                yield {"type": "content", "data": word}
+            active.discard(message)
+        history.append(message)
+        return generate()
+    return chat
+
+
+class WordChunker:
+    """SentenceChunker stand-in that speaks every streamed word as its own chunk."""
+    def feed(self, text):
+        return [text]
+
+    def flush(self):
+        return ""
+
+
+async def fake_tts(text, speed=1.0, in_memory=False):
+    # Later chunks finish first, so ordering has to come from the orchestrator
+    await asyncio.sleep(0.05 / len(text))
+    return f"audio:{text}".encode()
+
+
+class AsyncTurnOrchestratorTests(unittest.TestCase):
+    def setUp(self):
+        self.played = []
+
+        def play(audio, block=True):
+            self.played.append(audio)
+            future = Future()
+            future.set_result(True)
+            return future
+
+        self.orchestrator = AsyncTurnOrchestrator(play, streaming=False)
+        patches = [
+            patch("src.turn_orchestrator.transcribe_audio_async", AsyncMock(side_effect=lambda wav: wav)),
+            patch("src.turn_orchestrator.text_to_speech_async", fake_tts),
+            patch("src.turn_orchestrator.SentenceChunker", WordChunker),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_turn_plays_chunks_in_order(self):
+        replies = {"question": ["a", "bb", "ccc"]}
+        with patch("src.turn_orchestrator.chat_with_gpt_async", fake_chat(replies)):
+            response = asyncio.run(self.orchestrator.run_turn("question", history=[]))
+
+        self.assertEqual(response, "abbccc")
+        self.assertEqual(self.played, [b"audio:a", b"audio:bb", b"audio:ccc"])
+
+    def test_concurrent_turns_share_one_loop(self):
+        replies = {"first": ["1a", "1b"], "second": ["2a", "2b"]}
+        histories = ([], [])
+        streaming = []
+
+        async def run_both():
+            return await asyncio.gather(
+                self.orchestrator.run_turn("first", history=histories[0]),
+                self.orchestrator.run_turn("second", history=histories[1])
+            )
+
+        with patch("src.turn_orchestrator.chat_with_gpt_async", fake_chat(replies, streaming)):
+            responses = asyncio.run(run_both())
+
+        self.assertEqual(responses, ["1a1b", "2a2b"])
+        self.assertEqual(histories, (["first"], ["second"]))
+        # Both replies streamed at the same time, but each turn's audio stays in order
+        self.assertEqual(max(streaming), 2)
+        first = [audio for audio in self.played if audio.startswith(b"audio:1")]
+        second = [audio for audio in self.played if audio.startswith(b"audio:2")]
+        self.assertEqual(first, [b"audio:1a", b"audio:1b"])
+        self.assertEqual(second, [b"audio:2a", b"audio:2b"])
+
+    def test_failed_transcription_returns_none(self):
+        with patch("src.turn_orchestrator.transcribe_audio_async", AsyncMock(return_value=None)):
+            self.assertIsNone(asyncio.run(self.orchestrator.run_turn(b"wav")))
+        self.assertEqual(self.played, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import time
+import unittest
+
+from src.turn_queue import TurnQueue
+
+
+class FakeRecorder:
+    """Hands out prepared recordings, then behaves as if ESC was pressed."""
+
+    def __init__(self, recordings, delays):
+        self.recordings = list(recordings)
+        self.delays = delays
+        self.exit_requested = False
+
+    def wait_for_space_key_recording(self):
+        if not self.recordings:
+            self.exit_requested = True
+            return None, None
+        return self.recordings.pop(0), None
+
+    def transcribe(self, wav_buffer):
+        time.sleep(self.delays[wav_buffer])
+        return None if wav_buffer == "inaudible" else wav_buffer.upper()
+
+
+class TurnQueueTests(unittest.TestCase):
+    def test_answers_follow_recording_order(self):
+        # Later recordings finish transcribing first; answers must still be in order.
+        recorder = FakeRecorder(["first", "second", "third"], {"first": 0.2, "second": 0.1, "third": 0.0})
+        answered = []
+        turn_queue = TurnQueue(recorder, lambda text, started: answered.append(text))
+        turn_queue.run()
+
+        self.assertEqual(answered, ["FIRST", "SECOND", "THIRD"])
+        self.assertEqual(turn_queue.answered, 3)
+
+    def test_next_recording_is_transcribed_while_answering(self):
+        recorder = FakeRecorder(["first", "second"], {"first": 0.0, "second": 0.0})
+        events = []
+        original = recorder.transcribe
+        recorder.transcribe = lambda wav_buffer: events.append(f"transcribe {wav_buffer}") or original(wav_buffer)
+
+        def answer(text, started):
+            events.append(f"answer {text} started")
+            time.sleep(0.2)
+            events.append(f"answer {text} finished")
+
+        TurnQueue(recorder, answer).run()
+
+        self.assertLess(events.index("transcribe second"), events.index("answer FIRST finished"))
+        self.assertLess(events.index("answer FIRST finished"), events.index("answer SECOND started"))
+
+    def test_failed_transcription_is_skipped(self):
+        recorder = FakeRecorder(["inaudible", "next"], {"inaudible": 0.0, "next": 0.0})
+        answered = []
+        TurnQueue(recorder, lambda text, started: answered.append(text)).run()
+        self.assertEqual(answered, ["NEXT"])
+
+
+if __name__ == "__main__":
+    unittest.main()
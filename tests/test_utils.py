@@ -0,0 +1,80 @@
+import random
+import unittest
+
+from src.utils import SentenceChunker
+
+REPLY = ("Sure! Dr. Smith said the value is 3.14, which is close to pi. That is all I know about it, "
+         "honestly; but there is more: the number of digits is infinite. Here is another sentence that "
+         "goes on for a while. And one more so the last chunk is long enough. Done.")
+
+
+def chunk_stream(chunker, pieces):
+    chunks = []
+    for piece in pieces:
+        chunks.extend(chunker.feed(piece))
+    rest = chunker.flush()
+    if rest:
+        chunks.append(rest)
+    return chunks
+
+
+class SentenceChunkerTests(unittest.TestCase):
+    def test_chunks_do_not_depend_on_how_text_is_streamed(self):
+        whole = chunk_stream(SentenceChunker(), [REPLY])
+        rng = random.Random(0)
+        for _ in range(20):
+            pieces, i = [], 0
+            while i < len(REPLY):
+                size = rng.randint(1, 8)
+                pieces.append(REPLY[i:i + size])
+                i += size
+            self.assertEqual(chunk_stream(SentenceChunker(), pieces), whole)
+        self.assertEqual("".join(whole), REPLY)
+
+    def test_first_chunk_is_small_and_later_chunks_grow(self):
+        chunker = SentenceChunker(first_chunk_size=20, chunk_size=100)
+        chunks = chunk_stream(chunker, [word + " " for word in REPLY.split(" ")])
+
+        # Too short to end at "Sure!", so the first chunk ends at a comma past twice the minimum
+        self.assertEqual(chunks[0], "Sure! Dr. Smith said the value is 3.14, ")
+        self.assertGreaterEqual(len(chunks[1]), 40)
+        self.assertGreaterEqual(len(chunks[2]), 80)
+
+    def test_abbreviations_and_decimals_do_not_end_sentences(self):
+        chunker = SentenceChunker(first_chunk_size=1)
+        self.assertEqual(chunker.feed("Ask Dr. Who"), [])
+        self.assertEqual(chunker.feed(" about 3.5 cups. Then"), ["Ask Dr. Who about 3.5 cups. "])
+        self.assertEqual(chunker.flush(), "Then")
+
+    def test_break_split_across_pieces(self):
+        chunker = SentenceChunker(first_chunk_size=5)
+        self.assertEqual(chunker.feed("Hello there."), [])
+        self.assertEqual(chunker.feed(" More"), ["Hello there. "])
+
+    def test_clause_breaks_need_twice_the_minimum(self):
+        chunker = SentenceChunker(first_chunk_size=10)
+        self.assertEqual(chunker.feed("One, two, "), [])
+        self.assertEqual(chunker.feed("three, four, "), ["One, two, three, four, "])
+
+    def test_line_breaks_end_list_items(self):
+        chunker = SentenceChunker(first_chunk_size=12)
+        self.assertEqual(chunker.feed("Your list\n- Eggs\n- Milk"), ["Your list\n- Eggs\n"])
+
+    def test_long_text_without_breaks_is_cut_at_a_space(self):
+        chunker = SentenceChunker(max_chunk_size=50)
+        chunks = []
+        for _ in range(20):
+            chunks.extend(chunker.feed("word "))
+        self.assertTrue(chunks)
+        self.assertTrue(all(chunk.endswith(" ") and len(chunk) <= 55 for chunk in chunks))
+
+    def test_flush_starts_a_new_reply(self):
+        chunker = SentenceChunker(first_chunk_size=5, growth=1)
+        chunker.feed("First reply. More")
+        self.assertEqual(chunker.flush(), "More")
+        self.assertEqual(chunker.chunk_count, 0)
+        self.assertEqual(chunker.feed("Second one. "), ["Second one. "])
+
+
+if __name__ == "__main__":
+    unittest.main()
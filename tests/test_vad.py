@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from src.vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
+
+RATE = 24000
+CHUNK = 1024
+
+
+def noise(seconds, rng):
+    return rng.normal(0, 30, int(RATE * seconds)).astype(np.int16)
+
+
+def tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (4000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def run_detector(detector, signal):
+    events = []
+    for start in range(0, signal.size, CHUNK):
+        for event in detector.process(signal[start:start + CHUNK].tobytes()):
+            events.append((event, start / RATE))
+    return events
+
+
+class VoiceActivityDetectorTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_detects_speech_start_and_end(self):
+        signal = np.concatenate([noise(0.5, self.rng), tone(1.0), noise(1.0, self.rng)])
+        events = run_detector(VoiceActivityDetector(RATE, hangover_ms=200), signal)
+
+        self.assertEqual([event for event, _ in events], [SPEECH_START, SPEECH_END])
+        self.assertAlmostEqual(events[0][1], 0.5, delta=0.1)
+        # Speech ends at 1.5 s; the endpoint must follow within the hangover plus one chunk.
+        self.assertGreater(events[1][1], 1.5)
+        self.assertLess(events[1][1], 1.5 + 0.2 + CHUNK / RATE)
+
+    def test_silence_produces_no_events(self):
+        detector = VoiceActivityDetector(RATE)
+        self.assertEqual(run_detector(detector, noise(2.0, self.rng)), [])
+        self.assertEqual(detector.stats()["endpoints"], 0)
+
+    def test_stats_report_endpoint_latency_and_cpu(self):
+        detector = VoiceActivityDetector(RATE, hangover_ms=200)
+        run_detector(detector, np.concatenate([noise(0.3, self.rng), tone(0.5), noise(0.5, self.rng)]))
+
+        stats = detector.stats()
+        self.assertEqual(stats["endpoints"], 1)
+        self.assertGreaterEqual(stats["last_endpoint_latency_ms"], 200)
+        self.assertLess(stats["last_endpoint_latency_ms"], 300)
+        self.assertGreater(stats["frames_processed"], 0)
+        self.assertGreater(stats["avg_cpu_us_per_frame"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
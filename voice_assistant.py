@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
 import os
 import sys
+import argparse
+import asyncio
+import time
+from concurrent.futures import CancelledError
 from datetime import datetime
+from functools import partial
 
 # Import from our custom modules
-from src.config import logger
-from src.audio_handler import SpaceKeyRecorder, play_audio
-from src.openai_client import chat_with_gpt, text_to_speech, clear_conversation_history, transcribe_audio
-from src.utils import chunk_text_for_tts
+from src.config import logger, TTS_STREAMING, TTS_FORMAT, QUEUED_TURNS
+from src.audio_handler import SpaceKeyRecorder, HandsFreeRecorder, play_audio, audio_queue_manager
+from src.audio_player import JitterBuffer
+from src.cancellation import CancellationToken
+from src.openai_client import chat_with_gpt, chat_with_audio, text_to_speech, stream_speech, clear_conversation_history
+from src.openai_client import tts_cache, warm_tts_cache, response_cache, cached_response, cache_response
+from src.utils import SentenceChunker
+from src.tts_pipeline import TTSPipeline
+from src.realtime_client import RealtimeSession
+from src.turn_orchestrator import AsyncTurnOrchestrator
+from src.turn_queue import TurnQueue
 
 def ensure_recordings_dir():
     """Ensure the recordings directory exists."""
@@ -16,8 +28,210 @@ def ensure_recordings_dir():
         os.makedirs(recordings_dir)
         logger.info(f"Created recordings directory: {recordings_dir}")
 
-def main():
-    """Main function to run the voice assistant."""
+def save_response(full_response):
+    """Save an assistant response to the recordings directory for debugging."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    response_path = os.path.join(os.getcwd(), "recordings", f"response_{timestamp}.txt")
+    with open(response_path, 'w') as f:
+        f.write(full_response)
+    print(f"Response saved to: {response_path}")
+
+def get_parser():
+    """Create command line argument parser."""
+    parser = argparse.ArgumentParser(description='Voice Assistant with OpenAI')
+    parser.add_argument('--hands-free', action='store_true',
+                        help='Detect speech automatically instead of holding SPACE')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Use the Realtime API over one WebSocket instead of separate requests')
+    parser.add_argument('--audio-chat', action='store_true',
+                        help='Send recordings straight to the audio chat model and play its spoken reply')
+    parser.add_argument('--asyncio', action='store_true', dest='use_asyncio',
+                        help='Drive each turn from one asyncio event loop on the async client')
+    parser.add_argument('--queued', action='store_true', default=QUEUED_TURNS,
+                        help='Record and transcribe the next command while the previous answer is still playing')
+    return parser
+
+def speak_reply(chunks, audio_buffer, turn_started, cancel_token=None):
+    """Play a reply whose audio streams into audio_buffer and print its transcript.
+    
+    Args:
+        chunks (iterable): Chunk dicts from chat_with_audio or a RealtimeTurn
+        audio_buffer (JitterBuffer): Buffer the reply audio is streamed into
+        turn_started (float): perf_counter() value when the recording was released
+        cancel_token (CancellationToken, optional): Stops playback when cancelled; the
+                                                    chunks must stop on the same token
+    
+    Returns:
+        str: The transcript of the assistant's reply
+    """
+    # Reply audio starts playing as soon as the first bytes arrive
+    playback = play_audio(audio_buffer, block=False, cancel_token=cancel_token)
+    
+    print("\nAssistant: ", end="", flush=True)
+    full_response = ""
+    for chunk in chunks:
+        if chunk["type"] == "content":
+            if not full_response:
+                log_latency("first words", turn_started)
+            full_response += chunk["data"]
+            print(chunk["data"], end="", flush=True)
+        elif chunk["type"] == "transcription":
+            logger.info(f"You said: {chunk['data']}")
+        elif chunk["type"] == "function_response":
+            logger.info(f"Function {chunk['name']} returned: {chunk['data']}")
+        elif chunk["type"] == "error":
+            logger.error(f"Error in spoken response: {chunk['data']}")
+            full_response += f"\nError: {chunk['data']}"
+            print(f"\nError: {chunk['data']}")
+    print()
+    
+    audio_done(playback)
+    if cancel_token is not None and cancel_token.cancelled:
+        print("[interrupted]")
+    return full_response
+
+def new_tts_pipeline(keep_audio=False, cancel_token=None):
+    """Create the pipeline that speaks a reply chunk by chunk."""
+    return TTSPipeline(
+        partial(text_to_speech, in_memory=True), play_audio, speed=2.0,
+        stream_func=stream_speech if TTS_STREAMING else None, keep_audio=keep_audio,
+        cancel_token=cancel_token
+    )
+
+def play_cached_reply(entry, turn_started, cancel_token=None, wait_for_playback=True):
+    """Print and play a reply from the response cache.
+    
+    Args:
+        entry (CachedResponse): The cached reply
+        turn_started (float): perf_counter() value when the recording was released
+        cancel_token (CancellationToken, optional): Stops playback when cancelled
+        wait_for_playback (bool, optional): Return only once the reply has been spoken
+    
+    Returns:
+        str: The reply text
+    """
+    print(f"\nAssistant: {entry.reply}")
+    log_latency("first words", turn_started)
+    
+    clips = entry.playable_audio()
+    if not clips:
+        # Cached without audio: speak the text instead
+        tts_pipeline = new_tts_pipeline(cancel_token=cancel_token)
+        tts_pipeline.submit(entry.reply, block=wait_for_playback)
+        tts_pipeline.finish()
+        return entry.reply
+    
+    playback = None
+    for clip in clips:
+        playback = play_audio(clip, block=False, cancel_token=cancel_token)
+    if playback is not None and wait_for_playback:
+        # The last clip's Future resolves once every clip before it has played or been dropped
+        audio_done(playback)
+    return entry.reply
+
+def audio_done(playback):
+    """Wait for queued audio to finish playing or be dropped after a barge-in."""
+    try:
+        playback.result()
+    except CancelledError:
+        pass
+
+def answer_transcription(transcription, turn_started, cancel_token=None, wait_for_playback=True):
+    """Stream the reply to a transcribed question, speak it and save it.
+    
+    Args:
+        transcription (str): What the user said
+        turn_started (float): perf_counter() value when the recording was released
+        cancel_token (CancellationToken, optional): Interrupts the reply when cancelled
+        wait_for_playback (bool, optional): Return only once the reply has been spoken.
+                                            If False, return once its audio is queued, so
+                                            the next turn can be answered while it plays.
+    
+    Returns:
+        str: The reply text
+    """
+    print(f"You said: {transcription}")
+    
+    # Repeated questions are answered without chat or speech requests
+    cached = cached_response(transcription)
+    if cached is not None:
+        full_response = play_cached_reply(cached, turn_started, cancel_token, wait_for_playback)
+        log_latency("reply finished", turn_started)
+        save_response(full_response)
+        return full_response
+        
+    # Send to GPT for processing
+    print("\nAssistant: ", end="", flush=True)
+    full_response = ""
+    chunker = SentenceChunker()  # Splits the streamed reply into speakable chunks
+    tts_pipeline = new_tts_pipeline(keep_audio=response_cache is not None, cancel_token=cancel_token)
+    had_error = False
+    
+    for chunk in chat_with_gpt(transcription, True, cancel_token=cancel_token):
+        if chunk["type"] == "content":
+            if not full_response:
+                log_latency("first words", turn_started)
+            content = chunk["data"]
+            full_response += content
+            print(content, end="", flush=True)
+            
+            # Synthesize completed chunks in the background while the stream continues
+            for chunk_to_process in chunker.feed(content):
+                tts_pipeline.submit(chunk_to_process)
+        elif chunk["type"] == "function_response":
+            # Log function responses if needed
+            logger.info(f"Function {chunk['name']} returned: {chunk['data']}")
+        elif chunk["type"] == "error":
+            # Handle errors
+            logger.error(f"Error in streaming: {chunk['data']}")
+            full_response += f"\nError: {chunk['data']}"
+            print(f"\nError: {chunk['data']}")
+            had_error = True
+    
+    print()  # Add newline after streaming completes
+    
+    # Process any remaining text in buffer
+    remaining = chunker.flush()
+    if remaining.strip():
+        tts_pipeline.submit(remaining, block=wait_for_playback)
+    
+    # Wait for all queued chunks to reach the player
+    tts_pipeline.finish()
+    if cancel_token is not None and cancel_token.cancelled:
+        # The next recording is already being captured
+        print("[interrupted]")
+        log_latency("reply interrupted", turn_started)
+        save_response(full_response)
+        return full_response
+    log_latency("reply finished" if wait_for_playback else "reply queued for playback", turn_started)
+    
+    if response_cache is not None and not had_error:
+        cache_response(transcription, tts_pipeline.audio(), "pcm" if TTS_STREAMING else TTS_FORMAT)
+    
+    # Save response to file for debugging
+    save_response(full_response)
+    return full_response
+
+def log_latency(milestone, turn_started):
+    """Log the time from releasing the recording to a point in the turn."""
+    logger.info(f"Turn latency: {milestone} after {time.perf_counter() - turn_started:.2f}s")
+
+def main(hands_free=False, realtime=False, audio_chat=False, use_asyncio=False, queued=False):
+    """Main function to run the voice assistant.
+    
+    Args:
+        hands_free (bool, optional): Use voice activity detection to start and end
+                                     turns instead of the SPACE key. Defaults to False.
+        realtime (bool, optional): Stream audio to the Realtime API and play its spoken
+                                   reply, instead of transcription, chat and TTS requests.
+        audio_chat (bool, optional): Send recordings to the audio chat model in one request
+                                     instead of transcription, chat and TTS requests.
+        use_asyncio (bool, optional): Run transcription, chat, synthesis and playback handoff
+                                      as coroutines on one event loop.
+        queued (bool, optional): Capture and transcribe new turns while earlier answers are
+                                 still playing; answers are given in the order asked.
+    """
+    realtime_session = None
     try:
         # Ensure recordings directory exists
         ensure_recordings_dir()
@@ -25,94 +239,115 @@ def main():
         # Display initial instructions
         print("\nVoice Assistant with OpenAI")
         print("--------------------------------")
-        print("Press and hold SPACE to record, release to stop.")
-        print("Press ESC to exit.\n")
+        if hands_free:
+            print("Hands-free mode: just start speaking, pause to finish.")
+            print("Press Ctrl+C to exit.\n")
+            space_recorder = HandsFreeRecorder()
+        else:
+            print("Press and hold SPACE to record, release to stop.")
+            print("Press ESC to exit.\n")
+            # The audio backends hear the recording themselves, no transcription needed
+            space_recorder = SpaceKeyRecorder(incremental=not (realtime or audio_chat or use_asyncio))
+        
+        if not (realtime or audio_chat):
+            # Pre-synthesize common phrases at the speed replies are spoken
+            warm_tts_cache(speed=2.0)
         
-        space_recorder = SpaceKeyRecorder()
+        if realtime:
+            realtime_session = RealtimeSession()
+            realtime_session.connect()
+            # Recordings are streamed while the user is still speaking
+            realtime_session.attach_recorder(space_recorder.recorder)
         
         try:
+            if use_asyncio:
+                orchestrator = AsyncTurnOrchestrator(play_audio, space_recorder)
+                asyncio.run(orchestrator.run(on_text=lambda text: print(text, end="", flush=True)))
+                print("\nExiting voice assistant. Goodbye!")
+                return
+            
+            if queued and hands_free:
+                # Without echo cancellation the microphone would pick up the answers being played
+                logger.warning("Queued turns need SPACE to record; answering one turn at a time")
+            elif queued and not (realtime or audio_chat):
+                print("Queued turns: ask your next question whenever you like, answers come in order.")
+                turn_queue = TurnQueue(space_recorder, partial(answer_transcription, wait_for_playback=False))
+                try:
+                    turn_queue.run()
+                    # The last answers may still be playing
+                    audio_queue_manager.wait_for_queue_empty()
+                finally:
+                    turn_queue.log_stats()
+                print("Exiting voice assistant. Goodbye!")
+                return
+            
             while True:
-                print("\nWaiting for you to press SPACE to start recording...")
+                if hands_free:
+                    print("\nListening...")
+                else:
+                    print("\nWaiting for you to press SPACE to start recording...")
                 
                 # Wait for space key to be pressed and released
+                if not hands_free:
+                    space_recorder.set_barge_in_token(None)
                 wav_buffer, wav_filename = space_recorder.wait_for_space_key_recording()
                 
                 if wav_buffer is None:
                     logger.info("No recording captured or user exited.")
-                    # Check if the listener is still running
-                    if not space_recorder.listener.running:
+                    # Check if the user pressed ESC
+                    if space_recorder.exit_requested:
                         print("Exiting voice assistant. Goodbye!")
                         break
                     continue
                 
                 print("Processing your recording...")
+                turn_started = time.perf_counter()
+                
+                # Pressing SPACE again before the answer is over interrupts it
+                cancel_token = CancellationToken()
+                if not hands_free:
+                    space_recorder.set_barge_in_token(cancel_token)
+                
+                if realtime_session or audio_chat:
+                    if realtime_session:
+                        turn = realtime_session.commit_turn(wav_buffer, cancel_token)
+                        full_response = speak_reply(turn, turn.audio, turn_started, cancel_token)
+                    else:
+                        audio_buffer = JitterBuffer()
+                        full_response = speak_reply(chat_with_audio(wav_buffer, audio_buffer, cancel_token),
+                                                    audio_buffer, turn_started, cancel_token)
+                    log_latency("reply finished", turn_started)
+                    save_response(full_response)
+                    continue
                 
                 # Transcribe audio
-                transcription = transcribe_audio(wav_buffer)
+                transcription = space_recorder.transcribe(wav_buffer)
                 
                 if transcription is None:
                     logger.error("Failed to transcribe audio.")
                     continue
-                    
-                print(f"You said: {transcription}")
-                    
-                # Send to GPT for processing
-                print("\nAssistant: ", end="", flush=True)
-                full_response = ""
-                current_buffer = ""  # Buffer for accumulating text chunks
-                
-                for chunk in chat_with_gpt(transcription, True):
-                    if chunk["type"] == "content":
-                        content = chunk["data"]
-                        full_response += content
-                        print(content, end="", flush=True)
-                        
-                        # Process text using the chunking utility
-                        chunk_to_process, current_buffer = chunk_text_for_tts(content, current_buffer)
-                        
-                        if chunk_to_process:
-                            # Generate and play speech for this chunk
-                            logger.info(f"Converting chunk to speech: '{chunk_to_process}'")
-                            chunk_audio_path = text_to_speech(chunk_to_process, 2.0)
-                            if chunk_audio_path:
-                                # Play the generated chunk speech without blocking
-                                play_audio(chunk_audio_path, block=False)
-                    elif chunk["type"] == "function_response":
-                        # Log function responses if needed
-                        logger.info(f"Function {chunk['name']} returned: {chunk['data']}")
-                    elif chunk["type"] == "error":
-                        # Handle errors
-                        logger.error(f"Error in streaming: {chunk['data']}")
-                        full_response += f"\nError: {chunk['data']}"
-                        print(f"\nError: {chunk['data']}")
-                
-                print()  # Add newline after streaming completes
-                
-                # Process any remaining text in buffer
-                if current_buffer.strip():
-                    logger.info(f"Converting final chunk to speech: '{current_buffer}'")
-                    chunk_audio_path = text_to_speech(current_buffer, 2.0)
-                    if chunk_audio_path:
-                        play_audio(chunk_audio_path, block=True)
                 
-                # Save response to file for debugging
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                response_path = os.path.join(os.getcwd(), "recordings", f"response_{timestamp}.txt")
-                with open(response_path, 'w') as f:
-                    f.write(full_response)
-                print(f"Response saved to: {response_path}")
+                answer_transcription(transcription, turn_started, cancel_token)
                 
         except KeyboardInterrupt:
             print("\nExiting voice assistant. Goodbye!")
             
     finally:
         # Clean up resources
+        if realtime_session:
+            realtime_session.close()
         if 'space_recorder' in locals():
             space_recorder.close()
+        if tts_cache is not None:
+            tts_cache.log_stats()
+        if response_cache is not None:
+            response_cache.log_stats()
 
 if __name__ == "__main__":
+    args = get_parser().parse_args()
     try:
-        main()
+        main(hands_free=args.hands_free, realtime=args.realtime, audio_chat=args.audio_chat,
+             use_asyncio=args.use_asyncio, queued=args.queued)
     except KeyboardInterrupt:
         print("\nProgram interrupted by user. Exiting...")
     except Exception as e:
@@ -2,14 +2,15 @@
 import os
 import sys
 from datetime import datetime
+from functools import partial
 
 # Import from our custom modules
 from PyQt5.QtWidgets import QApplication
 
-from src.config import logger
+from src.config import logger, TTS_STREAMING
 from src.audio_handler import SpaceKeyRecorder, play_audio
-from src.openai_client import chat_with_gpt, text_to_speech, clear_conversation_history, transcribe_audio
-from src.utils import chunk_text_for_tts
+from src.openai_client import chat_with_gpt, text_to_speech, stream_speech, clear_conversation_history, warm_tts_cache
+from src.utils import SentenceChunker
 from src.ui.voice_assistant_ui import VoiceAssistantUI
 
 def ensure_recordings_dir():
@@ -46,14 +47,18 @@ def main():
         # Create the recording handler
         space_recorder = SpaceKeyRecorder()
         
+        # Pre-synthesize common phrases at the speed replies are spoken
+        warm_tts_cache(speed=2.0)
+        
         # Create and display the UI
         ui = VoiceAssistantUI(
             recording_handler=space_recorder,
-            transcribe_func=transcribe_audio,
+            transcribe_func=space_recorder.transcribe,
             chat_func=chat_with_gpt,
-            tts_func=text_to_speech,
+            tts_func=partial(text_to_speech, in_memory=True),
             play_func=play_audio,
-            chunk_text_func=chunk_text_for_tts
+            chunker_factory=SentenceChunker,
+            stream_func=stream_speech if TTS_STREAMING else None
         )
         ui.show()
         